@@ -6,7 +6,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from .models import Camera, RecordingSchedule, Recording, CameraAccess, LiveStream, LocalRecordingClient, GCPVideoTransfer
+from .models import Camera, RecordingSchedule, Recording, CameraAccess, LiveStream, LocalRecordingClient, GCPVideoTransfer, UploadTask, StorageObject, RecordingRollup
 
 
 @admin.register(Camera)
@@ -331,4 +331,50 @@ class LocalRecordingClientAdmin(admin.ModelAdmin):
         if not change:  # Creating new client
             import secrets
             obj.client_token = secrets.token_urlsafe(32)
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(UploadTask)
+class UploadTaskAdmin(admin.ModelAdmin):
+    """Admin configuration for UploadTask model"""
+    
+    list_display = ['recording', 'status', 'attempts', 'next_attempt_at', 'claimed_by', 'updated_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['recording__name', 'recording__camera__name', 'local_path']
+    readonly_fields = ['id', 'recording', 'local_path', 'claimed_by', 'claimed_at', 'created_at', 'updated_at']
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        """Requeue selected uploads for immediate retry"""
+        updated = queryset.exclude(status='completed').update(
+            status='queued', next_attempt_at=timezone.now(), claimed_by=None, claimed_at=None
+        )
+        
+        from .upload_queue import upload_queue
+        upload_queue.wake()
+        self.message_user(request, f'{updated} uploads queued for retry.')
+    retry_now.short_description = 'Retry selected uploads now'
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        return super().get_queryset(request).select_related('recording', 'recording__camera')
+
+
+@admin.register(StorageObject)
+class StorageObjectAdmin(admin.ModelAdmin):
+    """Admin configuration for StorageObject model"""
+    
+    list_display = ['key', 'backend', 'size', 'content_type', 'verified_at']
+    list_filter = ['backend']
+    search_fields = ['key']
+    readonly_fields = ['id', 'backend', 'key', 'size', 'etag', 'content_type', 'verified_at']
+
+
+@admin.register(RecordingRollup)
+class RecordingRollupAdmin(admin.ModelAdmin):
+    """Admin configuration for RecordingRollup model"""
+    
+    list_display = ['camera', 'hour', 'recording_count', 'failed_count', 'total_bytes', 'total_seconds', 'updated_at']
+    list_filter = ['camera']
+    date_hierarchy = 'hour'
+    readonly_fields = ['id', 'camera', 'hour', 'recording_count', 'failed_count', 'total_bytes', 'total_seconds', 'updated_at']
@@ -11,6 +11,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 from typing import List, Optional
+from datetime import datetime
 import uuid
 import logging
 
@@ -108,6 +109,7 @@ class CameraRegistrationSchema(Schema):
     location: Optional[str] = Field(None, description="Physical location", example="Front Entrance")
     auto_record: Optional[bool] = Field(False, description="Enable automatic recording", example=False)
     record_quality: Optional[str] = Field("medium", description="Recording quality", example="medium")
+    recording_engine: Optional[str] = Field("opencv", description="Recording engine: 'opencv' (re-encode) or 'remux' (stream copy)", example="opencv")
     max_recording_hours: Optional[int] = Field(24, description="Maximum hours to keep recordings", example=24)
     is_public: Optional[bool] = Field(False, description="Whether basic users can access this camera", example=False)
     test_connection: Optional[bool] = Field(True, description="Test connection before creating", example=True)
@@ -127,6 +129,7 @@ class CameraUpdateSchema(Schema):
     location: Optional[str] = Field(None, description="Camera location", example="Front Door")
     auto_record: Optional[bool] = Field(None, description="Enable automatic recording", example=True)
     record_quality: Optional[str] = Field(None, description="Recording quality", example="high")
+    recording_engine: Optional[str] = Field(None, description="Recording engine: 'opencv' (re-encode) or 'remux' (stream copy)", example="remux")
     max_recording_hours: Optional[int] = Field(None, description="Maximum recording duration in hours", example=24)
     is_public: Optional[bool] = Field(None, description="Whether basic users can access this camera", example=False)
     status: Optional[str] = Field(None, description="Camera status", example="active")
@@ -233,6 +236,24 @@ class RecordingOverviewResponseSchema(Schema):
     online_cameras: int = Field(..., description="Number of online cameras")
     cameras: List[dict] = Field(..., description="List of camera information with recording status")
 
+class RecordingStatsSummarySchema(Schema):
+    total_recordings: int = Field(..., description="Total number of recordings")
+    completed_recordings: int = Field(..., description="Number of completed recordings")
+    failed_recordings: int = Field(..., description="Number of failed recordings")
+    active_recordings: int = Field(..., description="Number of active recordings")
+    success_rate: float = Field(..., description="Success rate percentage")
+    total_size_bytes: int = Field(..., description="Total size in bytes")
+    total_size_gb: float = Field(..., description="Total size in GB")
+    total_duration_seconds: float = Field(..., description="Total duration in seconds")
+    total_duration_hours: float = Field(..., description="Total duration in hours")
+
+class CameraRecordingStatsSchema(RecordingStatsSummarySchema):
+    camera_id: str = Field(..., description="Camera UUID")
+    camera_name: str = Field(..., description="Camera name")
+
+class StorageRecordingStatsSchema(RecordingStatsSummarySchema):
+    storage_type: str = Field(..., description="Storage backend (local, aws, gcp)")
+
 class RecordingStatsResponseSchema(Schema):
     total_recordings: int = Field(..., description="Total number of recordings")
     completed_recordings: int = Field(..., description="Number of completed recordings")
@@ -243,6 +264,8 @@ class RecordingStatsResponseSchema(Schema):
     total_size_gb: float = Field(..., description="Total size in GB")
     total_duration_seconds: float = Field(..., description="Total duration in seconds")
     total_duration_hours: float = Field(..., description="Total duration in hours")
+    per_camera: List[CameraRecordingStatsSchema] = Field(..., description="Statistics per camera")
+    per_storage: List[StorageRecordingStatsSchema] = Field(..., description="Statistics per storage backend")
 
 class ScheduleDetailResponseSchema(Schema):
     id: str = Field(..., description="Schedule UUID")
@@ -281,6 +304,7 @@ class RecordingDetailResponseSchema(Schema):
     file_url: str = Field(..., description="File download URL")
     is_active: bool = Field(..., description="Recording active status")
     file_exists: bool = Field(..., description="File exists on disk")
+    hls_playlist: Optional[str] = Field(None, description="HLS master playlist path, if packaged (play via /recordings/{id}/playlist/)")
 
 class ScheduleUpdateResponseSchema(Schema):
     message: str = Field(..., description="Success message")
@@ -348,14 +372,20 @@ class RecordingItemSchema(Schema):
     is_active: Optional[bool] = Field(None, description="Recording active status")
     file_exists: Optional[bool] = Field(None, description="File exists on disk")
     absolute_file_path: Optional[str] = Field(None, description="Absolute file path")
+    storage_type: Optional[str] = Field(None, description="Storage backend (local, aws, gcp)")
+    upload_status: Optional[str] = Field(None, description="Cloud upload status")
+    hls_playlist: Optional[str] = Field(None, description="HLS master playlist path")
     created_at: Optional[str] = Field(None, description="Creation timestamp")
     updated_at: Optional[str] = Field(None, description="Last update timestamp")
 
 class RecordingListResponseSchema(Schema):
-    total_recordings: int = Field(..., description="Total number of recordings")
-    completed_recordings: int = Field(..., description="Number of completed recordings")
-    failed_recordings: int = Field(..., description="Number of failed recordings")
-    recordings: List[RecordingItemSchema] = Field(..., description="List of recordings")
+    total_recordings: int = Field(..., description="Total number of recordings matching the filters")
+    completed_recordings: int = Field(..., description="Number of completed recordings matching the filters")
+    failed_recordings: int = Field(..., description="Number of failed recordings matching the filters")
+    recordings: List[RecordingItemSchema] = Field(..., description="Recordings on this page")
+    page_size: int = Field(..., description="Maximum number of recordings per page")
+    has_more: bool = Field(..., description="Whether another page follows")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
 
 class ScheduleItemSchema(Schema):
     id: str = Field(..., description="Schedule UUID")
@@ -535,6 +565,53 @@ def list_cameras(request):
     }
 
 
+@router.get("/cameras/health/", auth=cctv_jwt_auth,
+            summary="Camera Health",
+            description="Get the background health monitor's latest results and probe latency for accessible cameras")
+def camera_health_overview(request):
+    """Get cached camera health from the background monitor (never probes cameras)"""
+    from .health_monitor import camera_health_monitor
+    
+    current_user = request.auth
+    if not current_user:
+        raise HttpError(401, "Authentication required")
+    
+    if not check_cctv_access(current_user, 'view'):
+        raise HttpError(403, "CCTV access denied. Dev role or higher required.")
+    
+    if current_user.role in ['superadmin', 'admin']:
+        queryset = Camera.objects.filter(is_active=True)
+    else:
+        user_camera_ids = CameraAccess.objects.filter(
+            user=current_user, 
+            is_active=True
+        ).values_list('camera_id', flat=True)
+        
+        queryset = Camera.objects.filter(
+            is_active=True
+        ).filter(
+            models.Q(is_public=True) | models.Q(id__in=user_camera_ids)
+        )
+    
+    cameras = []
+    for camera in queryset.only('id', 'name', 'status', 'is_online', 'last_seen'):
+        cameras.append({
+            "camera_id": str(camera.id),
+            "camera_name": camera.name,
+            "status": camera.status,
+            "is_online": camera.is_online,
+            "last_seen": camera.last_seen.isoformat() if camera.last_seen else None,
+            **camera_health_monitor.get_summary(camera.id)
+        })
+    
+    return {
+        "last_sweep": camera_health_monitor.last_sweep.isoformat() if camera_health_monitor.last_sweep else None,
+        "total_cameras": len(cameras),
+        "online_cameras": sum(1 for camera in cameras if camera['is_online']),
+        "cameras": cameras
+    }
+
+
 @router.get("/cameras/multi-stream/", auth=cctv_jwt_auth,
             summary="Multi-Camera Stream Dashboard",
             description="Get a dashboard view with multiple camera streams for monitoring multiple feeds simultaneously")
@@ -542,6 +619,7 @@ def multi_camera_stream_dashboard(request):
     """Get multi-camera stream dashboard information"""
     from .models import Camera
     from .streaming import stream_manager
+    from .frame_bus import STREAM_TIERS
     
     try:
         # Get all active cameras
@@ -550,7 +628,7 @@ def multi_camera_stream_dashboard(request):
         dashboard_data = []
         for camera in cameras:
             # Check if camera is currently streaming
-            is_streaming = any(info['camera'].id == camera.id for info in stream_manager.active_streams.values())
+            is_streaming = stream_manager.is_camera_streaming(camera.id)
             
             # Get stream health
             health = stream_manager.get_stream_health(camera.id, 'main')
@@ -564,12 +642,15 @@ def multi_camera_stream_dashboard(request):
                 "stream_health": health,
                 "stream_urls": {
                     "main": f"/v0/api/cctv/cameras/{camera.id}/stream/?quality=main",
-                    "sub": f"/v0/api/cctv/cameras/{camera.id}/stream/?quality=sub" if camera.rtsp_url_sub else None
+                    "sub": f"/v0/api/cctv/cameras/{camera.id}/stream/?quality=sub" if camera.rtsp_url_sub else None,
+                    "tile": f"/v0/api/cctv/cameras/{camera.id}/stream/?quality=main&tier=tile",
+                    "thumb": f"/v0/api/cctv/cameras/{camera.id}/stream/?quality=main&tier=thumb"
                 },
                 "location": camera.location,
                 "last_seen": camera.last_seen.isoformat() if camera.last_seen else None,
                 "rtsp_url": camera.rtsp_url,
-                "supported_qualities": ["main"] + (["sub"] if camera.rtsp_url_sub else [])
+                "supported_qualities": ["main"] + (["sub"] if camera.rtsp_url_sub else []),
+                "supported_tiers": list(STREAM_TIERS)
             }
             
             dashboard_data.append(camera_info)
@@ -682,6 +763,7 @@ def register_camera(request, camera_data: CameraRegistrationSchema):
             'location': data.get('location'),
             'auto_record': data.get('auto_record', False),
             'record_quality': data.get('record_quality', 'medium'),
+            'recording_engine': data.get('recording_engine') or 'opencv',
             'max_recording_hours': data.get('max_recording_hours', 24),
             'is_public': data.get('is_public', False),
         }
@@ -722,6 +804,7 @@ def register_camera(request, camera_data: CameraRegistrationSchema):
             location=camera_creation_data.get('location', ''),
             auto_record=camera_creation_data.get('auto_record', False),
             record_quality=camera_creation_data.get('record_quality', 'medium'),
+            recording_engine=camera_creation_data.get('recording_engine', 'opencv'),
             max_recording_hours=camera_creation_data.get('max_recording_hours', 24),
             is_public=camera_creation_data.get('is_public', False),
             created_by=current_user
@@ -994,30 +1077,38 @@ def recording_status(request, camera_id: uuid.UUID):
             description="Get overview of all camera recording statuses and recent activity")
 def recording_overview(request):
     """Get overview of all camera recording statuses"""
+    from django.db.models import Count, OuterRef, Subquery
     from .streaming import recording_manager
     
     try:
-        # Since auth is disabled, get all cameras directly
-        cameras = Camera.objects.all()
+        # Since auth is disabled, get all cameras directly. Recording counts and the
+        # latest recording come from the same query instead of two queries per camera.
+        latest_recording = Recording.objects.filter(camera=OuterRef('pk')).order_by('-start_time', '-id')
+        cameras = list(
+            Camera.objects.annotate(
+                total_recordings=Count('recordings'),
+                last_recording_id=Subquery(latest_recording.values('id')[:1])
+            ).only('id', 'name', 'ip_address', 'status', 'is_online')
+        )
+        last_recordings = Recording.objects.only('id', 'name', 'start_time', 'status').in_bulk(
+            [camera.last_recording_id for camera in cameras if camera.last_recording_id]
+        )
         
         overview = []
         
         for camera in cameras:
-            is_recording = recording_manager.is_recording(camera.id)
-            
             camera_info = {
                 'camera_id': str(camera.id),
                 'camera_name': camera.name,
                 'ip_address': camera.ip_address,
                 'status': camera.status,
                 'is_online': camera.is_online,
-                'is_recording': is_recording,
-                'total_recordings': camera.recordings.count(),
+                'is_recording': recording_manager.is_recording(camera.id),
+                'total_recordings': camera.total_recordings,
                 'last_recording': None
             }
             
-            # Get last recording
-            last_recording = camera.recordings.order_by('-start_time').first()
+            last_recording = last_recordings.get(camera.last_recording_id)
             if last_recording:
                 camera_info['last_recording'] = {
                     'id': str(last_recording.id),
@@ -1085,7 +1176,7 @@ def validate_camera_update(request, camera_id: uuid.UUID, camera_data: CameraUpd
         model_fields = {
             'name', 'description', 'ip_address', 'port', 'username', 'password',
             'rtsp_url', 'rtsp_url_sub', 'rtsp_path', 'camera_type', 'status',
-            'location', 'auto_record', 'record_quality', 'max_recording_hours', 'is_public'
+            'location', 'auto_record', 'record_quality', 'recording_engine', 'max_recording_hours', 'is_public'
         }
         
         # Remove non-model fields
@@ -1204,7 +1295,7 @@ def update_camera(request, camera_id: uuid.UUID, camera_data: CameraUpdateSchema
         model_fields = {
             'name', 'description', 'ip_address', 'port', 'username', 'password',
             'rtsp_url', 'rtsp_url_sub', 'rtsp_path', 'camera_type', 'status',
-            'location', 'auto_record', 'record_quality', 'max_recording_hours', 'is_public'
+            'location', 'auto_record', 'record_quality', 'recording_engine', 'max_recording_hours', 'is_public'
         }
         
         # Remove non-model fields
@@ -1275,6 +1366,7 @@ def update_camera(request, camera_id: uuid.UUID, camera_data: CameraUpdateSchema
                     "location": updated_camera.location,
                     "auto_record": updated_camera.auto_record,
                     "record_quality": updated_camera.record_quality,
+                    "recording_engine": updated_camera.recording_engine,
                     "max_recording_hours": updated_camera.max_recording_hours,
                     "is_public": updated_camera.is_public,
                     "is_online": updated_camera.is_online,
@@ -1366,11 +1458,12 @@ def stream_test(request):
 
 @router.get("/cameras/{camera_id}/stream/", 
             summary="Live Video Stream (No Auth Required)",
-            description="Get live MJPEG video stream from camera. No authentication required. Returns a multipart HTTP stream that can be displayed in HTML img tags or video players.",
+            description="Get live MJPEG video stream from camera. No authentication required. Returns a multipart HTTP stream that can be displayed in HTML img tags or video players. "
+                        "Use `tier` (thumb=320px, tile=640px, full) or `width` to get a server-side downscaled stream for small tiles.",
             tags=["Live Streaming"],
             deprecated=False)
 
-def camera_live_stream(request, camera_id: uuid.UUID, quality: str = "main"):
+def camera_live_stream(request, camera_id: uuid.UUID, quality: str = "main", tier: str = None, width: int = None):
     """Stream live video from camera - No authentication required"""
     from django.http import StreamingHttpResponse, HttpResponse
     from django.shortcuts import get_object_or_404
@@ -1423,17 +1516,24 @@ def camera_live_stream(request, camera_id: uuid.UUID, quality: str = "main"):
         
         # Generate streaming response with timeout protection
         try:
-            # Test camera connection before starting stream
-            from .opencv_config import test_camera_connection_robust
-            stream_url = camera.get_stream_url(quality)
-            connection_ok, connection_msg = test_camera_connection_robust(stream_url, max_attempts=2)
+            # Test camera connection before starting stream; a camera that is already
+            # streaming needs no probe, and recent probe results are reused
+            from .connection_health import connection_health
+            if stream_manager.is_stream_active(camera.id, quality):
+                connection_ok, connection_msg = True, "Camera is streaming"
+            else:
+                stream_url = camera.get_stream_url(quality)
+                connection_ok, connection_msg = connection_health.check(stream_url, max_attempts=2)
             
             if not connection_ok:
                 logger.warning(f"Camera connection test failed: {connection_msg}")
                 return HttpResponse(f'Camera connection failed: {connection_msg}', status=503)
             
+            from .frame_bus import resolve_stream_width
+            output_width = resolve_stream_width(tier, width)
+            
             response = StreamingHttpResponse(
-                generate_frames(camera, quality),
+                generate_frames(camera, quality, output_width),
                 content_type='multipart/x-mixed-replace; boundary=frame'
             )
             
@@ -1447,6 +1547,7 @@ def camera_live_stream(request, camera_id: uuid.UUID, quality: str = "main"):
             response['Access-Control-Max-Age'] = '86400'  # 24 hours
             response['X-Camera-Name'] = camera.name
             response['X-Stream-Quality'] = quality
+            response['X-Stream-Width'] = str(output_width) if output_width else 'full'
             
         except Exception as stream_error:
             logger.error(f"Error creating streaming response: {str(stream_error)}")
@@ -1461,6 +1562,112 @@ def camera_live_stream(request, camera_id: uuid.UUID, quality: str = "main"):
         return HttpResponse(f'Streaming Error: {str(e)}', status=500)
 
 
+@router.get("/cameras/{camera_id}/stream/async/",
+            summary="Live Video Stream, ASGI (No Auth Required)",
+            description="Same MJPEG stream as /stream/, served by an async generator when the server runs under ASGI "
+                        "(config.asgi). Viewers wait on the event loop instead of holding a worker thread each, and slow "
+                        "clients skip frames instead of buffering them. Under WSGI this redirects to /stream/.",
+            tags=["Live Streaming"])
+async def camera_live_stream_async(request, camera_id: uuid.UUID, quality: str = "main", tier: str = None, width: int = None):
+    """Stream live video from camera on the event loop - No authentication required"""
+    import asyncio
+    from asgiref.sync import sync_to_async
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse, HttpResponse, HttpResponseRedirect
+    from .streaming import agenerate_frames, stream_manager
+    from .connection_health import connection_health
+    from .frame_bus import resolve_stream_width
+    
+    if not isinstance(request, ASGIRequest):
+        # WSGI collects an async iterator into a list before sending it, which never ends for a live stream
+        return HttpResponseRedirect(request.get_full_path().replace('/stream/async/', '/stream/', 1))
+    
+    try:
+        camera = await Camera.objects.aget(id=camera_id)
+    except Camera.DoesNotExist:
+        return HttpResponse('Camera not found', status=404)
+    
+    if camera.status == 'error':
+        return HttpResponse(f'Camera {camera.name} has an error status and cannot stream', status=503)
+    if not camera.rtsp_url:
+        return HttpResponse(f'Camera {camera.name} has no valid RTSP URL configured', status=400)
+    
+    if camera.status == 'inactive':
+        def activate():
+            camera.set_status('active')
+            camera.is_online = True
+            camera.is_streaming = False
+            camera.save(update_fields=['status', 'is_online', 'is_streaming'])
+        
+        await sync_to_async(activate)()
+        logger.info(f"Auto-activated camera {camera.name} for streaming - set is_online=True, is_streaming=False")
+    
+    if quality not in ['main', 'sub'] or (quality == 'sub' and not camera.rtsp_url_sub):
+        quality = 'main'
+    
+    if not stream_manager.is_stream_active(camera.id, quality):
+        connection_ok, connection_msg = await asyncio.to_thread(
+            connection_health.check, camera.get_stream_url(quality), max_attempts=2
+        )
+        if not connection_ok:
+            logger.warning(f"Camera connection test failed: {connection_msg}")
+            return HttpResponse(f'Camera connection failed: {connection_msg}', status=503)
+    
+    output_width = resolve_stream_width(tier, width)
+    response = StreamingHttpResponse(
+        agenerate_frames(camera, quality, output_width),
+        content_type='multipart/x-mixed-replace; boundary=frame'
+    )
+    response['Cache-Control'] = 'no-cache, no-store, max-age=0, must-revalidate'
+    response['Pragma'] = 'no-cache'
+    response['Expires'] = 'Thu, 01 Jan 1970 00:00:00 GMT'
+    response['Access-Control-Allow-Origin'] = '*'
+    response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+    response['Access-Control-Allow-Headers'] = 'Content-Type'
+    response['X-Camera-Name'] = camera.name
+    response['X-Stream-Quality'] = quality
+    response['X-Stream-Width'] = str(output_width) if output_width else 'full'
+    return response
+
+
+@router.get("/cameras/{camera_id}/live/playlist/",
+            summary="Live HLS Playlist (No Auth Required)",
+            description="Rolling HLS playlist of the camera's live stream, for hls.js/Safari. The camera's H.264 stream is "
+                        "remuxed into short segments that are served as static media files; poll this playlist as the player "
+                        "does. The packager starts on the first request and stops when nobody has requested it for a while.",
+            tags=["Live Streaming"])
+def camera_live_playlist(request, camera_id: uuid.UUID, quality: str = "main"):
+    """Live HLS playlist of a camera"""
+    from django.http import HttpResponse
+    from .live_hls import live_hls_enabled, live_hls_manager
+    
+    if not live_hls_enabled():
+        return HttpResponse('Live HLS is not enabled', status=404)
+    
+    camera = get_object_or_404(Camera, id=camera_id)
+    if camera.status == 'error' or not camera.rtsp_url:
+        return HttpResponse(f'Camera {camera.name} cannot stream', status=503)
+    
+    if quality not in ['main', 'sub'] or (quality == 'sub' and not camera.rtsp_url_sub):
+        quality = 'main'
+    
+    try:
+        playlist = live_hls_manager.playlist(camera, quality)
+    except Exception as e:
+        logger.error(f"Live HLS error for camera {camera_id}: {str(e)}")
+        return HttpResponse(f'Live HLS error: {str(e)}', status=503)
+    
+    if playlist is None:
+        return HttpResponse(f'Camera {camera.name} did not produce live segments in time', status=503)
+    
+    response = HttpResponse(playlist, content_type='application/vnd.apple.mpegurl')
+    response['Cache-Control'] = 'no-cache, no-store, max-age=0'
+    response['Access-Control-Allow-Origin'] = '*'
+    response['X-Camera-Name'] = camera.name
+    response['X-Stream-Quality'] = quality
+    return response
+
+
 @router.get("/cameras/{camera_id}/stream/info/", response=StreamInfoSchema,
             summary="Stream Information", auth=cctv_jwt_auth,
             description="Get information about camera stream capabilities and current status")
@@ -1470,7 +1677,7 @@ def camera_stream_info(request, camera_id: uuid.UUID):
     
     # Check if camera is currently streaming
     from .streaming import stream_manager
-    is_streaming = any(info['camera'].id == camera_id for info in stream_manager.active_streams.values())
+    is_streaming = stream_manager.is_camera_streaming(camera.id)
     
     return {
         "camera_id": str(camera.id),
@@ -1498,14 +1705,14 @@ def camera_stream_info(request, camera_id: uuid.UUID):
 def camera_thumbnail(request, camera_id: uuid.UUID, quality: str = "main"):
     """Get a single thumbnail frame from camera"""
     from django.http import HttpResponse
-    from .streaming import stream_manager
+    from .frame_bus import frame_bus
     import cv2
     
     camera = get_object_or_404(Camera, id=camera_id)
     
     try:
-        # Get a single frame
-        frame = stream_manager.get_frame(camera.id, quality)
+        # Get a single frame (reuses the running capture worker if there is one)
+        frame = frame_bus.grab_frame(camera, quality)
         
         if frame is not None:
             # Encode as JPEG
@@ -1529,7 +1736,7 @@ def camera_thumbnail(request, camera_id: uuid.UUID, quality: str = "main"):
 def camera_snapshot(request, camera_id: uuid.UUID, quality: str = "main"):
     """Capture and save a snapshot from camera"""
     from django.http import JsonResponse
-    from .streaming import stream_manager
+    from .frame_bus import frame_bus
     import cv2
     import os
     from django.conf import settings
@@ -1538,8 +1745,8 @@ def camera_snapshot(request, camera_id: uuid.UUID, quality: str = "main"):
     camera = get_object_or_404(Camera, id=camera_id)
     
     try:
-        # Get a single frame
-        frame = stream_manager.get_frame(camera.id, quality)
+        # Get a single frame (reuses the running capture worker if there is one)
+        frame = frame_bus.grab_frame(camera, quality)
         
         if frame is not None:
             # Create snapshots directory
@@ -1641,16 +1848,17 @@ def active_streams(request):
     
     active_streams_info = []
     
-    for stream_key, stream_info in stream_manager.active_streams.items():
+    for stream_key, stream_info in list(stream_manager.active_streams.items()):
         camera = stream_info['camera']
+        worker = stream_info['worker']
         active_streams_info.append({
             "stream_key": stream_key,
             "camera_id": str(camera.id),
             "camera_name": camera.name,
             "quality": stream_info['quality'],
             "viewers": stream_info['viewers'],
-            "last_update": stream_info['last_update'].isoformat() if stream_info['last_update'] else None,
-            "uptime_seconds": int((timezone.now() - stream_info['last_update']).total_seconds()) if stream_info['last_update'] else 0
+            "last_update": worker.last_update.isoformat() if worker.last_update else None,
+            "uptime_seconds": int((timezone.now() - worker.started_at).total_seconds()) if worker.started_at else 0
         })
     
     return {
@@ -1845,7 +2053,7 @@ def get_stream_status(request, camera_id: uuid.UUID):
             raise HttpError(401, "Authentication required - valid user not found")
         
         # Check if camera is currently streaming
-        is_streaming = any(info['camera'].id == camera_id for info in stream_manager.active_streams.values())
+        is_streaming = stream_manager.is_camera_streaming(camera.id)
         
         # Get active stream record
         active_stream = LiveStream.objects.filter(
@@ -1862,7 +2070,7 @@ def get_stream_status(request, camera_id: uuid.UUID):
                         "stream_key": stream_key,
                         "quality": info['quality'],
                         "viewers": info['viewers'],
-                        "last_update": info['last_update'].isoformat() if info['last_update'] else None
+                        "last_update": info['worker'].last_update.isoformat() if info['worker'].last_update else None
                     }
                     break
         
@@ -1960,6 +2168,11 @@ def get_stream_health(request, camera_id: uuid.UUID, quality: str = "main"):
         # Get stream health from streaming manager
         health_info = stream_manager.get_stream_health(camera_id, quality)
         
+        # Background monitor results (probe latency history)
+        from .health_monitor import camera_health_monitor
+        health_info["monitor"] = camera_health_monitor.get_summary(camera.id)
+        health_info["probe_history"] = camera_health_monitor.get_history(camera.id)
+        
         # Add camera-specific information
         health_info.update({
             "camera_id": str(camera.id),
@@ -2149,7 +2362,7 @@ def set_camera_online(request, camera_id: uuid.UUID):
             # Don't fail the entire operation if streaming fails
         
         # Check if camera is currently streaming
-        is_streaming = any(info['camera'].id == camera.id for info in stream_manager.active_streams.values())
+        is_streaming = stream_manager.is_camera_streaming(camera.id)
         
         logger.info(f"Camera {camera.name} status changed from '{previous_status}' to 'active' by user {request.user.email}")
         
@@ -2181,67 +2394,52 @@ def set_camera_online(request, camera_id: uuid.UUID):
 # Recording endpoints
 @router.get("/recordings/", response=RecordingListResponseSchema, auth=cctv_jwt_auth,
             summary="List Recordings",
-            description="Get a paginated list of all video recordings accessible to the user")
-def list_recordings(request):
-    """List all recordings accessible to the user"""
-    from .serializers import RecordingSerializer
-    
-    # Since auth is disabled, return all recordings
-    queryset = Recording.objects.all().order_by('-start_time')
-    recordings_data = []
-    
-    for recording in queryset:
-        serializer_data = RecordingSerializer(recording).data
-        # Convert UUID objects to strings for schema validation
-        if 'camera' in serializer_data and serializer_data['camera']:
-            serializer_data['camera'] = str(serializer_data['camera'])
-        if 'schedule' in serializer_data and serializer_data['schedule']:
-            serializer_data['schedule'] = str(serializer_data['schedule'])
-        if 'id' in serializer_data:
-            serializer_data['id'] = str(serializer_data['id'])
-        recordings_data.append(serializer_data)
-    
+            description="Get a cursor-paginated list of video recordings, newest first. "
+                        "Pass next_cursor from a response as cursor to get the next page.")
+def list_recordings(request, cursor: Optional[str] = None, limit: int = 50, camera_id: Optional[str] = None,
+                    status: Optional[str] = None, storage_type: Optional[str] = None,
+                    start_from: Optional[datetime] = None, start_to: Optional[datetime] = None):
+    """List recordings one page at a time with server-side filters"""
+    from .recording_listing import (
+        InvalidCursor, MAX_PAGE_SIZE, filter_recordings, recording_page, recording_totals, serialize_recording_row
+    )
+
+    if camera_id:
+        try:
+            uuid.UUID(camera_id)
+        except ValueError:
+            raise HttpError(400, "Invalid camera_id")
+
+    # Since auth is disabled, list all recordings
+    queryset = filter_recordings(camera_id=camera_id, status=status, storage_type=storage_type,
+                                 start_from=start_from, start_to=start_to)
+    page_size = max(1, min(limit, MAX_PAGE_SIZE))
+
+    try:
+        rows, next_cursor = recording_page(queryset, cursor=cursor, limit=page_size)
+    except InvalidCursor as e:
+        raise HttpError(400, str(e))
+
     return {
-        "total_recordings": len(recordings_data),
-        "completed_recordings": sum(1 for rec in recordings_data if rec.get('status') == 'completed'),
-        "failed_recordings": sum(1 for rec in recordings_data if rec.get('status') == 'failed'),
-        "recordings": recordings_data
+        **recording_totals(queryset),
+        "recordings": [serialize_recording_row(row) for row in rows],
+        "page_size": page_size,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/recordings/stats/", response=RecordingStatsResponseSchema,
             summary="Recording Statistics", auth=cctv_jwt_auth,
-            description="Get comprehensive statistics about recordings including success rates and storage usage")
+            description="Get comprehensive statistics about recordings including success rates and storage usage, "
+                        "broken down per camera and storage backend")
 def recording_stats(request):
     """Get recording statistics"""
     try:
-        # Since auth is disabled, get all recordings directly
-        recordings = Recording.objects.all()
-        
-        total_recordings = recordings.count()
-        completed_recordings = recordings.filter(status='completed').count()
-        failed_recordings = recordings.filter(status='failed').count()
-        recording_recordings = recordings.filter(status='recording').count()
-        
-        total_size = sum(r.file_size for r in recordings if r.file_size)
-        total_duration = sum(
-            (r.duration.total_seconds() for r in recordings if r.duration), 
-            start=0
-        )
+        from .recording_stats import get_recording_stats
         
-        success_rate = (completed_recordings / total_recordings * 100) if total_recordings > 0 else 0
-        
-        return {
-            'total_recordings': total_recordings,
-            'completed_recordings': completed_recordings,
-            'failed_recordings': failed_recordings,
-            'active_recordings': recording_recordings,
-            'success_rate': round(success_rate, 2),
-            'total_size_bytes': total_size,
-            'total_size_gb': round(total_size / (1024 * 1024 * 1024), 2) if total_size else 0,
-            'total_duration_seconds': total_duration,
-            'total_duration_hours': round(total_duration / 3600, 2) if total_duration else 0
-        }
+        # Since auth is disabled, aggregate over all recordings
+        return get_recording_stats()
         
     except Exception as e:
         raise HttpError(500, str(e))
@@ -2476,6 +2674,37 @@ def get_recording(request, recording_id: uuid.UUID):
     return RecordingSerializer(recording).data
 
 
+@router.get("/recordings/{recording_id}/playlist/", auth=cctv_jwt_auth,
+            summary="Recording HLS Playlist",
+            description="HLS playlist of a packaged recording with signed segment URLs. Without `variant` the master "
+                        "playlist is returned; its rendition entries point back to this endpoint.")
+def recording_playlist(request, recording_id: uuid.UUID, variant: str = None, expiration_minutes: int = 120):
+    """Get a recording's HLS playlist with per-segment signed URLs"""
+    from django.http import HttpResponse
+    from urllib.parse import urlencode
+    from .hls import hls_packager
+    
+    recording = get_object_or_404(Recording, id=recording_id)
+    if not recording.hls_playlist:
+        raise HttpError(404, "Recording has not been packaged for HLS")
+    
+    expiration_minutes = max(5, min(expiration_minutes, 24 * 60))
+    
+    def playlist_url(rendition):
+        query = urlencode({'variant': rendition, 'expiration_minutes': expiration_minutes})
+        return request.build_absolute_uri(f"{request.path}?{query}")
+    
+    playlist = hls_packager.signed_playlist(recording, variant=variant, playlist_url=playlist_url,
+                                            expiration_minutes=expiration_minutes)
+    if playlist is None:
+        raise HttpError(404, "Playlist not found")
+    
+    response = HttpResponse(playlist, content_type='application/vnd.apple.mpegurl')
+    # Signed URLs inside expire; never let a cache serve the playlist for longer
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
 # Schedule endpoints
 @router.get("/schedules/", response=ScheduleListResponseSchema,
             summary="List Recording Schedules", auth=cctv_jwt_auth,
@@ -2818,91 +3047,12 @@ def get_dashboard_analytics(request):
     - Recording activity over time
     - Storage usage trends
     - System performance metrics
+
+    Served from the hourly recording rollups and cached briefly.
     """
     try:
-        from django.db.models import Count, Q
-        from django.utils import timezone
-        from datetime import datetime, timedelta
-        import calendar
-        
-        # Get current date and time ranges
-        now = timezone.now()
-        today = now.date()
-        last_7_days = today - timedelta(days=7)
-        last_30_days = today - timedelta(days=30)
-        
-        # Camera status distribution
-        camera_status = list(Camera.objects.values('status').annotate(count=Count('status')))
-        
-        # Recording activity for last 7 days
-        recording_activity = []
-        for i in range(7):
-            date = today - timedelta(days=i)
-            count = Recording.objects.filter(start_time__date=date).count()
-            recording_activity.append({
-                'date': date.isoformat(),
-                'day': calendar.day_name[date.weekday()],
-                'recordings': count
-            })
-        recording_activity.reverse()  # Show oldest to newest
-        
-        # Hourly recording activity for today
-        hourly_activity = []
-        for hour in range(24):
-            start_hour = datetime.combine(today, datetime.min.time()) + timedelta(hours=hour)
-            end_hour = start_hour + timedelta(hours=1)
-            start_hour = timezone.make_aware(start_hour)
-            end_hour = timezone.make_aware(end_hour)
-            
-            count = Recording.objects.filter(
-                start_time__gte=start_hour,
-                start_time__lt=end_hour
-            ).count()
-            
-            hourly_activity.append({
-                'hour': f"{hour:02d}:00",
-                'recordings': count
-            })
-        
-        # Schedule type distribution
-        schedule_types = list(RecordingSchedule.objects.values('schedule_type').annotate(count=Count('schedule_type')))
-        
-        # Storage usage simulation (replace with actual storage calculation)
-        storage_data = []
-        for i in range(30):
-            date = today - timedelta(days=i)
-            # Simulate storage growth over time
-            base_storage = 1000  # GB
-            daily_growth = 50 * (30 - i)  # Simulate gradual growth
-            storage_data.append({
-                'date': date.isoformat(),
-                'storage_gb': base_storage + daily_growth
-            })
-        storage_data.reverse()
-        
-        # System metrics
-        total_cameras = Camera.objects.count()
-        online_cameras = Camera.objects.filter(status='active').count()
-        total_recordings = Recording.objects.count()
-        total_schedules = RecordingSchedule.objects.count()
-        active_schedules = RecordingSchedule.objects.filter(is_active=True).count()
-        
-        return {
-            "camera_status_distribution": camera_status,
-            "recording_activity_7_days": recording_activity,
-            "hourly_activity_today": hourly_activity,
-            "schedule_type_distribution": schedule_types,
-            "storage_usage_30_days": storage_data,
-            "system_metrics": {
-                "total_cameras": total_cameras,
-                "online_cameras": online_cameras,
-                "offline_cameras": total_cameras - online_cameras,
-                "total_recordings": total_recordings,
-                "total_schedules": total_schedules,
-                "active_schedules": active_schedules,
-                "uptime_percentage": round((online_cameras / total_cameras * 100) if total_cameras > 0 else 0, 1)
-            }
-        }
+        from .rollup import dashboard_analytics
+        return dashboard_analytics()
         
     except Exception as e:
         logger.error(f"Error getting dashboard analytics: {str(e)}")
@@ -3319,7 +3469,8 @@ def get_local_client_schedules(request, client_id: str = None, last_sync: str =
                         'rtsp_url_sub': item.get('camera_rtsp_url_sub'),
                         'camera_type': item.get('camera_type', 'rtsp'),
                         'location': item.get('camera_location'),
-                        'record_quality': item.get('camera_record_quality', 'medium')
+                        'record_quality': item.get('camera_record_quality', 'medium'),
+                        'recording_engine': item.get('camera_recording_engine', 'opencv')
                     }
                 }
                 result.append(schedule_data)
@@ -3596,7 +3747,8 @@ def get_local_client_cameras(request):
                     'rtsp_url_sub': item.get('rtsp_url_sub'),
                     'camera_type': item.get('camera_type', 'rtsp'),
                     'location': item.get('location'),
-                    'record_quality': item.get('record_quality', 'medium')
+                    'record_quality': item.get('record_quality', 'medium'),
+                    'recording_engine': item.get('recording_engine', 'opencv')
                 }
                 result.append(camera_data)
             except Exception as e:
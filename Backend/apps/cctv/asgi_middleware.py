@@ -0,0 +1,64 @@
+"""
+ASGI middleware for the async live stream.
+
+Django 4.2 stops reading ``receive`` once the request body is in, so it never
+sees ``http.disconnect`` while a response is streaming, and uvicorn silently
+drops whatever is sent after the client left. An endless StreamingHttpResponse
+such as the async MJPEG stream would therefore run forever after the viewer
+closed the tab, keeping its viewer slot and the camera's capture worker.
+(Django 5.0 listens for the disconnect itself.)
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StreamDisconnectMiddleware:
+    """Cancel a streaming response when its client disconnects"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        streaming = asyncio.Event()
+        complete = False
+
+        async def watched_send(message):
+            nonlocal complete
+            if message['type'] == 'http.response.body':
+                if message.get('more_body', False):
+                    streaming.set()
+                else:
+                    complete = True
+            await send(message)
+
+        async def wait_for_disconnect():
+            # Django has read the whole body before it starts streaming, so
+            # nobody else is reading receive from here on
+            await streaming.wait()
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        app_task = asyncio.ensure_future(self.app(scope, receive, watched_send))
+        disconnect_task = asyncio.ensure_future(wait_for_disconnect())
+
+        try:
+            await asyncio.wait([app_task, disconnect_task], return_when=asyncio.FIRST_COMPLETED)
+            if not app_task.done() and not complete:
+                # Raises CancelledError inside the response generator, so its finally block runs
+                logger.debug(f"Client disconnected from {scope.get('path')}, cancelling the response")
+                app_task.cancel()
+            try:
+                await app_task
+            except asyncio.CancelledError:
+                if not disconnect_task.done():
+                    raise
+        finally:
+            for task in (app_task, disconnect_task):
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,110 @@
+"""
+Cached camera connection health.
+
+Opening an extra RTSP session just to find out whether a camera is reachable
+costs one to several seconds. Results are cached per stream URL for a short
+TTL, running capture workers keep the entry for their URL fresh, and
+concurrent cold probes for the same URL share a single probe.
+"""
+
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How long a probe result is trusted (seconds)
+CONNECTION_OK_TTL = 30
+CONNECTION_FAILED_TTL = 5   # Short, so a camera that comes back is noticed quickly
+
+
+class ConnectionHealthCache:
+    """Per-URL connection status with TTL and de-duplicated probing"""
+
+    def __init__(self):
+        self.entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def mark(self, stream_url, ok, message=""):
+        """
+        Record the connection state of a stream URL.
+
+        Called by capture workers on every frame they receive (and when they
+        fail), so cameras that are already streaming never need a probe.
+        """
+        self.entries[stream_url] = (ok, message, time.monotonic())
+
+    def get(self, stream_url):
+        """
+        Get the cached state for a URL if it is still fresh.
+
+        Returns:
+            tuple: (success, message) or None if unknown/expired
+        """
+        entry = self.entries.get(stream_url)
+        if entry is None:
+            return None
+
+        ok, message, checked_at = entry
+        ttl = CONNECTION_OK_TTL if ok else CONNECTION_FAILED_TTL
+        if time.monotonic() - checked_at > ttl:
+            return None
+        return ok, message
+
+    def check(self, stream_url, max_attempts=None, force=False, timeout=60):
+        """
+        Get the connection state of a URL, probing only when needed.
+
+        Args:
+            stream_url: RTSP URL to check
+            max_attempts: Connection attempts for the probe (default: from STREAM_SETTINGS)
+            force: Ignore a cached result (a probe already in flight is still shared)
+            timeout: Seconds to wait for a probe started by another caller
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        if not force:
+            cached = self.get(stream_url)
+            if cached is not None:
+                return cached
+
+        with self._lock:
+            event = self._in_flight.get(stream_url)
+            owner = event is None
+            if owner:
+                event = self._in_flight[stream_url] = threading.Event()
+
+        if not owner:
+            # Someone else is already probing this camera; use their result
+            event.wait(timeout)
+            entry = self.entries.get(stream_url)
+            if entry is None:
+                return False, "Connection check did not complete"
+            return entry[0], entry[1]
+
+        try:
+            ok, message = self._probe(stream_url, max_attempts)
+            self.mark(stream_url, ok, message)
+        finally:
+            with self._lock:
+                self._in_flight.pop(stream_url, None)
+            event.set()
+        return ok, message
+
+    def _probe(self, stream_url, max_attempts=None):
+        """Open the stream and read a few frames"""
+        try:
+            from .opencv_config import test_camera_connection_robust
+            return test_camera_connection_robust(stream_url, max_attempts=max_attempts)
+        except Exception as e:
+            return False, f"Connection error: {str(e)}"
+
+    def invalidate(self, stream_url):
+        """Forget the cached state for a URL"""
+        self.entries.pop(stream_url, None)
+
+
+# Global instance
+connection_health = ConnectionHealthCache()
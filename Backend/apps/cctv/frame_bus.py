@@ -0,0 +1,582 @@
+"""
+Shared per-camera frame bus.
+
+One capture/decode worker is kept per (camera, quality) pair and the decoded
+frames are published to every subscriber (live viewers, recorder, snapshots,
+health checks), so a camera is only ever opened and decoded once no matter
+how many consumers are attached to it.
+"""
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    OPENCV_AVAILABLE = False
+
+import asyncio
+import threading
+import time
+import logging
+from django.utils import timezone
+
+from .pacing import FramePacer
+from .connection_health import connection_health
+
+logger = logging.getLogger(__name__)
+
+
+# Consumer names used when subscribing to the bus
+CONSUMER_STREAM = 'stream'
+CONSUMER_VIEWER = 'viewer'
+CONSUMER_RECORDER = 'recorder'
+CONSUMER_SNAPSHOT = 'snapshot'
+CONSUMER_HEALTH = 'health'
+
+# Live view size tiers (target width in pixels, None = source resolution)
+STREAM_TIERS = {
+    'thumb': 320,
+    'tile': 640,
+    'full': None,
+}
+
+# Requested widths are rounded up to this step so arbitrary sizes share encode caches
+STREAM_WIDTH_STEP = 160
+
+
+def resolve_stream_width(tier=None, width=None):
+    """
+    Turn a requested tier name or pixel width into the output width to encode at.
+
+    Args:
+        tier: One of STREAM_TIERS ('thumb', 'tile', 'full')
+        width: Target width in pixels (used when no valid tier is given)
+
+    Returns:
+        int or None: Output width, None for full resolution
+    """
+    if tier in STREAM_TIERS:
+        return STREAM_TIERS[tier]
+    if width and width > 0:
+        return -(-width // STREAM_WIDTH_STEP) * STREAM_WIDTH_STEP
+    return None
+
+
+def _resolve_future(future):
+    """Mark an async frame waiter as woken (runs on the waiter's event loop)"""
+    if not future.done():
+        future.set_result(None)
+
+
+class CaptureWorker:
+    """Owns a single RTSP capture and publishes decoded frames to subscribers"""
+
+    def __init__(self, bus, key, camera, quality, stream_url):
+        self.bus = bus
+        self.key = key
+        self.camera = camera
+        self.quality = quality
+        self.stream_url = stream_url
+        self.capture = None
+        self.reader = None
+        self.subscribers = {}
+        self.running = False
+        self.error = None
+
+        # Latest published frame
+        self.last_frame = None
+        self.last_update = None
+        self.sequence = 0
+        self.frame_count = 0
+        self.started_at = None
+
+        # Source properties (filled in when the capture is opened)
+        self.fps = 25
+        self.width = 0
+        self.height = 0
+
+        # Source rate measurement and per-consumer pacers (for health reporting)
+        self.source_pacer = FramePacer()
+        self.pacers = {}
+
+        # Encode-once cache shared by every MJPEG viewer, per output width
+        self._jpeg_lock = threading.Lock()
+        self._jpeg_tier_locks = {}
+        self._jpeg_cache = {}
+
+        self._condition = threading.Condition()
+        self._open_lock = threading.Lock()
+        self._thread = None
+
+        # Event loops with async viewers waiting for the next frame -> future resolved on publish
+        self._async_waiters = {}
+
+    @property
+    def subscriber_count(self):
+        """Total number of references held on this worker"""
+        return sum(self.subscribers.values())
+
+    @property
+    def read_timeouts(self):
+        """Number of reads that timed out waiting for the camera"""
+        return self.reader.timeouts if self.reader else 0
+
+    def add_pacer(self, consumer, target_fps=None):
+        """
+        Create a pacer for a consumer of this worker's frames.
+
+        Args:
+            consumer: Consumer name reported in the pacing stats
+            target_fps: Frame rate the consumer wants (None = every frame)
+
+        Returns:
+            FramePacer: Call ``offer()`` on every new frame; remove with remove_pacer()
+        """
+        pacer = FramePacer(target_fps)
+        with self._open_lock:
+            self.pacers[pacer] = consumer
+        return pacer
+
+    def remove_pacer(self, pacer):
+        """Stop reporting a consumer's pacer"""
+        with self._open_lock:
+            self.pacers.pop(pacer, None)
+
+    def pacing_stats(self):
+        """Achieved vs target frame rate and dropped frames for the source and each consumer"""
+        source = self.source_pacer.stats()
+        source['target_fps'] = self.fps
+        source['dropped'] = self.reader.dropped if self.reader else 0
+
+        with self._open_lock:
+            consumers = [dict(consumer=name, **pacer.stats()) for pacer, name in self.pacers.items()]
+
+        return {'source': source, 'consumers': consumers}
+
+    def ensure_open(self):
+        """
+        Open the capture if it is not running yet.
+
+        Concurrent callers for the same worker wait on the same open attempt
+        instead of each opening their own RTSP session.
+        """
+        with self._open_lock:
+            if self.running:
+                return True
+
+            if not OPENCV_AVAILABLE:
+                raise Exception("OpenCV is not available. Cannot open camera stream.")
+
+            from .opencv_config import (check_opencv_compatibility, optimize_capture_for_streaming,
+                                       FrameReader)
+
+            # Check OpenCV compatibility on first use
+            check_opencv_compatibility()
+
+            # Reuses a recent probe result (e.g. from the stream endpoint) instead of probing again
+            connection_ok, connection_msg = connection_health.check(self.stream_url)
+            if not connection_ok:
+                raise Exception(f"Cannot connect to camera stream: {connection_msg}")
+
+            cap = cv2.VideoCapture(self.stream_url, cv2.CAP_FFMPEG)
+            optimize_capture_for_streaming(cap, self.stream_url)
+
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                cap.release()
+                connection_health.mark(self.stream_url, False, "Cannot read frames")
+                raise Exception(f"Cannot read frames from camera stream: {self.stream_url}")
+
+            fps = int(cap.get(cv2.CAP_PROP_FPS) or 0)
+            self.fps = fps if 0 < fps <= 60 else 25
+            self.height, self.width = frame.shape[:2]
+
+            self.capture = cap
+            self.reader = FrameReader(cap, name=self.key)
+            self.error = None
+            self.started_at = timezone.now()
+            self._publish(frame)
+            self.running = True
+
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+            logger.info(f"📡 Capture worker started for {self.key} ({self.width}x{self.height} @ {self.fps}fps)")
+            return True
+
+    def _publish(self, frame):
+        """Publish a new frame and wake up everyone waiting for it"""
+        with self._condition:
+            self.last_frame = frame
+            self.last_update = timezone.now()
+            self.sequence += 1
+            self.frame_count += 1
+            self._condition.notify_all()
+            async_waiters, self._async_waiters = self._async_waiters, {}
+        self.source_pacer.offer()
+        self._wake_async(async_waiters)
+
+    @staticmethod
+    def _wake_async(async_waiters):
+        """Resolve the per-loop futures async viewers are awaiting (one callback per event loop)"""
+        for loop, future in async_waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future)
+            except RuntimeError:
+                pass    # The loop was closed
+
+    def _run(self):
+        """Capture loop: read and decode frames until stopped or the source fails"""
+        from .streaming import safe_save_camera
+        from .opencv_config import STREAM_SETTINGS
+
+        cap = self.capture
+        reader = self.reader
+        camera = self.camera
+        consecutive_failures = 0
+        max_failures = 10
+
+        while self.running:
+            try:
+                ret, frame = reader.read(STREAM_SETTINGS['read_timeout'])
+                if ret and frame is not None:
+                    self._publish(frame)
+                    connection_health.mark(self.stream_url, True, "Camera is streaming")
+                    consecutive_failures = 0
+
+                    # Update camera last seen every 30 seconds
+                    if self.frame_count % 750 == 0:  # ~30 seconds at 25fps
+                        camera.last_seen = timezone.now()
+                        safe_save_camera(camera, update_fields=['last_seen'])
+
+                    # No sleep here: the reader blocks until the camera delivers the next
+                    # frame, and consumers pace themselves with their own FramePacer
+                else:
+                    consecutive_failures += 1
+                    logger.warning(f"Failed to read frame from camera {camera.name} (failure {consecutive_failures}/{max_failures})")
+
+                    if consecutive_failures >= max_failures:
+                        logger.error(f"Too many consecutive failures for camera {camera.name}, stopping capture worker")
+                        self.error = "Too many consecutive read failures"
+                        camera.status = 'error'
+                        safe_save_camera(camera, update_fields=['status'])
+                        break
+
+                    time.sleep(0.5)  # Wait before retrying
+
+            except Exception as e:
+                consecutive_failures += 1
+                logger.error(f"Error reading frame from camera {camera.name}: {str(e)} (failure {consecutive_failures}/{max_failures})")
+
+                if consecutive_failures >= max_failures:
+                    logger.error(f"Too many consecutive errors for camera {camera.name}, stopping capture worker")
+                    self.error = str(e)
+                    camera.status = 'error'
+                    camera.is_streaming = False
+                    safe_save_camera(camera, update_fields=['status', 'is_streaming'])
+                    break
+
+                time.sleep(1)  # Wait longer after errors
+
+        self.running = False
+        if self.error:
+            connection_health.mark(self.stream_url, False, self.error)
+
+        try:
+            # Stop the reader before releasing so nothing is reading from a released capture
+            if not reader.stop():
+                logger.warning(f"Frame reader for {self.key} is still blocked in read, releasing anyway")
+            cap.release()
+        except Exception as cleanup_error:
+            logger.error(f"Error releasing capture for camera {camera.name}: {str(cleanup_error)}")
+
+        # Wake up waiters so they notice the worker is gone
+        with self._condition:
+            self._condition.notify_all()
+            async_waiters, self._async_waiters = self._async_waiters, {}
+        self._wake_async(async_waiters)
+
+        self.bus._worker_exited(self)
+        logger.info(f"Capture worker ended for {self.key} (processed {self.frame_count} frames)")
+
+    def get_frame(self):
+        """Return the most recently decoded frame (or None)"""
+        return self.last_frame
+
+    def wait_for_frame(self, after_sequence=0, timeout=2.0):
+        """
+        Block until a frame newer than ``after_sequence`` is published.
+
+        Returns:
+            tuple: (sequence, frame) - frame is None on timeout or if the worker stopped
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.sequence <= after_sequence:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return self.sequence, None
+                self._condition.wait(remaining)
+            return self.sequence, self.last_frame
+
+    def get_mjpeg_part(self, width=None):
+        """
+        Get the current frame as a ready-to-send multipart MJPEG chunk.
+
+        The JPEG is encoded at most once per published frame and output width,
+        and the same ``bytes`` object is handed to every viewer of that width,
+        so encoding cost does not grow with the number of viewers.
+
+        Args:
+            width: Downscale to this width (None or >= source width = full resolution)
+
+        Returns:
+            tuple: (sequence, part) - part is None if nothing could be encoded
+        """
+        width = self._cache_width(width)
+
+        with self._jpeg_lock:
+            tier_lock = self._jpeg_tier_locks.setdefault(width, threading.Lock())
+
+        # Different widths encode in parallel; viewers of the same width share one encode
+        with tier_lock:
+            sequence, frame = self.sequence, self.last_frame
+            cached_sequence, part = self._jpeg_cache.get(width, (0, None))
+            if sequence != cached_sequence and frame is not None:
+                from .opencv_config import JPEG_ENCODING_SETTINGS
+                if width:
+                    height = max(2, round(frame.shape[0] * width / frame.shape[1]))
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                ret, buffer = cv2.imencode('.jpg', frame, JPEG_ENCODING_SETTINGS)
+                if ret:
+                    frame_bytes = buffer.tobytes()
+                    part = (b'--frame\r\n'
+                            b'Content-Type: image/jpeg\r\n'
+                            b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n' +
+                            frame_bytes + b'\r\n')
+                    cached_sequence = sequence
+                    self._jpeg_cache[width] = (cached_sequence, part)
+                else:
+                    logger.warning(f"Failed to encode frame for {self.key}")
+            return cached_sequence, part
+
+    def wait_for_mjpeg_part(self, after_sequence=0, timeout=2.0, pacer=None, width=None):
+        """
+        Block until a frame newer than ``after_sequence`` exists and return its MJPEG chunk.
+
+        Frames rejected by ``pacer`` are skipped without being encoded.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            sequence, frame = self.wait_for_frame(after_sequence, timeout=max(0, deadline - time.monotonic()))
+            if frame is None:
+                return sequence, None
+            if pacer is None or pacer.offer():
+                break
+            after_sequence = sequence
+
+        jpeg_sequence, part = self.get_mjpeg_part(width)
+        if jpeg_sequence < sequence:
+            # Encoding this frame failed; skip it rather than resending an old one
+            return sequence, None
+        return jpeg_sequence, part
+
+    async def wait_for_frame_async(self, after_sequence=0, timeout=2.0):
+        """
+        Await a frame newer than ``after_sequence`` without blocking the event loop.
+
+        All viewers on one event loop share a single future per frame, so the
+        capture thread does one cross-thread wakeup per loop, not per viewer.
+
+        Returns:
+            tuple: (sequence, frame) - frame is None on timeout or if the worker stopped
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._condition:
+                if self.sequence > after_sequence:
+                    return self.sequence, self.last_frame
+                if not self.running:
+                    return self.sequence, None
+                future = self._async_waiters.get(loop)
+                if future is None or future.done():
+                    future = loop.create_future()
+                    self._async_waiters[loop] = future
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return self.sequence, None
+            try:
+                await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                return self.sequence, None
+
+    async def wait_for_mjpeg_part_async(self, after_sequence=0, timeout=2.0, pacer=None, width=None):
+        """
+        Async version of wait_for_mjpeg_part.
+
+        A viewer always gets the newest frame once it is ready for one, so a
+        slow client skips frames instead of queueing them. The JPEG is usually
+        already in the shared cache; only a missing encode runs in a thread.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            sequence, frame = await self.wait_for_frame_async(after_sequence, timeout=max(0, deadline - loop.time()))
+            if frame is None:
+                return sequence, None
+            if pacer is None or pacer.offer():
+                break
+            after_sequence = sequence
+
+        cached_sequence, part = self._jpeg_cache.get(self._cache_width(width), (0, None))
+        if cached_sequence < sequence:
+            cached_sequence, part = await asyncio.to_thread(self.get_mjpeg_part, width)
+        if cached_sequence < sequence:
+            return sequence, None
+        return cached_sequence, part
+
+    def _cache_width(self, width):
+        """Width key used by the encode cache (None for full resolution)"""
+        if width and self.width and width >= self.width:
+            return None
+        return width
+
+    def stop(self):
+        """Ask the capture loop to exit; the loop releases the capture itself"""
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+            async_waiters, self._async_waiters = self._async_waiters, {}
+        self._wake_async(async_waiters)
+
+
+class FrameBus:
+    """Registry of capture workers with reference-counted subscribers"""
+
+    def __init__(self):
+        self.workers = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, camera_id, quality='main'):
+        """Generate the worker key for a camera/quality pair"""
+        return f"{camera_id}_{quality}"
+
+    def subscribe(self, camera, quality='main', consumer=CONSUMER_VIEWER, stream_url=None):
+        """
+        Attach a consumer to the camera's capture worker, starting it if needed.
+
+        Args:
+            camera: Camera model instance
+            quality: 'main' or 'sub'
+            consumer: Consumer name (viewer, recorder, snapshot, health, ...)
+            stream_url: Override the URL derived from the camera and quality
+
+        Returns:
+            CaptureWorker: The running worker for this camera/quality
+        """
+        key = self.get_key(camera.id, quality)
+
+        with self._lock:
+            worker = self.workers.get(key)
+            if worker is None:
+                worker = CaptureWorker(self, key, camera, quality, stream_url or camera.get_stream_url(quality))
+                self.workers[key] = worker
+            worker.subscribers[consumer] = worker.subscribers.get(consumer, 0) + 1
+
+        try:
+            worker.ensure_open()
+        except Exception:
+            self.unsubscribe(camera.id, quality, consumer, worker=worker)
+            raise
+
+        return worker
+
+    def unsubscribe(self, camera_id, quality='main', consumer=CONSUMER_VIEWER, worker=None):
+        """
+        Release one reference held by a consumer; stops the worker when none are left.
+
+        Passing ``worker`` makes the call a no-op if that worker has already
+        been replaced (e.g. it died and a new one was started for the key).
+        """
+        key = self.get_key(camera_id, quality)
+
+        with self._lock:
+            current = self.workers.get(key)
+            if current is None or (worker is not None and current is not worker):
+                return
+            worker = current
+
+            count = worker.subscribers.get(consumer, 0) - 1
+            if count > 0:
+                worker.subscribers[consumer] = count
+            else:
+                worker.subscribers.pop(consumer, None)
+
+            if worker.subscriber_count > 0:
+                return
+
+            del self.workers[key]
+
+        worker.stop()
+        logger.info(f"Capture worker {key} has no subscribers left, stopping")
+
+    def retain(self, worker, consumer=CONSUMER_VIEWER):
+        """Add a reference to an already running worker without re-opening it"""
+        with self._lock:
+            if self.workers.get(worker.key) is not worker:
+                return False
+            worker.subscribers[consumer] = worker.subscribers.get(consumer, 0) + 1
+            return True
+
+    def release_consumer(self, camera_id, quality='main', consumer=CONSUMER_VIEWER):
+        """Drop every reference held by a consumer"""
+        key = self.get_key(camera_id, quality)
+        worker = self.workers.get(key)
+        if worker is None:
+            return
+
+        for _ in range(worker.subscribers.get(consumer, 0)):
+            self.unsubscribe(camera_id, quality, consumer)
+
+    def _worker_exited(self, worker):
+        """Forget a worker whose capture loop ended on its own"""
+        with self._lock:
+            if self.workers.get(worker.key) is worker:
+                del self.workers[worker.key]
+
+    def get_worker(self, camera_id, quality='main'):
+        """Get the running worker for a camera/quality, if any"""
+        worker = self.workers.get(self.get_key(camera_id, quality))
+        if worker is not None and worker.running:
+            return worker
+        return None
+
+    def get_frame(self, camera_id, quality='main'):
+        """Get the latest frame for a camera/quality without opening anything"""
+        worker = self.get_worker(camera_id, quality)
+        return worker.get_frame() if worker else None
+
+    def grab_frame(self, camera, quality='main', timeout=5.0):
+        """
+        Get a single frame, reusing a running worker when there is one.
+
+        Cameras that are not being watched or recorded are opened just long
+        enough to decode one frame (used by thumbnails and snapshots).
+        """
+        worker = self.get_worker(camera.id, quality)
+        if worker is not None and worker.last_frame is not None:
+            return worker.last_frame
+
+        worker = self.subscribe(camera, quality, consumer=CONSUMER_SNAPSHOT)
+        try:
+            if worker.last_frame is not None:
+                return worker.last_frame
+            return worker.wait_for_frame(0, timeout=timeout)[1]
+        finally:
+            self.unsubscribe(camera.id, quality, consumer=CONSUMER_SNAPSHOT, worker=worker)
+
+
+# Global instance
+frame_bus = FrameBus()
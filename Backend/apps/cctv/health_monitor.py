@@ -0,0 +1,211 @@
+"""
+Background camera health monitor.
+
+Probes every camera on a schedule with a bounded pool of workers, writes the
+resulting online state back to the cameras in one bulk update per sweep (a
+status is only moved if it still has the value the sweep started from) and
+keeps a short probe latency history per camera. Cameras that are already
+being captured are reported online from their live worker without probing.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Camera
+from .frame_bus import frame_bus
+from .connection_health import connection_health
+
+logger = logging.getLogger(__name__)
+
+
+class CameraHealthMonitor:
+    """Periodic, concurrency-bounded camera reachability checks"""
+
+    def __init__(self, max_workers=None, probe_timeout=None, history_size=None, failure_threshold=3):
+        """
+        Args:
+            max_workers: Maximum number of cameras probed at the same time
+            probe_timeout: Seconds a single probe may take before it counts as failed
+            history_size: Number of probe results kept per camera
+            failure_threshold: Consecutive failed probes before a camera is put in 'error'
+        """
+        self.max_workers = max_workers or getattr(settings, 'CAMERA_HEALTH_MAX_WORKERS', 8)
+        self.probe_timeout = probe_timeout or getattr(settings, 'CAMERA_HEALTH_PROBE_TIMEOUT', 20)
+        self.history_size = history_size or getattr(settings, 'CAMERA_HEALTH_HISTORY_SIZE', 60)
+        self.failure_threshold = failure_threshold
+
+        self.history = {}
+        self.consecutive_failures = {}
+        self.last_sweep = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='camera-health')
+        self._sweep_lock = threading.Lock()
+
+    def _probe(self, stream_url):
+        """Probe one stream URL; returns (ok, message, latency_ms)"""
+        started = time.monotonic()
+        ok, message = connection_health.check(stream_url, max_attempts=1, force=True)
+        return ok, message, round((time.monotonic() - started) * 1000)
+
+    def _live_worker(self, camera):
+        """Get a capture worker that is currently receiving frames for this camera"""
+        for quality in ('main', 'sub'):
+            worker = frame_bus.get_worker(camera.id, quality)
+            if worker is not None and worker.last_update and \
+                    (timezone.now() - worker.last_update).total_seconds() <= 10:
+                return worker
+        return None
+
+    def sweep(self):
+        """
+        Check every camera once and persist the results.
+
+        Returns:
+            dict: Summary with online/offline/probed counts, or None if a sweep is already running
+        """
+        if not self._sweep_lock.acquire(blocking=False):
+            logger.warning("Camera health sweep still running, skipping this one")
+            return None
+
+        try:
+            return self._sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def _sweep(self):
+        started = time.monotonic()
+        cameras = list(Camera.objects.exclude(status='maintenance').exclude(rtsp_url=''))
+        results = {}
+        futures = {}
+
+        for camera in cameras:
+            if self._live_worker(camera) is not None:
+                results[camera.id] = (True, "Camera is streaming", None)
+            else:
+                futures[self._executor.submit(self._probe, camera.get_stream_url('main'))] = camera.id
+
+        # Probes queue behind max_workers, so give the sweep as many timeouts as it has batches
+        batches = -(-len(futures) // self.max_workers)
+        done, not_done = wait(futures, timeout=self.probe_timeout * max(batches, 1))
+
+        for future in done:
+            try:
+                ok, message, latency_ms = future.result()
+                if latency_ms > self.probe_timeout * 1000:
+                    ok, message = False, f"Probe took {latency_ms} ms"
+                results[futures[future]] = (ok, message, latency_ms)
+            except Exception as e:
+                results[futures[future]] = (False, str(e), None)
+
+        for future in not_done:
+            future.cancel()
+            results[futures[future]] = (False, "Probe timed out", None)
+
+        now = timezone.now()
+        changed = []
+        status_changes = []
+        online_count = 0
+
+        for camera in cameras:
+            ok, message, latency_ms = results[camera.id]
+            self._record(camera.id, now, ok, message, latency_ms)
+            online_count += ok
+
+            old_status = camera.status
+            if self._apply_result(camera, ok, now):
+                changed.append(camera)
+            if camera.status != old_status:
+                status_changes.append((camera, old_status))
+
+        if changed:
+            Camera.objects.bulk_update(changed, ['is_online', 'last_seen'])
+
+        # The cameras were loaded before probing; only move a status nobody changed in the meantime
+        for camera, old_status in status_changes:
+            if not Camera.objects.filter(id=camera.id, status=old_status).update(status=camera.status):
+                logger.info(f"Camera {camera.name} status changed during the health sweep, keeping it")
+
+        self.last_sweep = now
+        summary = {
+            'checked_at': now.isoformat(),
+            'cameras': len(cameras),
+            'online': online_count,
+            'offline': len(cameras) - online_count,
+            'probed': len(futures),
+            'updated': len(changed),
+            'duration_ms': round((time.monotonic() - started) * 1000),
+        }
+        logger.info(f"🩺 Camera health sweep: {online_count}/{len(cameras)} online "
+                    f"({len(futures)} probed, {len(changed)} updated in {summary['duration_ms']} ms)")
+        return summary
+
+    def _record(self, camera_id, checked_at, ok, message, latency_ms):
+        """Append a probe result to the camera's history"""
+        history = self.history.setdefault(str(camera_id), deque(maxlen=self.history_size))
+        history.append({
+            'checked_at': checked_at.isoformat(),
+            'online': ok,
+            'latency_ms': latency_ms,
+            'message': message,
+        })
+
+        if ok:
+            self.consecutive_failures[str(camera_id)] = 0
+        else:
+            self.consecutive_failures[str(camera_id)] = self.consecutive_failures.get(str(camera_id), 0) + 1
+
+    def _apply_result(self, camera, ok, now):
+        """Update the camera's online fields and status in memory; returns True if anything changed"""
+        changed = False
+
+        if ok:
+            # last_seen moves on every successful check, so online cameras are always written
+            camera.last_seen = now
+            camera.is_online = True
+            changed = True
+            if camera.status == 'error':
+                camera.status = 'active'
+        else:
+            if camera.is_online:
+                camera.is_online = False
+                changed = True
+            if camera.status == 'active' and \
+                    self.consecutive_failures.get(str(camera.id), 0) >= self.failure_threshold:
+                camera.status = 'error'
+                changed = True
+
+        return changed
+
+    def get_history(self, camera_id):
+        """Get the probe history for a camera, oldest first"""
+        return list(self.history.get(str(camera_id), []))
+
+    def get_summary(self, camera_id):
+        """Get latest state and latency statistics for a camera"""
+        history = self.get_history(camera_id)
+        latencies = [entry['latency_ms'] for entry in history if entry['latency_ms'] is not None]
+        return {
+            'last_check': history[-1] if history else None,
+            'consecutive_failures': self.consecutive_failures.get(str(camera_id), 0),
+            'checks': len(history),
+            'uptime_percent': round(100 * sum(entry['online'] for entry in history) / len(history), 1) if history else None,
+            'avg_latency_ms': round(sum(latencies) / len(latencies)) if latencies else None,
+            'max_latency_ms': max(latencies) if latencies else None,
+        }
+
+
+def run_camera_health_sweep():
+    """Scheduled job entry point"""
+    try:
+        camera_health_monitor.sweep()
+    except Exception as e:
+        logger.error(f"Camera health sweep failed: {str(e)}")
+
+
+# Global instance
+camera_health_monitor = CameraHealthMonitor()
@@ -0,0 +1,263 @@
+"""
+HLS packaging of completed recordings.
+
+Each converted recording is cut into short MPEG-TS segments with a VOD
+playlist per rendition (the original quality, stream-copied, plus optional
+lower-bitrate renditions) and a master playlist. The files are stored next
+to the recording under ``recordings/<camera>/hls/<recording>/``. The
+playlist API returns the playlists with every segment replaced by a signed
+URL, so the player only fetches the seconds it plays and seeking does not
+depend on downloading a monolithic file.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .remux import FFMPEG_BINARY
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = 'master.m3u8'
+PLAYLIST_CACHE_SECONDS = 24 * 3600      # Packaged playlists never change
+VARIANT_PATTERN = re.compile(r'^[\w-]+/[\w-]+\.m3u8$')
+
+
+def hls_enabled():
+    """Check whether recordings should be packaged for HLS"""
+    return getattr(settings, 'RECORDING_HLS_ENABLED', False) and FFMPEG_BINARY is not None
+
+
+def hls_prefix(recording):
+    """Storage prefix (relative to MEDIA_ROOT / bucket root) of a recording's HLS files"""
+    return f"recordings/{recording.camera_id}/hls/{recording.id}/"
+
+
+def build_hls_command(source_path, output_dir, renditions=(), segment_seconds=4):
+    """
+    Build the ffmpeg command packaging a recording as HLS.
+
+    Args:
+        source_path: H.264 MP4 recording
+        output_dir: Directory receiving master.m3u8 and one v<N>/ directory per rendition
+        renditions: Extra lower-quality renditions as (height, kbps) pairs
+        segment_seconds: Target segment duration
+
+    Returns:
+        list: Command line
+    """
+    command = [FFMPEG_BINARY, '-hide_banner', '-nostats', '-loglevel', 'error', '-y', '-i', source_path]
+
+    # Rendition 0 is the recording itself, copied without re-encoding
+    for _ in range(len(renditions) + 1):
+        command += ['-map', '0:v:0']
+    command += ['-an', '-c:v:0', 'copy']
+
+    for index, (height, kbps) in enumerate(renditions, start=1):
+        command += [
+            f'-filter:v:{index}', f'scale=-2:{int(height)}',
+            f'-c:v:{index}', 'libx264',
+            f'-b:v:{index}', f'{int(kbps)}k',
+            f'-maxrate:v:{index}', f'{int(kbps * 1.2)}k',
+            f'-bufsize:v:{index}', f'{int(kbps * 2)}k',
+            '-preset', getattr(settings, 'RECORDING_TRANSCODE_PRESET', 'veryfast'),
+            '-pix_fmt', 'yuv420p',
+            # Keyframes on segment boundaries so every rendition switches cleanly
+            f'-force_key_frames:v:{index}', f'expr:gte(t,n_forced*{int(segment_seconds)})',
+        ]
+
+    command += [
+        '-f', 'hls',
+        '-hls_time', str(int(segment_seconds)),
+        '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments',
+        '-hls_segment_filename', os.path.join(output_dir, 'v%v', 'seg_%05d.ts'),
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', ' '.join(f'v:{index}' for index in range(len(renditions) + 1)),
+        os.path.join(output_dir, 'v%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def rewrite_playlist(text, segment_url, playlist_url):
+    """
+    Replace every URI in a playlist.
+
+    Args:
+        text: Playlist content
+        segment_url: Callable mapping a segment URI to its URL
+        playlist_url: Callable mapping a variant playlist URI to its URL
+
+    Returns:
+        str: Rewritten playlist
+    """
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            line = playlist_url(stripped) if stripped.endswith('.m3u8') else segment_url(stripped)
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+class HLSPackager:
+    """Packages recordings for HLS and serves their signed playlists"""
+
+    def package(self, recording, local_path):
+        """
+        Package a recording into a local directory (blocking, runs in the transcode pool).
+
+        Args:
+            recording: Completed Recording instance
+            local_path: Absolute path of the (converted) recording
+
+        Returns:
+            str: Directory with the HLS files, or None if packaging is off or failed
+        """
+        if not hls_enabled() or os.path.splitext(local_path)[1].lower() != '.mp4':
+            return None
+
+        from .transcode import recording_transcoder
+
+        output_dir = os.path.join(settings.MEDIA_ROOT, hls_prefix(recording))
+        shutil.rmtree(output_dir, ignore_errors=True)
+        renditions = getattr(settings, 'RECORDING_HLS_RENDITIONS', [])
+        for index in range(len(renditions) + 1):
+            os.makedirs(os.path.join(output_dir, f'v{index}'), exist_ok=True)
+
+        command = build_hls_command(local_path, output_dir, renditions,
+                                    segment_seconds=getattr(settings, 'RECORDING_HLS_SEGMENT_SECONDS', 4))
+        returncode, error_output = recording_transcoder.run(command)
+
+        if returncode != 0 or not os.path.exists(os.path.join(output_dir, MASTER_PLAYLIST)):
+            logger.warning(f"⚠️ HLS packaging of recording {recording.id} failed: {error_output}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return None
+
+        logger.info(f"📦 Recording {recording.id} packaged for HLS ({len(renditions) + 1} renditions)")
+        return output_dir
+
+    def publish(self, recording, output_dir, storage_type):
+        """
+        Store the packaged files where the recording is stored and point the recording at them.
+
+        Args:
+            recording: Recording instance
+            output_dir: Directory returned by package()
+            storage_type: 'local', 'aws' or 'gcp' (where the recording itself went)
+
+        Returns:
+            bool: True if the HLS files are available
+        """
+        from .models import Recording
+        from .storage_service import storage_service
+
+        prefix = hls_prefix(recording)
+        service = {'aws': storage_service.aws_service, 'gcp': storage_service.gcp_service}.get(storage_type)
+
+        if storage_type != 'local':
+            if service is None:
+                shutil.rmtree(output_dir, ignore_errors=True)
+                return False
+            for root, _, files in os.walk(output_dir):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    key = prefix + os.path.relpath(file_path, output_dir).replace(os.sep, '/')
+                    content_type = 'application/vnd.apple.mpegurl' if name.endswith('.m3u8') else 'video/mp2t'
+                    if not service.upload_file(file_path, key, content_type=content_type):
+                        logger.warning(f"⚠️ Could not store HLS file {key}, recording {recording.id} keeps progressive playback")
+                        shutil.rmtree(output_dir, ignore_errors=True)
+                        return False
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        recording.hls_playlist = prefix + MASTER_PLAYLIST
+        Recording.objects.filter(id=recording.id).update(hls_playlist=recording.hls_playlist)
+        logger.info(f"✅ HLS playlist for recording {recording.id} stored in {storage_type.upper()}: {recording.hls_playlist}")
+        return True
+
+    def _read_playlist(self, recording, key):
+        """Playlist text from local disk or the bucket (cached; packaged playlists never change)"""
+        cache_key = f"hls_playlist:{recording.storage_type}:{key}"
+        text = cache.get(cache_key)
+        if text is not None:
+            return text
+
+        if recording.storage_type == 'local':
+            with open(os.path.join(settings.MEDIA_ROOT, key), 'r') as playlist_file:
+                text = playlist_file.read()
+        else:
+            from .storage_service import storage_service
+            service = {'aws': storage_service.aws_service, 'gcp': storage_service.gcp_service}.get(recording.storage_type)
+            if service is None:
+                return None
+            temp_fd, temp_path = tempfile.mkstemp(suffix='.m3u8')
+            os.close(temp_fd)
+            try:
+                if not service.download_file(key, temp_path):
+                    return None
+                with open(temp_path, 'r') as playlist_file:
+                    text = playlist_file.read()
+            finally:
+                os.remove(temp_path)
+
+        cache.set(cache_key, text, PLAYLIST_CACHE_SECONDS)
+        return text
+
+    def signed_playlist(self, recording, variant=None, playlist_url=None, expiration_minutes=120):
+        """
+        Build a playlist whose segment URIs are signed URLs.
+
+        Args:
+            recording: Recording with hls_playlist set
+            variant: Rendition playlist relative to the HLS directory (e.g. 'v0/index.m3u8');
+                None for the master playlist
+            playlist_url: Callable mapping a rendition playlist path to the URL of this API
+            expiration_minutes: Lifetime of the signed segment URLs
+
+        Returns:
+            str: Playlist text, or None if the recording has no (valid) HLS playlist
+        """
+        if not recording.hls_playlist:
+            return None
+        if variant is not None and not VARIANT_PATTERN.match(variant):
+            return None
+
+        from .storage_service import storage_service
+
+        base = recording.hls_playlist.rsplit('/', 1)[0] + '/'
+        key = base + (variant or MASTER_PLAYLIST)
+        text = self._read_playlist(recording, key)
+        if text is None:
+            return None
+
+        directory = base + (variant.rsplit('/', 1)[0] + '/' if variant else '')
+
+        def segment_url(uri):
+            return storage_service.get_file_url(directory + uri, signed=True, expiration_minutes=expiration_minutes,
+                                                storage_type=recording.storage_type)
+
+        def variant_url(uri):
+            relative = (variant.rsplit('/', 1)[0] + '/' if variant else '') + uri
+            return playlist_url(relative) if playlist_url else uri
+
+        return rewrite_playlist(text, segment_url, variant_url)
+
+
+def package_and_publish(recording, local_path, storage_type='local'):
+    """Package a recording and store its HLS files (errors only affect HLS playback)"""
+    try:
+        output_dir = hls_packager.package(recording, local_path)
+        if output_dir:
+            return hls_packager.publish(recording, output_dir, storage_type)
+    except Exception as e:
+        logger.error(f"Error packaging recording {recording.id} for HLS: {str(e)}")
+    return False
+
+
+# Global instance
+hls_packager = HLSPackager()
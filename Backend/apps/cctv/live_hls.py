@@ -0,0 +1,240 @@
+"""
+Live HLS delivery for cameras.
+
+An opt-in alternative to the MJPEG stream: while someone is watching a
+camera, one ffmpeg process remuxes its RTSP H.264 stream (no decoding) into a
+rolling window of short MPEG-TS segments under ``LIVE_HLS_ROOT``. Segments
+are plain files served by the static/media server (nginx or a CDN), so
+viewers cost no Django worker; only the small playlist goes through the API,
+which is also how the packager knows it still has viewers. Packagers nobody
+has asked for within ``LIVE_HLS_IDLE_SECONDS`` are stopped.
+
+Cameras that do not send H.264 are re-encoded with libx264 (zerolatency),
+since browsers cannot play other codecs from TS segments.
+"""
+
+import os
+import re
+import shutil
+import threading
+import time
+import logging
+
+from django.conf import settings
+
+from .remux import FFMPEG_BINARY, FFmpegRemuxer, probe_stream, remux_available
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = 'index.m3u8'
+SEGMENT_PATTERN = re.compile(r'^seg_\d+\.ts$')
+
+
+def live_hls_enabled():
+    """Check whether live HLS is switched on and ffmpeg is available"""
+    return getattr(settings, 'LIVE_HLS_ENABLED', False) and remux_available()
+
+
+def live_hls_root():
+    """Directory holding one sub-directory of live segments per camera and quality"""
+    return getattr(settings, 'LIVE_HLS_ROOT', os.path.join(settings.MEDIA_ROOT, 'live'))
+
+
+class LiveHLSRemuxer(FFmpegRemuxer):
+    """FFmpegRemuxer writing a rolling live HLS playlist instead of a file"""
+
+    def __init__(self, rtsp_url, output_dir, codec=None, segment_seconds=2, list_size=6):
+        """
+        Args:
+            rtsp_url: Camera RTSP URL
+            output_dir: Directory receiving index.m3u8 and the segments
+            codec: Source codec from probe_stream; anything but H.264 is re-encoded
+            segment_seconds: Target segment duration (latency is roughly 3 segments)
+            list_size: Segments kept in the playlist (older ones are deleted)
+        """
+        super().__init__(rtsp_url, os.path.join(output_dir, PLAYLIST_NAME), container='hls', codec=codec)
+        self.output_dir = output_dir
+        self.segment_seconds = segment_seconds
+        self.list_size = list_size
+
+    def build_command(self):
+        """Build the ffmpeg command line"""
+        command = [
+            FFMPEG_BINARY, '-hide_banner', '-nostats', '-loglevel', 'error',
+            '-rtsp_transport', 'tcp',
+            '-fflags', '+genpts+nobuffer',
+            '-i', self.rtsp_url,
+            '-map', '0:v:0',
+            '-an',
+        ]
+
+        if self.codec in (None, 'h264'):
+            command += ['-c:v', 'copy']
+        else:
+            command += [
+                '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'zerolatency', '-pix_fmt', 'yuv420p',
+                '-force_key_frames', f'expr:gte(t,n_forced*{int(self.segment_seconds)})',
+            ]
+
+        command += [
+            '-f', 'hls',
+            '-hls_time', str(self.segment_seconds),
+            '-hls_list_size', str(self.list_size),
+            '-hls_flags', 'delete_segments+independent_segments+omit_endlist+program_date_time+temp_file',
+            '-hls_segment_filename', os.path.join(self.output_dir, 'seg_%d.ts'),
+            '-y', self.output_path,
+        ]
+        return command
+
+
+class LiveHLSManager:
+    """One on-demand live HLS packager per camera and quality"""
+
+    def __init__(self):
+        self.packagers = {}         # (camera_id, quality) -> {'remuxer', 'output_dir', 'last_request', 'started_at'}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def _key(self, camera, quality):
+        return (str(camera.id), quality)
+
+    def output_dir(self, camera, quality='main'):
+        """Directory of a camera's live segments"""
+        return os.path.join(live_hls_root(), str(camera.id), quality)
+
+    def segment_url(self, camera, quality, segment_name):
+        """Public URL of a segment (served by the static/media server)"""
+        base_url = getattr(settings, 'LIVE_HLS_URL', f"{settings.MEDIA_URL}live/")
+        return f"{base_url}{camera.id}/{quality}/{segment_name}"
+
+    def ensure_running(self, camera, quality='main'):
+        """
+        Start the camera's packager unless it is already running.
+
+        Returns:
+            dict: The packager entry
+        """
+        key = self._key(camera, quality)
+        with self._lock:
+            entry = self.packagers.get(key)
+            if entry and entry['remuxer'].is_running():
+                entry['last_request'] = time.monotonic()
+                return entry
+
+            if entry:
+                logger.warning(f"Live HLS packager for camera {camera.name} exited: {entry['remuxer'].error_output}")
+
+            output_dir = self.output_dir(camera, quality)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir, exist_ok=True)
+
+            rtsp_url = camera.get_stream_url(quality)
+            remuxer = LiveHLSRemuxer(
+                rtsp_url,
+                output_dir,
+                codec=probe_stream(rtsp_url, timeout=5).get('codec'),
+                segment_seconds=getattr(settings, 'LIVE_HLS_SEGMENT_SECONDS', 2),
+                list_size=getattr(settings, 'LIVE_HLS_LIST_SIZE', 6),
+            )
+            remuxer.start()
+            entry = {
+                'remuxer': remuxer,
+                'output_dir': output_dir,
+                'camera_name': camera.name,
+                'last_request': time.monotonic(),
+                'started_at': time.monotonic(),
+            }
+            self.packagers[key] = entry
+            logger.info(f"📡 Live HLS started for camera {camera.name} ({quality})")
+
+        self._start_reaper()
+        return entry
+
+    def playlist(self, camera, quality='main', wait_seconds=None):
+        """
+        Current live playlist with segment URIs pointing at the static server.
+
+        Starts the packager on first request and waits for the first segments.
+
+        Returns:
+            str: Playlist text, or None if no segment appeared in time
+        """
+        entry = self.ensure_running(camera, quality)
+        playlist_path = os.path.join(entry['output_dir'], PLAYLIST_NAME)
+        deadline = time.monotonic() + (wait_seconds if wait_seconds is not None
+                                       else getattr(settings, 'LIVE_HLS_START_TIMEOUT_SECONDS', 10))
+
+        while True:
+            try:
+                with open(playlist_path, 'r') as playlist_file:
+                    text = playlist_file.read()
+                if '#EXTINF' in text:
+                    break
+            except FileNotFoundError:
+                pass
+            if time.monotonic() >= deadline or not entry['remuxer'].is_running():
+                return None
+            time.sleep(0.25)
+
+        lines = []
+        for line in text.splitlines():
+            name = line.strip()
+            if SEGMENT_PATTERN.match(name):
+                line = self.segment_url(camera, quality, name)
+            lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    def stop(self, camera_id, quality=None):
+        """Stop a camera's packagers (all qualities unless one is given) and remove their segments"""
+        with self._lock:
+            keys = [key for key in self.packagers
+                    if key[0] == str(camera_id) and (quality is None or key[1] == quality)]
+            entries = [self.packagers.pop(key) for key in keys]
+
+        for entry in entries:
+            entry['remuxer'].stop(timeout=5)
+            shutil.rmtree(entry['output_dir'], ignore_errors=True)
+            logger.info(f"⏹️ Live HLS stopped for camera {entry['camera_name']}")
+
+    def _start_reaper(self):
+        """Start the thread stopping packagers without viewers"""
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_idle, name='live-hls-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self):
+        """Stop packagers whose playlist nobody requested recently; exit when none are left"""
+        idle_seconds = getattr(settings, 'LIVE_HLS_IDLE_SECONDS', 60)
+        while True:
+            time.sleep(min(idle_seconds / 2, 15))
+            now = time.monotonic()
+            with self._lock:
+                idle = [key for key, entry in self.packagers.items()
+                        if now - entry['last_request'] > idle_seconds or not entry['remuxer'].is_running()]
+                if not self.packagers:
+                    self._reaper = None
+                    return
+            for camera_id, quality in idle:
+                self.stop(camera_id, quality)
+
+    def stats(self):
+        """Running packagers for status reporting"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'camera_id': camera_id,
+                    'camera_name': entry['camera_name'],
+                    'quality': quality,
+                    'running': entry['remuxer'].is_running(),
+                    'uptime_seconds': round(now - entry['started_at']),
+                    'idle_seconds': round(now - entry['last_request']),
+                }
+                for (camera_id, quality), entry in self.packagers.items()
+            ]
+
+
+# Global instance
+live_hls_manager = LiveHLSManager()
@@ -0,0 +1,43 @@
+"""
+Management command to rebuild the hourly recording rollups.
+Run it once after migrating, and whenever recordings were changed in bulk
+outside the application (raw SQL, restores).
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.cctv.models import Camera
+from apps.cctv.rollup import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly recording rollups used by the dashboard analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days (default: all recordings)',
+        )
+        parser.add_argument(
+            '--camera',
+            type=str,
+            help='Only rebuild the rollups of this camera (UUID)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('📈 Rebuilding recording rollups...\n'))
+
+        camera_id = options.get('camera')
+        if camera_id and not Camera.objects.filter(id=camera_id).exists():
+            raise CommandError(f'Camera {camera_id} does not exist')
+
+        since = None
+        if options.get('days'):
+            since = timezone.now() - timedelta(days=options['days'])
+
+        written = backfill_rollups(since=since, camera_id=camera_id)
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {written} hourly rollups'))
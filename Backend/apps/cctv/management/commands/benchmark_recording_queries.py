@@ -0,0 +1,165 @@
+"""
+Management command to benchmark the hot recording and schedule queries.
+
+Seeds a benchmark camera with synthetic recordings (one million by default)
+and prints EXPLAIN ANALYZE plans of the queries the API, the scheduler and
+the sync/cleanup jobs run. Run it before and after applying the index
+migration to compare the plans:
+
+    python manage.py migrate cctv 0014
+    python manage.py benchmark_recording_queries --seed
+    python manage.py migrate cctv 0015
+    python manage.py benchmark_recording_queries --cleanup
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.cctv.models import Camera, Recording, RecordingSchedule, GCPVideoTransfer
+
+BENCHMARK_CAMERA_NAME = '__benchmark__'
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic recordings and print query plans of the hot recording queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Create the synthetic recordings before benchmarking',
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1_000_000,
+            help='Number of recordings to seed (default: 1000000)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Rows per bulk insert (default: 10000)',
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Delete the benchmark camera and its recordings after benchmarking',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only compared on PostgreSQL')
+
+        camera = self.get_camera()
+        if options['seed']:
+            self.seed(camera, options['count'], options['batch_size'])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE cctv_recording')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 Benchmarking with {Recording.objects.count()} recordings\n"
+        ))
+        for title, queryset in self.get_queries(camera):
+            self.explain(title, queryset)
+
+        if options['cleanup']:
+            self.cleanup(camera)
+
+    def get_camera(self):
+        """Camera owning the synthetic recordings"""
+        camera = Camera.objects.filter(name=BENCHMARK_CAMERA_NAME).first()
+        if camera is None:
+            camera = Camera.objects.create(
+                name=BENCHMARK_CAMERA_NAME,
+                ip_address='127.0.0.1',
+                rtsp_url='rtsp://127.0.0.1:554/benchmark',
+                is_active=False,
+            )
+        return camera
+
+    def seed(self, camera, count, batch_size):
+        """Bulk insert recordings spread over the last year"""
+        self.stdout.write(f'🌱 Seeding {count} recordings...')
+        now = timezone.now()
+        statuses = ['completed'] * 8 + ['failed', 'stopped']
+        storage_types = ['gcp', 'gcp', 'aws', 'local']
+        started = time.monotonic()
+
+        for offset in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - offset)):
+                start_time = now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))
+                batch.append(Recording(
+                    camera=camera,
+                    name='benchmark',
+                    file_path=f'recordings/{camera.id}/benchmark.mp4',
+                    storage_type=random.choice(storage_types),
+                    file_size=random.randint(10, 500) * 1024 * 1024,
+                    duration=timedelta(minutes=5),
+                    start_time=start_time,
+                    end_time=start_time + timedelta(minutes=5),
+                    status=random.choice(statuses),
+                    upload_status='completed',
+                ))
+            Recording.objects.bulk_create(batch, batch_size=batch_size)
+            self.stdout.write(f'   {offset + len(batch)}/{count}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Seeded in {time.monotonic() - started:.1f}s\n'))
+
+    def get_queries(self, camera):
+        """The hot queries, as the code paths issue them"""
+        now = timezone.now()
+        page = Recording.objects.order_by('-start_time', '-id')
+        last = page.values('start_time', 'id')[1000:1001].first()
+
+        queries = [
+            ('Recording list, first page', page[:51]),
+            ('Recording list, camera filter', page.filter(camera=camera)[:51]),
+            ('Recording list, page after cursor', page.filter(
+                Q(start_time__lt=last['start_time']) | Q(start_time=last['start_time'], id__lt=last['id'])
+            )[:51] if last else page[:51]),
+            ('Dashboard daily count', Recording.objects.filter(
+                start_time__gte=now - timedelta(days=1), start_time__lt=now
+            )),
+            ('Retention cleanup', Recording.objects.filter(
+                camera=camera, start_time__lt=now - timedelta(days=300), status='completed'
+            )),
+            ('Upload sync', Recording.objects.filter(
+                file_path__isnull=False, storage_type='local', status='completed'
+            ).exclude(file_path='').order_by('-created_at')[:100]),
+            ('Local client schedules', RecordingSchedule.objects.filter(
+                camera__in=[camera], is_active=True, updated_at__gte=now - timedelta(days=1)
+            )),
+            ('GCP transfer cleanup', GCPVideoTransfer.objects.filter(
+                transfer_status__in=['completed', 'cleanup_pending'],
+                upload_completed_at__isnull=False,
+                cleanup_completed_at__isnull=True,
+                upload_completed_at__lte=now - timedelta(hours=24),
+            )),
+        ]
+        return queries
+
+    def explain(self, title, queryset):
+        """Print the executed plan of a query"""
+        self.stdout.write(self.style.MIGRATE_HEADING(f'🔎 {title}'))
+        self.stdout.write(queryset.explain(analyze=True, buffers=True))
+        self.stdout.write('')
+
+    def cleanup(self, camera):
+        """Delete the synthetic recordings in batches, then the camera"""
+        self.stdout.write('🧹 Removing benchmark recordings...')
+        while True:
+            ids = list(Recording.objects.filter(camera=camera).values_list('id', flat=True)[:10_000])
+            if not ids:
+                break
+            Recording.objects.filter(id__in=ids).delete()
+        camera.delete()
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark data removed'))
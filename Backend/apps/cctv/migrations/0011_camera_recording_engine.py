@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-16 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0010_alter_recording_storage_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='recording_engine',
+            field=models.CharField(choices=[('opencv', 'OpenCV (decode and re-encode)'), ('remux', 'Stream copy (no transcoding)')], default='opencv', help_text='How frames are written: re-encoded through OpenCV or remuxed from the camera stream with ffmpeg', max_length=10),
+        ),
+    ]
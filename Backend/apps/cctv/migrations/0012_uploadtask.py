@@ -0,0 +1,38 @@
+# Generated by Django 4.2.25 on 2026-10-16 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0011_camera_recording_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('local_path', models.CharField(help_text='Absolute local path of the file to upload', max_length=500)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('uploading', 'Uploading'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=15)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed upload attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the next attempt may run')),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt', null=True)),
+                ('claimed_by', models.CharField(blank=True, help_text='Worker that claimed this task', max_length=100, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='When the task was claimed', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('recording', models.OneToOneField(help_text='Recording to upload (one task per recording)', on_delete=django.db.models.deletion.CASCADE, related_name='upload_task', to='cctv.recording')),
+            ],
+            options={
+                'verbose_name': 'Upload Task',
+                'verbose_name_plural': 'Upload Tasks',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='cctv_upload_status_due_idx')],
+            },
+        ),
+    ]
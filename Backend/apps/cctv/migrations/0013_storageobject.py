@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-16 12:20
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0012_uploadtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageObject',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('backend', models.CharField(choices=[('aws', 'AWS S3 Storage'), ('gcp', 'Google Cloud Storage')], max_length=10)),
+                ('key', models.CharField(help_text='Object key / path in the bucket', max_length=500)),
+                ('size', models.BigIntegerField(blank=True, help_text='Object size in bytes', null=True)),
+                ('etag', models.CharField(blank=True, default='', help_text='ETag reported by the provider', max_length=100)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('verified_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the object was last seen in the bucket')),
+            ],
+            options={
+                'verbose_name': 'Storage Object',
+                'verbose_name_plural': 'Storage Objects',
+                'constraints': [models.UniqueConstraint(fields=('backend', 'key'), name='cctv_storage_object_unique_key')],
+            },
+        ),
+    ]
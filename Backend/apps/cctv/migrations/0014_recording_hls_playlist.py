@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-16 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0013_storageobject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='hls_playlist',
+            field=models.CharField(blank=True, help_text='Storage path of the HLS master playlist (same storage as the recording)', max_length=500, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.25 on 2026-10-16 14:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built with CREATE INDEX CONCURRENTLY so the recordings table stays writable
+    atomic = False
+
+    dependencies = [
+        ('cctv', '0014_recording_hls_playlist'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recordingschedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['camera', 'updated_at'], name='cctv_sched_cam_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recording',
+            index=models.Index(fields=['-start_time', '-id'], name='cctv_rec_start_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recording',
+            index=models.Index(fields=['camera', '-start_time', '-id'], name='cctv_rec_cam_start_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recording',
+            index=models.Index(condition=models.Q(('status', 'completed'), ('storage_type', 'local')), fields=['-created_at'], name='cctv_rec_local_done_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='gcpvideotransfer',
+            index=models.Index(condition=models.Q(('cleanup_completed_at__isnull', True), ('upload_completed_at__isnull', False)), fields=['upload_completed_at'], name='cctv_xfer_cleanup_due_idx'),
+        ),
+    ]
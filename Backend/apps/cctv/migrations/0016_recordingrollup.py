@@ -0,0 +1,35 @@
+# Generated by Django 4.2.25 on 2026-10-16 14:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0015_recording_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordingRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField(help_text='Start of the hour (server time zone) the recordings started in')),
+                ('recording_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0, help_text='Combined file size in bytes')),
+                ('total_seconds', models.FloatField(default=0, help_text='Combined duration in seconds')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recording_rollups', to='cctv.camera')),
+            ],
+            options={
+                'verbose_name': 'Recording Rollup',
+                'verbose_name_plural': 'Recording Rollups',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='cctv_rollup_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('camera', 'hour'), name='cctv_rollup_unique_camera_hour')],
+            },
+        ),
+    ]
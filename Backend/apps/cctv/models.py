@@ -67,6 +67,12 @@ class Camera(models.Model):
         default='backend',
         help_text="Where recordings should be performed"
     )
+    recording_engine = models.CharField(
+        max_length=10,
+        choices=[('opencv', 'OpenCV (decode and re-encode)'), ('remux', 'Stream copy (no transcoding)')],
+        default='opencv',
+        help_text="How frames are written: re-encoded through OpenCV or remuxed from the camera stream with ffmpeg"
+    )
     record_quality = models.CharField(
         max_length=10, 
         choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low')],
@@ -288,6 +294,11 @@ class RecordingSchedule(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Recording Schedule'
         verbose_name_plural = 'Recording Schedules'
+        indexes = [
+            # Local client schedule sync: active schedules of its cameras changed since the last sync
+            models.Index(fields=['camera', 'updated_at'], condition=models.Q(is_active=True),
+                         name='cctv_sched_cam_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.camera.name}"
@@ -348,6 +359,10 @@ class Recording(models.Model):
     resolution = models.CharField(max_length=20, blank=True, null=True, help_text="e.g., 1920x1080")
     frame_rate = models.PositiveIntegerField(blank=True, null=True, help_text="FPS")
     codec = models.CharField(max_length=10, blank=True, null=True, help_text="Video codec used (e.g., H264)")
+    hls_playlist = models.CharField(
+        max_length=500, blank=True, null=True,
+        help_text="Storage path of the HLS master playlist (same storage as the recording)"
+    )
     
     # Local client tracking
     recorded_by_client = models.ForeignKey(
@@ -378,6 +393,15 @@ class Recording(models.Model):
         ordering = ['-start_time']
         verbose_name = 'Recording'
         verbose_name_plural = 'Recordings'
+        indexes = [
+            # Recording list (keyset on start_time, id) and start_time range counts
+            models.Index(fields=['-start_time', '-id'], name='cctv_rec_start_id_idx'),
+            # Per-camera list and retention cleanup (camera, start_time < cutoff)
+            models.Index(fields=['camera', '-start_time', '-id'], name='cctv_rec_cam_start_idx'),
+            # Upload sync jobs: completed recordings still in local storage
+            models.Index(fields=['-created_at'], condition=models.Q(storage_type='local', status='completed'),
+                         name='cctv_rec_local_done_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.camera.name} ({self.start_time})"
@@ -392,11 +416,21 @@ class Recording(models.Model):
     
     @property
     def file_exists(self):
-        """Check if the recording file exists in storage (local or GCP)"""
-        if self.file_path:
-            from .storage_service import storage_service
-            return storage_service.file_exists(self.file_path)
-        return False
+        """
+        Check if the recording file exists in storage (local or cloud).
+        
+        Cloud recordings are answered from the row itself: file_path only points
+        into a bucket after the upload succeeded, so no request to the provider
+        is needed. Local files are checked on disk.
+        """
+        if not self.file_path or self.file_path.endswith('.tmp'):
+            return False
+        
+        if self.storage_type in ('aws', 'gcp'):
+            return self.upload_status != 'failed'
+        
+        import os
+        return os.path.exists(os.path.join(settings.MEDIA_ROOT, self.file_path))
     
     @property
     def file_size_mb(self):
@@ -426,7 +460,7 @@ class Recording(models.Model):
             
         try:
             from .storage_service import storage_service
-            url = storage_service.get_file_url(self.file_path)
+            url = storage_service.get_file_url(self.file_path, storage_type=self.storage_type)
             return url or ""  # storage_service.get_file_url now always returns str, but keep defensive check
         except Exception as e:
             logger.error(f"Error getting file URL for recording {self.id}: {str(e)}")
@@ -627,6 +661,12 @@ class GCPVideoTransfer(models.Model):
         ordering = ['-created_at']
         verbose_name = 'GCP Video Transfer'
         verbose_name_plural = 'GCP Video Transfers'
+        indexes = [
+            # Cleanup command: uploaded transfers whose local file is not deleted yet
+            models.Index(fields=['upload_completed_at'],
+                         condition=models.Q(upload_completed_at__isnull=False, cleanup_completed_at__isnull=True),
+                         name='cctv_xfer_cleanup_due_idx'),
+        ]
     
     def __str__(self):
         return f"Transfer: {self.recording.name} ({self.transfer_status})"
@@ -694,4 +734,101 @@ class GCPVideoTransfer(models.Model):
         from django.utils import timezone
         self.cleanup_completed_at = timezone.now()
         self.transfer_status = 'cleanup_completed'
-        self.save(update_fields=['cleanup_completed_at', 'transfer_status'])
\ No newline at end of file
+        self.save(update_fields=['cleanup_completed_at', 'transfer_status'])
+
+class UploadTask(models.Model):
+    """Durable queue entry for uploading a finished recording to cloud storage"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recording = models.OneToOneField(
+        Recording,
+        on_delete=models.CASCADE,
+        related_name='upload_task',
+        help_text="Recording to upload (one task per recording)"
+    )
+    local_path = models.CharField(max_length=500, help_text="Absolute local path of the file to upload")
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='queued')
+    
+    # Retry handling
+    attempts = models.PositiveIntegerField(default=0, help_text="Number of failed upload attempts")
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the next attempt may run")
+    last_error = models.TextField(blank=True, null=True, help_text="Error from the last failed attempt")
+    
+    # Claim held by the worker currently uploading the file
+    claimed_by = models.CharField(max_length=100, blank=True, null=True, help_text="Worker that claimed this task")
+    claimed_at = models.DateTimeField(blank=True, null=True, help_text="When the task was claimed")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = 'Upload Task'
+        verbose_name_plural = 'Upload Tasks'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='cctv_upload_status_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Upload: {self.recording.name} ({self.status})"
+
+
+class StorageObject(models.Model):
+    """Index of objects stored in cloud buckets, so existence and size checks need no cloud request"""
+    
+    BACKEND_CHOICES = [
+        ('aws', 'AWS S3 Storage'),
+        ('gcp', 'Google Cloud Storage'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    backend = models.CharField(max_length=10, choices=BACKEND_CHOICES)
+    key = models.CharField(max_length=500, help_text="Object key / path in the bucket")
+    size = models.BigIntegerField(blank=True, null=True, help_text="Object size in bytes")
+    etag = models.CharField(max_length=100, blank=True, default='', help_text="ETag reported by the provider")
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    verified_at = models.DateTimeField(default=timezone.now, help_text="When the object was last seen in the bucket")
+    
+    class Meta:
+        verbose_name = 'Storage Object'
+        verbose_name_plural = 'Storage Objects'
+        constraints = [
+            models.UniqueConstraint(fields=['backend', 'key'], name='cctv_storage_object_unique_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.backend}:{self.key}"
+
+
+class RecordingRollup(models.Model):
+    """Hourly per-camera recording totals, kept current by the recorder and upload pipeline"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='recording_rollups')
+    hour = models.DateTimeField(help_text="Start of the hour (server time zone) the recordings started in")
+    recording_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0, help_text="Combined file size in bytes")
+    total_seconds = models.FloatField(default=0, help_text="Combined duration in seconds")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-hour']
+        verbose_name = 'Recording Rollup'
+        verbose_name_plural = 'Recording Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['camera', 'hour'], name='cctv_rollup_unique_camera_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='cctv_rollup_hour_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.camera_id} @ {self.hour}: {self.recording_count} recordings"
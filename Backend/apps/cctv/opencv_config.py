@@ -4,6 +4,9 @@ OpenCV configuration and optimization settings for CCTV streaming
 
 import logging
 import os
+import queue
+import threading
+import time
 import warnings
 
 # Suppress OpenCV warnings before importing cv2
@@ -195,7 +198,6 @@ def test_camera_connection_robust(rtsp_url, max_attempts=None, verify_frames=3):
                         break
                 
                 # Small delay between frame reads
-                import time
                 time.sleep(0.1)
             
             cap.release()
@@ -212,42 +214,80 @@ def test_camera_connection_robust(rtsp_url, max_attempts=None, verify_frames=3):
         
         # Wait before retry
         if attempt < max_attempts - 1:
-            import time
             time.sleep(STREAM_SETTINGS['retry_delay'])
     
     return False, f"Failed to connect after {max_attempts} attempts or could not read {verify_frames} frames"
 
-def get_frame_with_timeout(cap, timeout_ms=1000):
-    """Get a frame with timeout to prevent hanging"""
-    import time
-    import threading
+class FrameReader:
+    """
+    Persistent reader thread for a video capture.
     
-    result = {'ret': False, 'frame': None, 'done': False}
+    A single thread keeps calling ``cap.read()`` and hands frames over through a
+    small bounded queue, so callers get real read timeouts (``queue.get``)
+    without spawning a thread per frame. When the consumer falls behind the
+    oldest queued frame is dropped, keeping latency bounded.
+    """
     
-    def read_frame():
-        try:
-            ret, frame = cap.read()
-            result['ret'] = ret
-            result['frame'] = frame
-        except Exception as e:
-            logger.warning(f"Frame read error: {str(e)}")
-        finally:
-            result['done'] = True
+    def __init__(self, cap, name="capture", queue_size=2):
+        self.cap = cap
+        self.name = name
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.running = True
+        self.timeouts = 0          # Reads that did not deliver a frame in time
+        self.dropped = 0           # Frames discarded because the consumer was behind
+        self.failures = 0          # cap.read() calls that returned no frame
+        self._thread = threading.Thread(target=self._run, name=f"FrameReader-{name}", daemon=True)
+        self._thread.start()
     
-    # Start reading in a separate thread
-    thread = threading.Thread(target=read_frame, daemon=True)
-    thread.start()
+    def _run(self):
+        """Read frames until stopped; a failed read is queued as (False, None)"""
+        while self.running:
+            try:
+                ret, frame = self.cap.read()
+            except Exception as e:
+                logger.warning(f"Frame read error on {self.name}: {str(e)}")
+                ret, frame = False, None
+            
+            if not ret:
+                self.failures += 1
+            
+            while self.running:
+                try:
+                    self.frames.put_nowait((ret, frame))
+                    break
+                except queue.Full:
+                    try:
+                        self.frames.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+            
+            if not ret:
+                # Do not spin on a dead source; the consumer decides when to give up
+                time.sleep(0.1)
     
-    # Wait for result with timeout
-    start_time = time.time()
-    while not result['done'] and (time.time() - start_time) * 1000 < timeout_ms:
-        time.sleep(0.01)
+    def read(self, timeout_ms=1000):
+        """
+        Get the next frame.
+        
+        Args:
+            timeout_ms: Maximum time to wait in milliseconds
+        
+        Returns:
+            tuple: (ret, frame) - (False, None) on timeout
+        """
+        try:
+            return self.frames.get(timeout=timeout_ms / 1000)
+        except queue.Empty:
+            self.timeouts += 1
+            return False, None
     
-    if result['done']:
-        return result['ret'], result['frame']
-    else:
-        logger.warning("Frame read timeout")
-        return False, None
+    def stop(self, timeout=2.0):
+        """Stop the reader thread (the capture itself is not released)"""
+        self.running = False
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
 
 def safe_frame_encoding(frame, quality=85):
     """Safely encode a frame to JPEG with error handling"""
@@ -0,0 +1,83 @@
+"""
+Frame pacing for capture consumers.
+
+Capture loops read as fast as the camera delivers (so RTSP buffers never back
+up); each consumer then decides per frame, by timestamp, whether to take it
+to hit its own target frame rate. Achieved FPS and dropped-frame counts are
+tracked for stream health reporting.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class FramePacer:
+    """Timestamp based frame skipper for one consumer"""
+
+    def __init__(self, target_fps=None, window_seconds=5.0):
+        """
+        Args:
+            target_fps: Frames per second to let through (None = take every frame)
+            window_seconds: Window used to measure the achieved frame rate
+        """
+        self.target_fps = target_fps
+        self.window_seconds = window_seconds
+        self.accepted = 0
+        self.dropped = 0
+        self._next_due = None
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def offer(self, timestamp=None):
+        """
+        Offer a newly arrived frame.
+
+        Args:
+            timestamp: time.monotonic() of the frame (default: now)
+
+        Returns:
+            bool: True if the consumer should use this frame, False to skip it
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+
+        with self._lock:
+            if self.target_fps:
+                interval = 1.0 / self.target_fps
+                # Accept slightly early frames so jitter does not halve the rate
+                if self._next_due is not None and now < self._next_due - interval * 0.25:
+                    self.dropped += 1
+                    return False
+
+                if self._next_due is None or now - self._next_due > interval:
+                    # First frame or the source stalled: restart the schedule instead of bursting
+                    self._next_due = now + interval
+                else:
+                    self._next_due += interval
+
+            self.accepted += 1
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.window_seconds:
+                self._recent.popleft()
+            return True
+
+    @property
+    def achieved_fps(self):
+        """Frames per second accepted over the measurement window"""
+        with self._lock:
+            if len(self._recent) < 2:
+                return 0.0
+            # Frames older than the window no longer count
+            if time.monotonic() - self._recent[-1] > self.window_seconds:
+                return 0.0
+            span = self._recent[-1] - self._recent[0]
+            return round((len(self._recent) - 1) / span, 1) if span > 0 else 0.0
+
+    def stats(self):
+        """Pacing statistics for health reporting"""
+        return {
+            'target_fps': self.target_fps,
+            'achieved_fps': self.achieved_fps,
+            'frames': self.accepted,
+            'dropped': self.dropped,
+        }
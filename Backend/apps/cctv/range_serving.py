@@ -0,0 +1,235 @@
+"""
+Byte-range serving of local recording files.
+
+Browsers seek in a video by requesting byte ranges. Recordings kept in
+``MEDIA_ROOT`` are served straight from disk with ``206 Partial Content``
+(single ranges and ``multipart/byteranges``), conditional requests
+(``If-None-Match``/``If-Range`` against an ETag derived from size and mtime)
+and ``416`` for unsatisfiable ranges. When ``RECORDING_SENDFILE_BACKEND`` is
+set the response only carries an ``X-Accel-Redirect``/``X-Sendfile`` header
+and the front-end web server sends the bytes (and handles ranges) itself, so
+no Django worker is tied up pushing video.
+"""
+
+import os
+import uuid
+import logging
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16     # More ranges than this in one request are answered with the whole file
+
+
+def parse_range_header(header, file_size):
+    """
+    Parse a ``Range`` header.
+
+    Args:
+        header: Value of the Range header
+        file_size: Size of the file in bytes
+
+    Returns:
+        list: Sorted, merged (start, end) pairs with inclusive ends; an empty
+        list if no range is satisfiable; None if the header is malformed or
+        asks for too many ranges (it is then ignored and the whole file sent)
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+
+    ranges = []
+    for spec in header[len('bytes='):].split(','):
+        spec = spec.strip()
+        if not spec:
+            continue
+        start, sep, end = spec.partition('-')
+        if not sep:
+            return None
+        try:
+            if not start:
+                # Suffix range: the last N bytes
+                length = int(end)
+                if length <= 0:
+                    continue
+                start, end = max(file_size - length, 0), file_size - 1
+            else:
+                start = int(start)
+                end = int(end) if end else file_size - 1
+        except ValueError:
+            return None
+        if start < 0 or end < start:
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def file_etag(stat_result):
+    """Strong ETag for a file, changing whenever its size or mtime changes"""
+    return quote_etag(f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}")
+
+
+def _etag_matches(header, etag):
+    """Check an If-None-Match header against the ETag (weak comparison)"""
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _range_still_valid(request, etag, last_modified):
+    """A Range request with If-Range only applies if the file is unchanged"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    return if_range == last_modified
+
+
+def _read_range(path, start, end):
+    """Yield the bytes start..end (inclusive) of a file in chunks"""
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = source.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _multipart_body(path, ranges, boundary, content_type, file_size):
+    """Yield a multipart/byteranges body"""
+    for start, end in ranges:
+        yield (f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+               f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n").encode()
+        yield from _read_range(path, start, end)
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def _multipart_length(ranges, boundary, content_type, file_size):
+    """Exact length of the body _multipart_body produces"""
+    length = len(f"\r\n--{boundary}--\r\n")
+    for start, end in ranges:
+        length += len(f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+                      f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n")
+        length += end - start + 1
+    return length
+
+
+def resolve_media_path(relative_path):
+    """
+    Absolute path of a file under MEDIA_ROOT.
+
+    Raises:
+        Http404: If the path escapes MEDIA_ROOT or the file does not exist
+    """
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    full_path = os.path.realpath(os.path.join(media_root, relative_path))
+    if os.path.commonpath([media_root, full_path]) != media_root or not os.path.isfile(full_path):
+        raise Http404("Recording file not found")
+    return full_path
+
+
+def _offload_response(full_path, content_type):
+    """Hand the transfer to the front-end server, or None if offloading is off"""
+    backend = (getattr(settings, 'RECORDING_SENDFILE_BACKEND', '') or '').lower()
+    if not backend:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if backend == 'nginx':
+        relative_path = os.path.relpath(full_path, os.path.realpath(settings.MEDIA_ROOT)).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = getattr(settings, 'RECORDING_SENDFILE_URL_PREFIX', '/protected-media/') + relative_path
+    elif backend == 'xsendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        logger.warning(f"Unknown RECORDING_SENDFILE_BACKEND '{backend}', serving file from Django")
+        return None
+    return response
+
+
+def serve_media_file(request, relative_path, content_type, filename=None, as_attachment=False):
+    """
+    Serve a file from MEDIA_ROOT with byte-range and conditional request support.
+
+    Args:
+        request: Incoming request
+        relative_path: Path of the file relative to MEDIA_ROOT
+        content_type: MIME type of the file
+        filename: Download name for Content-Disposition
+        as_attachment: Send Content-Disposition: attachment instead of inline
+
+    Returns:
+        HttpResponse: 200, 206, 304 or 416 response (or an offload response)
+
+    Raises:
+        Http404: If the file does not exist
+    """
+    full_path = resolve_media_path(relative_path)
+    stat = os.stat(full_path)
+    file_size = stat.st_size
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    def finish(response):
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        if filename:
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+        return response
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return finish(HttpResponse(status=304))
+
+    offloaded = _offload_response(full_path, content_type)
+    if offloaded is not None:
+        return finish(offloaded)
+
+    ranges = None
+    if request.method in ('GET', 'HEAD') and _range_still_valid(request, etag, last_modified):
+        ranges = parse_range_header(request.META.get('HTTP_RANGE'), file_size)
+
+    if ranges is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        response['Content-Length'] = file_size
+        return finish(response)
+
+    if not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{file_size}"
+        return finish(response)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(_read_range(full_path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f"bytes {start}-{end}/{file_size}"
+        response['Content-Length'] = end - start + 1
+        return finish(response)
+
+    boundary = uuid.uuid4().hex
+    response = StreamingHttpResponse(
+        _multipart_body(full_path, ranges, boundary, content_type, file_size),
+        status=206, content_type=f"multipart/byteranges; boundary={boundary}"
+    )
+    response['Content-Length'] = _multipart_length(ranges, boundary, content_type, file_size)
+    return finish(response)
@@ -0,0 +1,195 @@
+"""
+Keyset-paginated recording listing.
+
+Recordings are listed newest first by ``(start_time, id)``; the cursor is the
+position of the last row of the previous page, so each page is an indexed
+range scan no matter how deep the client has paged (no OFFSET). Rows are
+fetched as a ``values()`` projection with the camera and schedule names
+joined in, so a page is one query whatever its size, and the totals for the
+filtered set are one aggregate query.
+"""
+
+import base64
+import binascii
+import json
+import os
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.duration import duration_string
+
+from .models import Recording
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+RECORDING_LIST_FIELDS = (
+    'id', 'camera_id', 'camera__name', 'schedule_id', 'schedule__name', 'name',
+    'file_path', 'file_size', 'duration', 'start_time', 'end_time', 'status', 'error_message',
+    'resolution', 'frame_rate', 'codec', 'storage_type', 'upload_status', 'hls_playlist',
+    'created_at', 'updated_at',
+)
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(start_time, recording_id):
+    """Opaque cursor for the position after a row"""
+    payload = json.dumps([start_time.isoformat(), str(recording_id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from encode_cursor.
+
+    Returns:
+        tuple: (start_time, recording_id)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        start_time, recording_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        parsed = parse_datetime(start_time)
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+    if parsed is None:
+        raise InvalidCursor("Invalid cursor")
+    return parsed, recording_id
+
+
+def filter_recordings(queryset=None, camera_id=None, status=None, storage_type=None, start_from=None, start_to=None):
+    """
+    Apply the listing filters.
+
+    Args:
+        queryset: Base queryset (default: all recordings)
+        camera_id: Only this camera's recordings
+        status: Recording status
+        storage_type: 'local', 'aws' or 'gcp'
+        start_from: Recordings starting at or after this datetime
+        start_to: Recordings starting before this datetime
+
+    Returns:
+        QuerySet: Filtered recordings
+    """
+    queryset = Recording.objects.all() if queryset is None else queryset
+    if camera_id:
+        queryset = queryset.filter(camera_id=camera_id)
+    if status:
+        queryset = queryset.filter(status=status)
+    if storage_type:
+        queryset = queryset.filter(storage_type=storage_type)
+    if start_from:
+        queryset = queryset.filter(start_time__gte=start_from)
+    if start_to:
+        queryset = queryset.filter(start_time__lt=start_to)
+    return queryset
+
+
+def recording_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of recordings, newest first.
+
+    Args:
+        queryset: Filtered recordings
+        cursor: Cursor from the previous page (None for the first page)
+        limit: Page size (capped at MAX_PAGE_SIZE)
+
+    Returns:
+        tuple: (rows as dicts, next cursor or None)
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+    if cursor:
+        start_time, recording_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=recording_id))
+
+    # One extra row tells whether there is a next page
+    rows = list(queryset.order_by('-start_time', '-id').values(*RECORDING_LIST_FIELDS)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['start_time'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+def recording_totals(queryset):
+    """Total, completed and failed counts of the filtered recordings (one query)"""
+    return queryset.aggregate(
+        total_recordings=Count('id'),
+        completed_recordings=Count('id', filter=Q(status='completed')),
+        failed_recordings=Count('id', filter=Q(status='failed')),
+    )
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def serialize_recording_row(row):
+    """
+    Turn a values() row into a listing item without touching the database.
+
+    Produces the same fields as RecordingSerializer; file_url, file_exists
+    and absolute_file_path follow the Recording properties.
+    """
+    from .storage_service import storage_service
+
+    file_path = row['file_path'] or ''
+    usable = bool(file_path) and not file_path.endswith('.tmp')
+
+    file_url = ''
+    if usable:
+        try:
+            file_url = storage_service.get_file_url(file_path, storage_type=row['storage_type']) or ''
+        except Exception as e:
+            logger.error(f"Error getting file URL for recording {row['id']}: {str(e)}")
+
+    if not usable:
+        file_exists = False
+    elif row['storage_type'] in ('aws', 'gcp'):
+        file_exists = row['upload_status'] != 'failed'
+    else:
+        file_exists = os.path.exists(os.path.join(settings.MEDIA_ROOT, file_path))
+
+    duration = row['duration']
+    return {
+        'id': str(row['id']),
+        'camera': str(row['camera_id']),
+        'camera_name': row['camera__name'],
+        'schedule': str(row['schedule_id']) if row['schedule_id'] else None,
+        'schedule_name': row['schedule__name'],
+        'name': row['name'],
+        'file_path': file_path,
+        'file_size': row['file_size'],
+        'file_size_mb': round(row['file_size'] / (1024 * 1024), 2) if row['file_size'] else 0,
+        'duration': duration_string(duration) if duration is not None else None,
+        'duration_seconds': duration.total_seconds() if duration is not None else None,
+        'start_time': _isoformat(row['start_time']),
+        'end_time': _isoformat(row['end_time']),
+        'status': row['status'],
+        'error_message': row['error_message'],
+        'resolution': row['resolution'],
+        'frame_rate': row['frame_rate'],
+        'codec': row['codec'],
+        'storage_type': row['storage_type'],
+        'upload_status': row['upload_status'],
+        'hls_playlist': row['hls_playlist'],
+        'file_url': file_url,
+        'absolute_file_path': (os.path.join(settings.MEDIA_ROOT, file_path)
+                               if file_path and not getattr(settings, 'GCP_STORAGE_USE_GCS', False) else None),
+        'is_active': row['status'] == 'recording',
+        'file_exists': file_exists,
+        'created_at': _isoformat(row['created_at']),
+        'updated_at': _isoformat(row['updated_at']),
+    }
@@ -0,0 +1,102 @@
+"""
+Recording statistics computed by the database.
+
+One ``GROUP BY camera, storage_type`` query returns counts, sizes and
+durations per camera and storage backend; the overall totals are folded
+from those groups, so no recording row is loaded into Python. The
+unfiltered statistics are cached and invalidated whenever a recording is
+saved, converted or deleted.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_KEY = 'cctv_recording_stats'
+
+
+def _summary(count, completed, failed, active, size, duration):
+    """Stats dict in the shape of the recording stats endpoint"""
+    return {
+        'total_recordings': count,
+        'completed_recordings': completed,
+        'failed_recordings': failed,
+        'active_recordings': active,
+        'success_rate': round(completed / count * 100, 2) if count > 0 else 0,
+        'total_size_bytes': size,
+        'total_size_gb': round(size / (1024 ** 3), 2),
+        'total_duration_seconds': duration,
+        'total_duration_hours': round(duration / 3600, 2),
+    }
+
+
+def compute_recording_stats(queryset=None):
+    """
+    Aggregate recording statistics (one query).
+
+    Args:
+        queryset: Recordings to include (default: all)
+
+    Returns:
+        dict: Totals plus 'per_camera' and 'per_storage' breakdowns
+    """
+    from .models import Recording
+
+    queryset = Recording.objects.all() if queryset is None else queryset
+    groups = (queryset.order_by()
+              .values('camera_id', 'camera__name', 'storage_type')
+              .annotate(count=Count('id'),
+                        completed=Count('id', filter=Q(status='completed')),
+                        failed=Count('id', filter=Q(status='failed')),
+                        active=Count('id', filter=Q(status='recording')),
+                        size=Sum('file_size'),
+                        duration=Sum('duration')))
+
+    keys = ('count', 'completed', 'failed', 'active', 'size', 'duration')
+    totals = dict.fromkeys(keys, 0)
+    per_camera, per_storage = {}, {}
+
+    for group in groups:
+        values = {
+            'count': group['count'],
+            'completed': group['completed'],
+            'failed': group['failed'],
+            'active': group['active'],
+            'size': group['size'] or 0,
+            'duration': group['duration'].total_seconds() if group['duration'] else 0,
+        }
+        camera = per_camera.setdefault(group['camera_id'], {'name': group['camera__name'], **dict.fromkeys(keys, 0)})
+        storage = per_storage.setdefault(group['storage_type'], dict.fromkeys(keys, 0))
+        for key in keys:
+            totals[key] += values[key]
+            camera[key] += values[key]
+            storage[key] += values[key]
+
+    stats = _summary(*(totals[key] for key in keys))
+    stats['per_camera'] = [
+        {'camera_id': str(camera_id), 'camera_name': camera['name'], **_summary(*(camera[key] for key in keys))}
+        for camera_id, camera in sorted(per_camera.items(), key=lambda item: item[1]['name'] or '')
+    ]
+    stats['per_storage'] = [
+        {'storage_type': storage_type, **_summary(*(storage[key] for key in keys))}
+        for storage_type, storage in sorted(per_storage.items())
+    ]
+    return stats
+
+
+def get_recording_stats():
+    """Statistics over all recordings, cached until a recording changes"""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_recording_stats()
+        cache.set(STATS_CACHE_KEY, stats, getattr(settings, 'RECORDING_STATS_CACHE_SECONDS', 300))
+    return stats
+
+
+def invalidate_recording_stats():
+    """Drop the cached statistics (called when a recording is saved, converted or deleted)"""
+    cache.delete(STATS_CACHE_KEY)
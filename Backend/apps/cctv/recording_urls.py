@@ -35,7 +35,8 @@ def get_recording_url_view(self, request, pk=None):
             file_url = storage_service.get_file_url(
                 recording.file_path, 
                 signed=True, 
-                expiration_minutes=120
+                expiration_minutes=120,
+                storage_type=recording.storage_type
             )
             
             if file_url:
@@ -60,7 +61,7 @@ def get_recording_url_view(self, request, pk=None):
                 )
         else:
             # Generate local URL
-            file_url = storage_service.get_file_url(recording.file_path)
+            file_url = storage_service.get_file_url(recording.file_path, storage_type=recording.storage_type)
             
             return Response({
                 'url': request.build_absolute_uri(file_url) if file_url else None,
@@ -133,10 +134,11 @@ def get_bulk_recording_urls_view(self, request):
                     file_url = storage_service.get_file_url(
                         recording.file_path, 
                         signed=True, 
-                        expiration_minutes=120
+                        expiration_minutes=120,
+                        storage_type=recording.storage_type
                     )
                 else:
-                    file_url = storage_service.get_file_url(recording.file_path)
+                    file_url = storage_service.get_file_url(recording.file_path, storage_type=recording.storage_type)
                     if file_url:
                         file_url = request.build_absolute_uri(file_url)
                 
@@ -0,0 +1,254 @@
+"""
+Stream-copy (zero transcode) recording engine.
+
+Drives an ``ffmpeg -c copy`` subprocess that remuxes the camera's compressed
+H.264/H.265 packets straight into an MP4/MKV file, so recording does not
+decode and re-encode every frame the way the OpenCV ``VideoWriter`` path does.
+"""
+
+import json
+import logging
+import shutil
+import subprocess
+import threading
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = shutil.which('ffmpeg')
+FFPROBE_BINARY = shutil.which('ffprobe')
+
+# Containers the remux engine can write, mapped to their file extension
+REMUX_CONTAINERS = {
+    'mp4': '.mp4',
+    'matroska': '.mkv',
+}
+
+
+def remux_available():
+    """Check whether ffmpeg is installed and the remux engine can be used"""
+    return FFMPEG_BINARY is not None
+
+
+def probe_stream(rtsp_url, timeout=15):
+    """
+    Read codec, resolution and frame rate of the first video stream with ffprobe.
+
+    Args:
+        rtsp_url: RTSP URL of the camera
+        timeout: Seconds to wait for ffprobe
+
+    Returns:
+        dict: {'codec', 'width', 'height', 'fps'} (values may be None if unknown)
+    """
+    info = {'codec': None, 'width': None, 'height': None, 'fps': None}
+    if FFPROBE_BINARY is None:
+        return info
+
+    command = [
+        FFPROBE_BINARY, '-v', 'error',
+        '-rtsp_transport', 'tcp',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,width,height,avg_frame_rate,r_frame_rate',
+        '-of', 'json',
+        rtsp_url,
+    ]
+
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=timeout, check=False)
+        streams = json.loads(result.stdout or b'{}').get('streams') or []
+        if not streams:
+            return info
+
+        stream = streams[0]
+        info['codec'] = stream.get('codec_name')
+        info['width'] = stream.get('width')
+        info['height'] = stream.get('height')
+
+        for rate_key in ('avg_frame_rate', 'r_frame_rate'):
+            rate = stream.get(rate_key) or '0/0'
+            num, _, den = rate.partition('/')
+            try:
+                fps = float(num) / float(den or 1)
+            except (ValueError, ZeroDivisionError):
+                continue
+            if 0 < fps <= 120:
+                info['fps'] = round(fps)
+                break
+    except subprocess.TimeoutExpired:
+        logger.warning(f"ffprobe timed out after {timeout}s")
+    except Exception as e:
+        logger.warning(f"ffprobe failed: {str(e)}")
+
+    return info
+
+
+def read_completed_segments(segment_list_path, already_seen=0):
+    """
+    Read segments ffmpeg has finished writing from its CSV segment list.
+
+    Args:
+        segment_list_path: Path passed as ``segment_list`` to FFmpegRemuxer
+        already_seen: Number of entries the caller has already processed
+
+    Returns:
+        list: New (filename, start_seconds, end_seconds) tuples, oldest first
+    """
+    try:
+        with open(segment_list_path, 'r') as list_file:
+            content = list_file.read()
+    except FileNotFoundError:
+        return []
+
+    # Only complete lines; ffmpeg may be in the middle of appending the next one
+    lines = [line for line in content.split('\n')[:-1] if line.strip()]
+
+    segments = []
+    for line in lines[already_seen:]:
+        try:
+            name, start, end = line.rsplit(',', 2)
+            segments.append((name.strip('"'), float(start), float(end)))
+        except ValueError:
+            logger.warning(f"Unexpected segment list entry: {line}")
+            segments.append((None, 0.0, 0.0))
+    return segments
+
+
+class FFmpegRemuxer:
+    """Managed ``ffmpeg -c copy`` subprocess writing one output file or a series of segments"""
+
+    def __init__(self, rtsp_url, output_path, duration_seconds=None, container='mp4', codec=None,
+                 segment_seconds=None, segment_list_path=None):
+        """
+        Args:
+            rtsp_url: Camera RTSP URL
+            output_path: Output file, or a strftime pattern when segmenting
+            duration_seconds: Stop after this many seconds (None = until stopped)
+            container: 'mp4' or 'matroska'
+            codec: Source video codec name from probe_stream (used for MP4 tagging)
+            segment_seconds: Roll to a new file every N seconds, aligned to the wall clock
+            segment_list_path: CSV file ffmpeg appends "filename,start,end" to as each segment closes
+        """
+        self.rtsp_url = rtsp_url
+        self.output_path = str(output_path)
+        self.duration_seconds = duration_seconds
+        self.container = container
+        self.codec = codec
+        self.segment_seconds = segment_seconds
+        self.segment_list_path = str(segment_list_path) if segment_list_path else None
+        self.process = None
+        self._stderr_tail = []
+        self._stderr_thread = None
+
+    def build_command(self):
+        """Build the ffmpeg command line"""
+        command = [
+            FFMPEG_BINARY, '-hide_banner', '-nostats', '-loglevel', 'error',
+            '-rtsp_transport', 'tcp',
+            '-fflags', '+genpts',
+            '-i', self.rtsp_url,
+            '-map', '0:v:0',
+            '-an',            # Camera audio (G.711 etc.) is often not valid in MP4
+            '-c:v', 'copy',
+        ]
+
+        if self.duration_seconds:
+            command += ['-t', str(int(self.duration_seconds))]
+
+        if self.container == 'mp4':
+            # Browsers only play HEVC in MP4 when tagged hvc1
+            if self.codec in ('hevc', 'h265'):
+                command += ['-tag:v', 'hvc1']
+
+        if self.segment_seconds:
+            command += [
+                '-f', 'segment',
+                '-segment_time', str(int(self.segment_seconds)),
+                '-segment_atclocktime', '1',
+                '-reset_timestamps', '1',
+                '-strftime', '1',
+                '-segment_format', self.container,
+            ]
+            if self.container == 'mp4':
+                command += ['-segment_format_options', 'movflags=+faststart']
+            if self.segment_list_path:
+                command += ['-segment_list', self.segment_list_path, '-segment_list_type', 'csv']
+        else:
+            if self.container == 'mp4':
+                command += ['-movflags', '+faststart']
+            command += ['-f', self.container]
+
+        command += ['-y', self.output_path]
+        return command
+
+    def start(self):
+        """Start the ffmpeg process"""
+        if not remux_available():
+            raise Exception("ffmpeg is not installed. Cannot use the stream-copy recording engine.")
+
+        self.process = subprocess.Popen(
+            self.build_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+        logger.info(f"🎞️ Started stream-copy remux to {self.output_path} (pid {self.process.pid})")
+        return self.process
+
+    def _drain_stderr(self):
+        """Keep the last few lines of ffmpeg's stderr for error reporting"""
+        try:
+            for line in self.process.stderr:
+                self._stderr_tail.append(line.decode(errors='replace').strip())
+                if len(self._stderr_tail) > 20:
+                    self._stderr_tail.pop(0)
+        except Exception:
+            pass
+
+    @property
+    def error_output(self):
+        """Last lines ffmpeg wrote to stderr"""
+        return '\n'.join(line for line in self._stderr_tail if line)
+
+    def is_running(self):
+        """Check if the ffmpeg process is still running"""
+        return self.process is not None and self.process.poll() is None
+
+    def wait(self, timeout=None):
+        """Wait for ffmpeg to exit; returns the exit code or None on timeout"""
+        if self.process is None:
+            return None
+        try:
+            return self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    def stop(self, timeout=10):
+        """
+        Stop ffmpeg gracefully so the container is finalized.
+
+        Sends 'q' on stdin (ffmpeg's own quit key) and kills the process only if
+        it does not exit in time.
+        """
+        if not self.is_running():
+            return self.process.returncode if self.process else None
+
+        try:
+            self.process.stdin.write(b'q')
+            self.process.stdin.flush()
+        except Exception:
+            pass
+
+        returncode = self.wait(timeout)
+        if returncode is None:
+            logger.warning(f"ffmpeg did not exit in {timeout}s, terminating (pid {self.process.pid})")
+            self.process.terminate()
+            returncode = self.wait(5)
+            if returncode is None:
+                self.process.kill()
+                returncode = self.wait(5)
+
+        return returncode
@@ -0,0 +1,306 @@
+"""
+Chunked, resumable uploads for large recordings.
+
+S3 files are sent as multipart uploads with several parts in flight at once;
+GCS files go through a resumable upload session in fixed-size chunks. The
+upload id / session URL is persisted on disk as soon as it is created, so an
+upload interrupted by a network error or a crashed worker continues from the
+last part the storage service acknowledged instead of starting over. All
+uploads in the process share one bandwidth throttle so they cannot starve
+live RTSP ingest.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+S3_MIN_PART_SIZE = 5 * 1024 * 1024       # S3 rejects smaller parts (except the last one)
+S3_MAX_PARTS = 10000
+GCS_CHUNK_ALIGNMENT = 256 * 1024         # GCS resumable chunks must be multiples of 256 KiB
+GCS_SESSION_LIFETIME = 6 * 24 * 3600     # Sessions expire after a week; stop trusting them a day early
+UPLOAD_STATE_MAX_AGE = 7 * 24 * 3600     # State of uploads nobody resumed for this long is dropped
+
+
+class BandwidthThrottle:
+    """Caps the combined upload rate of all threads sharing this instance"""
+
+    def __init__(self, bytes_per_second=0):
+        """
+        Args:
+            bytes_per_second: Maximum average rate (0 = unlimited)
+        """
+        self.bytes_per_second = bytes_per_second
+        self._next_free = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        """Block until ``nbytes`` may be sent without exceeding the rate"""
+        if not self.bytes_per_second or nbytes <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bytes_per_second
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class UploadStateStore:
+    """Small JSON files recording in-progress uploads, one per destination object"""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def load(self, key):
+        """Get the saved state for an upload, or None"""
+        try:
+            with open(self._path(key), 'r') as state_file:
+                return json.load(state_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, key, state):
+        """Persist state atomically (a crash never leaves a half-written file)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        with open(path + '.tmp', 'w') as state_file:
+            json.dump(dict(state, key=key, saved_at=time.time()), state_file)
+        os.replace(path + '.tmp', path)
+
+    def delete(self, key):
+        """Forget an upload once it is complete"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_age_seconds):
+        """Remove state for uploads that were abandoned long ago"""
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - max_age_seconds
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _file_signature(file_path):
+    """Size and mtime; a saved upload is only resumed for the exact same file"""
+    stat = os.stat(file_path)
+    return {'file_size': stat.st_size, 'file_mtime': int(stat.st_mtime)}
+
+
+def _matches(state, signature, **expected):
+    """Check that saved state belongs to this file and these upload parameters"""
+    return state is not None and all(state.get(name) == value
+                                     for name, value in dict(signature, **expected).items())
+
+
+def s3_multipart_upload(client, bucket, key, file_path, content_type=None, part_size=None, max_concurrency=None):
+    """
+    Upload a file to S3 as a resumable multipart upload.
+
+    Args:
+        client: boto3 S3 client
+        bucket: Bucket name
+        key: Destination object key
+        file_path: Local file to upload
+        content_type: MIME type of the object
+        part_size: Bytes per part (default: settings.UPLOAD_PART_SIZE_MB)
+        max_concurrency: Parts uploaded in parallel (default: settings.UPLOAD_MAX_CONCURRENCY)
+
+    Raises:
+        Exception: If any part or the final completion fails; the upload can be resumed later
+    """
+    signature = _file_signature(file_path)
+    file_size = signature['file_size']
+    part_size = max(part_size or upload_part_size(), S3_MIN_PART_SIZE, math.ceil(file_size / S3_MAX_PARTS))
+    max_concurrency = max_concurrency or getattr(settings, 'UPLOAD_MAX_CONCURRENCY', 4)
+    part_count = max(math.ceil(file_size / part_size), 1)
+    state_key = f"s3:{bucket}:{key}"
+
+    upload_state.prune(UPLOAD_STATE_MAX_AGE)
+    state = upload_state.load(state_key)
+    uploaded = {}
+
+    if state is not None and not _matches(state, signature, part_size=part_size):
+        # The local file (or the part size) changed since the last attempt
+        _abort_s3_upload(client, bucket, key, state.get('upload_id'))
+        state = None
+
+    if state is not None:
+        try:
+            paginator = client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=state['upload_id']):
+                for part in page.get('Parts', []):
+                    expected = min(part_size, file_size - (part['PartNumber'] - 1) * part_size)
+                    if part['Size'] == expected:
+                        uploaded[part['PartNumber']] = part['ETag']
+            logger.info(f"⏯️ Resuming S3 upload of {key}: {len(uploaded)}/{part_count} parts already stored")
+        except Exception as e:
+            logger.warning(f"Cannot resume S3 upload of {key}, starting over: {str(e)}")
+            state, uploaded = None, {}
+
+    if state is None:
+        extra_args = {'ContentType': content_type} if content_type else {}
+        response = client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)
+        state = dict(signature, upload_id=response['UploadId'], part_size=part_size)
+        upload_state.save(state_key, state)
+
+    upload_id = state['upload_id']
+
+    def upload_part(part_number):
+        offset = (part_number - 1) * part_size
+        with open(file_path, 'rb') as source:
+            source.seek(offset)
+            data = source.read(part_size)
+        upload_throttle.consume(len(data))
+        response = client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id,
+                                      PartNumber=part_number, Body=data)
+        return part_number, response['ETag']
+
+    missing = [number for number in range(1, part_count + 1) if number not in uploaded]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(missing))) as executor:
+            futures = [executor.submit(upload_part, number) for number in missing]
+            try:
+                for future in as_completed(futures):
+                    part_number, etag = future.result()
+                    uploaded[part_number] = etag
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    client.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=upload_id,
+        MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': uploaded[number]} for number in sorted(uploaded)]}
+    )
+    upload_state.delete(state_key)
+
+
+def _abort_s3_upload(client, bucket, key, upload_id):
+    """Discard the stored parts of an upload that will not be resumed"""
+    if not upload_id:
+        return
+    try:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except Exception as e:
+        logger.debug(f"Could not abort S3 upload {upload_id}: {str(e)}")
+
+
+def gcs_resumable_upload(blob, file_path, content_type=None, chunk_size=None, timeout=300):
+    """
+    Upload a file to GCS through a resumable upload session.
+
+    Args:
+        blob: google.cloud.storage Blob to write
+        file_path: Local file to upload
+        content_type: MIME type of the object
+        chunk_size: Bytes per request (default: settings.UPLOAD_PART_SIZE_MB, rounded to 256 KiB)
+        timeout: Seconds allowed for each chunk request
+
+    Raises:
+        Exception: If a chunk fails; the upload can be resumed later
+    """
+    import requests
+
+    signature = _file_signature(file_path)
+    file_size = signature['file_size']
+    chunk_size = chunk_size or upload_part_size()
+    chunk_size = max(chunk_size // GCS_CHUNK_ALIGNMENT, 1) * GCS_CHUNK_ALIGNMENT
+    state_key = f"gcs:{blob.bucket.name}:{blob.name}"
+
+    upload_state.prune(UPLOAD_STATE_MAX_AGE)
+    state = upload_state.load(state_key)
+    offset = None
+
+    if _matches(state, signature) and time.time() - state.get('created_at', 0) < GCS_SESSION_LIFETIME:
+        offset = _gcs_committed_offset(requests, state['session_url'], file_size, timeout)
+        if offset is not None:
+            logger.info(f"⏯️ Resuming GCS upload of {blob.name} at {offset}/{file_size} bytes")
+
+    if offset is None:
+        session_url = blob.create_resumable_upload_session(content_type=content_type, size=file_size, timeout=timeout)
+        state = dict(signature, session_url=session_url, created_at=time.time())
+        upload_state.save(state_key, state)
+        offset = 0
+
+    session_url = state['session_url']
+    with open(file_path, 'rb') as source:
+        while offset < file_size:
+            source.seek(offset)
+            data = source.read(chunk_size)
+            end = offset + len(data) - 1
+            upload_throttle.consume(len(data))
+
+            response = requests.put(session_url, data=data, timeout=timeout,
+                                    headers={'Content-Range': f"bytes {offset}-{end}/{file_size}"})
+            if response.status_code in (200, 201):
+                offset = file_size
+            elif response.status_code == 308:
+                offset = _gcs_range_end(response)
+            else:
+                raise Exception(f"GCS chunk upload failed: HTTP {response.status_code} {response.text[:200]}")
+
+    upload_state.delete(state_key)
+
+
+def _gcs_range_end(response):
+    """Bytes GCS has persisted, from the Range header of a 308 response"""
+    persisted = response.headers.get('Range')
+    if not persisted:
+        return 0
+    return int(persisted.rsplit('-', 1)[-1]) + 1
+
+
+def _gcs_committed_offset(requests, session_url, file_size, timeout):
+    """Ask a session how much it has stored; None if the session is gone"""
+    try:
+        response = requests.put(session_url, data=b'', timeout=timeout,
+                                headers={'Content-Range': f"bytes */{file_size}"})
+    except Exception as e:
+        logger.warning(f"Cannot query GCS upload session: {str(e)}")
+        return None
+
+    if response.status_code in (200, 201):
+        return file_size
+    if response.status_code == 308:
+        return _gcs_range_end(response)
+    return None
+
+
+def upload_part_size():
+    """Configured part/chunk size in bytes"""
+    return int(getattr(settings, 'UPLOAD_PART_SIZE_MB', 8) * 1024 * 1024)
+
+
+def uses_chunked_upload(file_path):
+    """Files up to one part are uploaded in a single request; resuming them gains nothing"""
+    try:
+        return os.path.getsize(file_path) > upload_part_size()
+    except OSError:
+        return False
+
+
+# Global instances
+upload_state = UploadStateStore(getattr(settings, 'UPLOAD_STATE_DIR', os.path.join(settings.BASE_DIR, 'upload_state')))
+upload_throttle = BandwidthThrottle(getattr(settings, 'UPLOAD_BANDWIDTH_LIMIT_KBPS', 0) * 1024)
@@ -0,0 +1,229 @@
+"""
+Hourly recording rollups and the dashboard analytics built on them.
+
+``RecordingRollup`` keeps one row per camera and hour (in the server time
+zone) with the number of recordings that started in it, how many failed,
+and their combined size and duration. Whenever a recording is saved,
+converted or deleted, only its own bucket is recomputed from the
+``(camera, start_time)`` index and upserted, so the table stays exact
+without a full rescan. The dashboard then reads at most one row per hour
+of the chart window instead of counting the recordings table.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ['recording_count', 'failed_count', 'total_bytes', 'total_seconds']
+ANALYTICS_CACHE_KEY = 'cctv_dashboard_analytics'
+
+
+def rollup_hour(moment):
+    """Start of the server-time-zone hour a datetime falls in"""
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _bucket_totals():
+    """Aggregates of one rollup bucket over Recording rows"""
+    return {
+        'recording_count': Count('id'),
+        'failed_count': Count('id', filter=Q(status='failed')),
+        'total_bytes': Sum('file_size'),
+        'total_seconds': Sum('duration'),
+    }
+
+
+def _rollup(camera_id, hour, totals):
+    """RecordingRollup instance from aggregated totals"""
+    from .models import RecordingRollup
+
+    duration = totals['total_seconds']
+    return RecordingRollup(
+        camera_id=camera_id,
+        hour=hour,
+        recording_count=totals['recording_count'],
+        failed_count=totals['failed_count'],
+        total_bytes=totals['total_bytes'] or 0,
+        total_seconds=duration.total_seconds() if duration else 0,
+    )
+
+
+def _upsert(rollups):
+    """Insert or overwrite rollup rows (one statement)"""
+    from .models import RecordingRollup
+
+    RecordingRollup.objects.bulk_create(
+        rollups, update_conflicts=True, unique_fields=['camera', 'hour'], update_fields=ROLLUP_FIELDS + ['updated_at']
+    )
+
+
+def refresh_rollup(camera_id, start_time):
+    """
+    Recompute the bucket of one camera and hour.
+
+    Args:
+        camera_id: Camera of the changed recording
+        start_time: Start time of the changed recording
+    """
+    from .models import Recording, RecordingRollup
+
+    hour = rollup_hour(start_time)
+    totals = Recording.objects.filter(
+        camera_id=camera_id, start_time__gte=hour, start_time__lt=hour + timedelta(hours=1)
+    ).aggregate(**_bucket_totals())
+
+    if totals['recording_count']:
+        _upsert([_rollup(camera_id, hour, totals)])
+    else:
+        RecordingRollup.objects.filter(camera_id=camera_id, hour=hour).delete()
+
+
+def schedule_rollup_refresh(camera_id, start_time):
+    """Refresh a bucket once the current transaction commits (errors only affect the dashboard)"""
+    if not camera_id or not start_time:
+        return
+
+    def refresh():
+        try:
+            refresh_rollup(camera_id, start_time)
+        except Exception as e:
+            logger.error(f"Error refreshing recording rollup for camera {camera_id}: {str(e)}")
+
+    transaction.on_commit(refresh)
+
+
+def backfill_rollups(since=None, camera_id=None):
+    """
+    Rebuild the rollups from the recordings table.
+
+    Args:
+        since: Only rebuild hours from this datetime on (default: everything)
+        camera_id: Only rebuild this camera's rollups
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    from .models import Recording, RecordingRollup
+
+    recordings = Recording.objects.all()
+    rollups = RecordingRollup.objects.all()
+    if since:
+        since = rollup_hour(since)
+        recordings = recordings.filter(start_time__gte=since)
+        rollups = rollups.filter(hour__gte=since)
+    if camera_id:
+        recordings = recordings.filter(camera_id=camera_id)
+        rollups = rollups.filter(camera_id=camera_id)
+
+    buckets = (recordings.order_by()
+               .values('camera_id', hour=TruncHour('start_time'))
+               .annotate(**_bucket_totals()))
+    new_rollups = [_rollup(bucket['camera_id'], bucket['hour'], bucket) for bucket in buckets.iterator()]
+
+    with transaction.atomic():
+        rollups.delete()
+        RecordingRollup.objects.bulk_create(new_rollups, batch_size=1000)
+
+    cache.delete(ANALYTICS_CACHE_KEY)
+    logger.info(f"📈 Rebuilt {len(new_rollups)} recording rollups")
+    return len(new_rollups)
+
+
+def dashboard_analytics():
+    """
+    Chart data for the dashboard (cached for DASHBOARD_ANALYTICS_CACHE_SECONDS).
+
+    Recording activity and storage come from one GROUP BY over the rollups
+    of the last 30 days. The storage series is the size of the recordings
+    that still exist, by the day they started (with a running total); it is
+    not a history of disk usage, since deleted recordings are no longer
+    counted on any day.
+
+    Returns:
+        dict: Payload of the dashboard analytics endpoint
+    """
+    data = cache.get(ANALYTICS_CACHE_KEY)
+    if data is not None:
+        return data
+
+    import calendar
+    from .models import Camera, RecordingSchedule, RecordingRollup
+
+    today = timezone.localdate()
+    window_start = timezone.make_aware(datetime.combine(today - timedelta(days=29), datetime.min.time()))
+
+    hours = (RecordingRollup.objects.filter(hour__gte=window_start)
+             .values('hour')
+             .annotate(recordings=Sum('recording_count'), bytes=Sum('total_bytes'))
+             .order_by())
+    totals = RecordingRollup.objects.aggregate(
+        total_recordings=Sum('recording_count'),
+        bytes_before_window=Sum('total_bytes', filter=Q(hour__lt=window_start)),
+    )
+
+    daily_recordings, daily_bytes, hourly_today = {}, {}, [0] * 24
+    for row in hours:
+        local_hour = timezone.localtime(row['hour'])
+        day = local_hour.date()
+        daily_recordings[day] = daily_recordings.get(day, 0) + row['recordings']
+        daily_bytes[day] = daily_bytes.get(day, 0) + row['bytes']
+        if day == today:
+            hourly_today[local_hour.hour] += row['recordings']
+
+    recording_activity = []
+    for offset in range(6, -1, -1):
+        day = today - timedelta(days=offset)
+        recording_activity.append({
+            'date': day.isoformat(),
+            'day': calendar.day_name[day.weekday()],
+            'recordings': daily_recordings.get(day, 0)
+        })
+
+    retained_storage = []
+    cumulative_bytes = totals['bytes_before_window'] or 0
+    for offset in range(29, -1, -1):
+        day = today - timedelta(days=offset)
+        cumulative_bytes += daily_bytes.get(day, 0)
+        retained_storage.append({
+            'date': day.isoformat(),
+            'recorded_gb': round(daily_bytes.get(day, 0) / (1024 ** 3), 2),
+            'cumulative_gb': round(cumulative_bytes / (1024 ** 3), 2)
+        })
+
+    camera_status = list(Camera.objects.values('status').annotate(count=Count('id')).order_by())
+    schedules = list(RecordingSchedule.objects.values('schedule_type')
+                     .annotate(count=Count('id'), active=Count('id', filter=Q(is_active=True))).order_by())
+
+    total_cameras = sum(row['count'] for row in camera_status)
+    online_cameras = sum(row['count'] for row in camera_status if row['status'] == 'active')
+
+    data = {
+        "camera_status_distribution": camera_status,
+        "recording_activity_7_days": recording_activity,
+        "hourly_activity_today": [
+            {'hour': f"{hour:02d}:00", 'recordings': count} for hour, count in enumerate(hourly_today)
+        ],
+        "schedule_type_distribution": [
+            {'schedule_type': row['schedule_type'], 'count': row['count']} for row in schedules
+        ],
+        "retained_storage_by_start_date": retained_storage,
+        "system_metrics": {
+            "total_cameras": total_cameras,
+            "online_cameras": online_cameras,
+            "offline_cameras": total_cameras - online_cameras,
+            "total_recordings": totals['total_recordings'] or 0,
+            "total_schedules": sum(row['count'] for row in schedules),
+            "active_schedules": sum(row['active'] for row in schedules),
+            "uptime_percentage": round((online_cameras / total_cameras * 100) if total_cameras > 0 else 0, 1)
+        }
+    }
+    cache.set(ANALYTICS_CACHE_KEY, data, getattr(settings, 'DASHBOARD_ANALYTICS_CACHE_SECONDS', 60))
+    return data
@@ -6,6 +6,7 @@ try:
     from apscheduler.schedulers.background import BackgroundScheduler
     from apscheduler.triggers.date import DateTrigger
     from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
     SCHEDULER_AVAILABLE = True
 except ImportError:
     SCHEDULER_AVAILABLE = False
@@ -31,6 +32,10 @@ except ImportError:
     class CronTrigger:
         def __init__(self, *args, **kwargs):
             pass
+    
+    class IntervalTrigger:
+        def __init__(self, *args, **kwargs):
+            pass
 from django.utils import timezone
 from datetime import datetime, time, timedelta
 import logging
@@ -176,10 +181,10 @@ class RecordingScheduler:
     
     def _add_continuous_schedule(self, schedule):
         """Add a continuous recording schedule"""
-        # For continuous recording, we'll start immediately and restart when it ends
+        # Start recording immediately; the recording itself rolls over into
+        # wall-clock aligned segments, so no per-chunk jobs are needed
         job_id = f"continuous_{schedule.id}"
         
-        # Start recording immediately
         self.scheduler.add_job(
             func=self._start_continuous_recording,
             trigger=DateTrigger(run_date=timezone.now()),
@@ -188,7 +193,17 @@ class RecordingScheduler:
             name=f"Continuous recording: {schedule.name}"
         )
         
-        self.active_jobs[str(schedule.id)] = [job_id]
+        # Watchdog: restart the segmented recording if it ever ends (camera offline, crash, ...)
+        watchdog_job_id = f"continuous_{schedule.id}_watchdog"
+        self.scheduler.add_job(
+            func=self._start_continuous_recording,
+            trigger=CronTrigger(minute='*'),
+            args=[schedule],
+            id=watchdog_job_id,
+            name=f"Continuous recording watchdog: {schedule.name}"
+        )
+        
+        self.active_jobs[str(schedule.id)] = [job_id, watchdog_job_id]
     
     def _calculate_duration(self, start_time, end_time):
         """Calculate duration in minutes between start and end time"""
@@ -284,41 +299,26 @@ class RecordingScheduler:
             logger.error(f"Error starting scheduled recording for {schedule.name}: {str(e)}")
     
     def _start_continuous_recording(self, schedule):
-        """Start a continuous recording and schedule the next one"""
+        """Start the segmented recording for a continuous schedule if it is not running"""
         try:
+            schedule.refresh_from_db()
             if not schedule.is_active:
                 logger.info(f"Continuous schedule {schedule.name} is inactive, stopping")
                 return
             
-            # Start recording for a chunk (e.g., 1 hour segments)
-            chunk_duration = 60  # 60 minutes per chunk
-            recording_name = f"SCHEDULED - {schedule.name} - Continuous {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            if recording_manager.is_recording(schedule.camera.id):
+                return
+            
+            recording_name = f"SCHEDULED - {schedule.name} - Continuous"
             
-            recording = recording_manager.start_recording(
+            recording_manager.start_segmented_recording(
                 camera=schedule.camera,
-                duration_minutes=chunk_duration,
                 recording_name=recording_name,
                 user=schedule.created_by,
-                is_scheduled=True,
-                schedule_id=schedule.id
+                schedule=schedule
             )
             
-            recording.schedule = schedule
-            recording.save()
-            
-            logger.info(f"✅ Started continuous recording chunk: {recording_name} for camera '{schedule.camera.name}'")
-            
-            # Schedule the next continuous recording
-            next_start = timezone.now() + timedelta(minutes=chunk_duration)
-            next_job_id = f"continuous_{schedule.id}_{int(timezone.now().timestamp())}"
-            
-            self.scheduler.add_job(
-                func=self._start_continuous_recording,
-                trigger=DateTrigger(run_date=next_start),
-                args=[schedule],
-                id=next_job_id,
-                name=f"Next continuous recording: {schedule.name}"
-            )
+            logger.info(f"✅ Started continuous recording: {recording_name} for camera '{schedule.camera.name}'")
             
         except Exception as e:
             error_msg = str(e)
@@ -334,10 +334,26 @@ class RecordingScheduler:
             except Exception as status_error:
                 logger.error(f"Error updating camera status: {str(status_error)}")
     
-    def remove_schedule(self, schedule_id):
-        """Remove a recording schedule"""
+    def remove_schedule(self, schedule_id, keep_recording_camera_id=None):
+        """
+        Remove a recording schedule
+        
+        Args:
+            schedule_id: Schedule ID
+            keep_recording_camera_id: Leave this camera's continuous recording running
+        """
         schedule_id_str = str(schedule_id)
         
+        # Continuous schedules own a long-running segmented recording; end it too
+        for camera_id, recording_info in list(recording_manager.active_recordings.items()):
+            if camera_id == str(keep_recording_camera_id):
+                continue
+            if recording_info.get('segmented') and str(recording_info.get('schedule_id')) == schedule_id_str:
+                try:
+                    recording_manager.stop_recording(camera_id)
+                except Exception as e:
+                    logger.warning(f"Error stopping continuous recording for schedule {schedule_id}: {str(e)}")
+        
         if schedule_id_str in self.active_jobs:
             job_ids = self.active_jobs[schedule_id_str].copy()  # Create a copy to avoid modification during iteration
             removed_count = 0
@@ -369,8 +385,12 @@ class RecordingScheduler:
     
     def update_schedule(self, schedule):
         """Update an existing schedule"""
-        # Remove old schedule
-        self.remove_schedule(schedule.id)
+        # Remove old schedule (an unchanged continuous recording keeps running
+        # so that saving the schedule does not cut the current segment short)
+        keep_camera_id = None
+        if schedule.is_active and schedule.schedule_type == 'continuous':
+            keep_camera_id = schedule.camera_id
+        self.remove_schedule(schedule.id, keep_recording_camera_id=keep_camera_id)
         
         # Add updated schedule
         if schedule.is_active:
@@ -496,85 +516,47 @@ def cleanup_old_recordings():
 
 
 def sync_recordings_to_gcp():
-    """Background task to sync local recordings to GCP storage"""
+    """
+    Background task that makes sure no local recording is left behind.
+    
+    Recordings that completed while no producer queued them (e.g. the server
+    restarted in between) are added to the upload queue, and the queue's
+    workers are (re)started so tasks persisted before a restart get drained.
+    """
     try:
         from django.conf import settings
         from .models import Recording
-        from .storage_service import storage_service
+        from .upload_queue import upload_queue
         import os
         
-        # Check if GCP auto-upload is enabled
-        if not getattr(settings, 'GCP_STORAGE_AUTO_UPLOAD', True):
-            logger.debug("GCP auto-upload is disabled, skipping sync")
-            return
-            
-        if not storage_service.use_gcp:
-            logger.debug("GCP storage not available, skipping sync")
+        if not upload_queue.cloud_enabled():
+            logger.debug("Cloud storage not available, skipping sync")
             return
         
-        # Get recordings that need to be synced (max 10 per run to avoid overload)
+        upload_queue.wake()
+        
+        # Completed local recordings that have never been queued
         recordings_to_sync = Recording.objects.filter(
             file_path__isnull=False,
             storage_type='local',
-            status='completed'
-        ).exclude(file_path='')[:10]
-        
-        if not recordings_to_sync:
-            logger.debug("No recordings need GCP sync")
-            return
-            
-        logger.info(f"🔄 Starting background GCP sync for {len(recordings_to_sync)} recordings")
-        
-        synced_count = 0
-        failed_count = 0
+            status='completed',
+            upload_task__isnull=True
+        ).exclude(file_path='').select_related('camera')[:100]
         
+        queued_count = 0
         for recording in recordings_to_sync:
-            try:
-                # Check if local file exists
-                local_path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, recording.file_path))
-                
-                if not os.path.exists(local_path) or local_path.endswith('.tmp'):
-                    continue
-                
-                # Upload to GCP
-                storage_result = storage_service.upload_recording(
-                    local_file_path=local_path,
-                    recording_id=str(recording.id),
-                    camera_id=str(recording.camera.id),
-                    filename=os.path.basename(local_path)
-                )
-                
-                if storage_result[0]:  # storage_path is not None
-                    storage_path, storage_type = storage_result
-                    
-                    # Update recording
-                    recording.file_path = storage_path
-                    recording.storage_type = storage_type
-                    recording.save(update_fields=['file_path', 'storage_type'])
-                    
-                    synced_count += 1
-                    logger.info(f"✅ Synced recording {recording.name} to GCP")
-                    
-                    # Clean up local file if enabled
-                    if getattr(settings, 'GCP_STORAGE_CLEANUP_LOCAL', True):
-                        try:
-                            os.remove(local_path)
-                            logger.debug(f"🗑️ Cleaned up local file: {local_path}")
-                        except Exception as cleanup_error:
-                            logger.warning(f"Failed to cleanup {local_path}: {str(cleanup_error)}")
-                else:
-                    failed_count += 1
-                    logger.warning(f"❌ Failed to sync recording {recording.name} to GCP")
-                    
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Error syncing recording {recording.id}: {str(e)}")
+            local_path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, recording.file_path))
+            if not os.path.exists(local_path) or local_path.endswith('.tmp'):
+                continue
+            
+            if upload_queue.enqueue(recording, local_path) is not None:
+                queued_count += 1
         
-        if synced_count > 0 or failed_count > 0:
-            logger.info(f"🔄 GCP sync completed: {synced_count} synced, {failed_count} failed")
+        if queued_count > 0:
+            logger.info(f"🔄 Upload sync queued {queued_count} recordings that were missed")
                 
     except Exception as e:
-        logger.error(f"Error during GCP sync: {str(e)}")
+        logger.error(f"Error during upload sync: {str(e)}")
 
 
 # Schedule cleanup and maintenance jobs
@@ -596,12 +578,32 @@ def schedule_cleanup():
         name='Check expired once schedules'
     )
     
-    # Sync recordings to GCP every 30 minutes
+    # Queue missed recordings for upload every 5 minutes (uploads themselves run in the upload queue)
     recording_scheduler.scheduler.add_job(
         func=sync_recordings_to_gcp,
-        trigger=CronTrigger(minute='*/30'),  # Run every 30 minutes
+        trigger=CronTrigger(minute='*/5'),
         id='sync_recordings_gcp',
-        name='Sync recordings to GCP'
+        name='Queue missed recording uploads'
+    )
+    
+    # Probe camera health in the background so the dashboard never has to
+    from .health_monitor import run_camera_health_sweep
+    recording_scheduler.scheduler.add_job(
+        func=run_camera_health_sweep,
+        trigger=IntervalTrigger(seconds=getattr(settings, 'CAMERA_HEALTH_CHECK_INTERVAL', 60)),
+        id='camera_health_sweep',
+        name='Camera health sweep',
+        coalesce=True
+    )
+    
+    # Keep the storage index in line with the buckets (paginated prefix listings)
+    from .storage_index import run_storage_reconciliation
+    recording_scheduler.scheduler.add_job(
+        func=run_storage_reconciliation,
+        trigger=IntervalTrigger(minutes=getattr(settings, 'STORAGE_RECONCILE_INTERVAL_MINUTES', 360)),
+        id='storage_index_reconcile',
+        name='Reconcile storage index',
+        coalesce=True
     )
 
 
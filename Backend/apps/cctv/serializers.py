@@ -13,7 +13,7 @@ class CameraSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'ip_address', 'port', 'username', 
             'password', 'rtsp_url', 'rtsp_url_sub', 'camera_type', 'status', 
-            'location', 'auto_record', 'record_quality', 'max_recording_hours',
+            'location', 'auto_record', 'record_quality', 'recording_engine', 'max_recording_hours',
             'created_at', 'updated_at', 
             'last_seen', 'is_online', 'recording_count'
         ]
@@ -58,7 +58,7 @@ class CameraListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'ip_address', 'status', 'location', 
             'camera_type', 'is_online', 'last_seen',
-            'rtsp_url', 'rtsp_url_sub', 'auto_record', 'record_quality', 'max_recording_hours'
+            'rtsp_url', 'rtsp_url_sub', 'auto_record', 'record_quality', 'recording_engine', 'max_recording_hours'
         ]
 
 
@@ -155,11 +155,12 @@ class RecordingSerializer(serializers.ModelSerializer):
             'error_message', 'resolution', 'frame_rate', 'codec', 
             'created_at', 'updated_at', 'file_url', 'is_active',
             'file_exists', 'absolute_file_path', 'recorded_by_client',
-            'recorded_by_client_name', 'upload_status'
+            'recorded_by_client_name', 'upload_status', 'hls_playlist'
         ]
         extra_kwargs = {
             'file_path': {'read_only': True},
             'file_size': {'read_only': True},
+            'hls_playlist': {'read_only': True},
         }
     
     def get_duration_seconds(self, obj):
@@ -555,12 +556,14 @@ class LocalClientScheduleSerializer(serializers.ModelSerializer):
     camera_location = serializers.CharField(source='camera.location', read_only=True, allow_null=True)
     camera_type = serializers.CharField(source='camera.camera_type', read_only=True)
     camera_record_quality = serializers.CharField(source='camera.record_quality', read_only=True)
+    camera_recording_engine = serializers.CharField(source='camera.recording_engine', read_only=True)
     
     class Meta:
         model = RecordingSchedule
         fields = [
             'id', 'camera_id', 'camera_name', 'camera_rtsp_url', 'camera_rtsp_url_sub',
             'camera_ip_address', 'camera_location', 'camera_type', 'camera_record_quality',
+            'camera_recording_engine',
             'name', 'schedule_type',
             'start_time', 'end_time', 'start_date', 'end_date',
             'days_of_week', 'is_active', 'created_at', 'updated_at'
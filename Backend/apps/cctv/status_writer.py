@@ -0,0 +1,105 @@
+"""
+Coalescing camera status writer.
+
+Capture threads, API handlers and error paths report camera status changes
+(status, is_online, is_streaming, last_seen, ...) very often. Instead of each
+of them saving the camera row itself, changes are queued here and a single
+flusher thread applies them with ``bulk_update`` every few hundred
+milliseconds, keeping only the latest value per camera and field.
+"""
+
+import threading
+import logging
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Camera
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStatusWriter:
+    """Queues camera field changes and flushes them in batches"""
+
+    def __init__(self, flush_interval_ms=None):
+        """
+        Args:
+            flush_interval_ms: How often pending changes are written (default: settings.CAMERA_STATUS_FLUSH_MS)
+        """
+        self.flush_interval = (flush_interval_ms or getattr(settings, 'CAMERA_STATUS_FLUSH_MS', 500)) / 1000
+        self.pending = {}
+        self.flushed_count = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def enqueue(self, camera_id, **fields):
+        """
+        Queue new values for a camera's fields.
+
+        Later values for the same field replace earlier ones that were not written yet.
+        """
+        if not fields:
+            return
+
+        with self._lock:
+            self.pending.setdefault(camera_id, {}).update(fields)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='camera-status-writer', daemon=True)
+                self._thread.start()
+
+    def enqueue_camera(self, camera, update_fields):
+        """Queue the current values of ``update_fields`` on a Camera instance"""
+        self.enqueue(camera.id, **{field: getattr(camera, field) for field in update_fields})
+
+    def _run(self):
+        """Flusher loop"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing camera status updates: {str(e)}")
+
+    def flush(self):
+        """
+        Write all pending changes now.
+
+        Cameras are grouped by the set of fields that changed, so each group is
+        a single ``bulk_update`` query.
+
+        Returns:
+            int: Number of cameras written
+        """
+        with self._lock:
+            pending, self.pending = self.pending, {}
+
+        if not pending:
+            return 0
+
+        groups = {}
+        for camera_id, fields in pending.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(Camera(id=camera_id, **fields))
+
+        close_old_connections()
+        written = 0
+        for field_names, cameras in groups.items():
+            try:
+                # Rows for cameras deleted in the meantime are simply not matched
+                Camera.objects.bulk_update(cameras, list(field_names))
+                written += len(cameras)
+            except Exception as e:
+                logger.error(f"Error writing status for {len(cameras)} cameras ({', '.join(field_names)}): {str(e)}")
+
+        self.flushed_count += written
+        return written
+
+    def flush_soon(self):
+        """Wake the flusher up instead of waiting for the next interval"""
+        self._wakeup.set()
+
+
+# Global instance
+camera_status_writer = CameraStatusWriter()
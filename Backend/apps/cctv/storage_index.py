@@ -0,0 +1,201 @@
+"""
+Local index of objects stored in the cloud buckets.
+
+The upload pipeline records every object it writes, and a periodic
+reconciliation sweep lists each camera's prefix in the bucket (paginated
+listing, no per-object HEAD requests) to add objects written elsewhere,
+refresh sizes and ETags and drop objects that disappeared. Listings stop at
+STORAGE_RECONCILE_MAX_KEYS objects per prefix; a prefix that is larger is
+only added to and refreshed, since a missing key may simply not have been
+listed. Existence and size checks read the index instead of asking the
+provider.
+"""
+
+import time
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Camera, StorageObject
+
+logger = logging.getLogger(__name__)
+
+RECORDINGS_PREFIX = 'recordings/'
+
+
+def record_object(backend, key, size=None, etag='', content_type=''):
+    """
+    Add or refresh an object in the index.
+
+    Args:
+        backend: 'aws' or 'gcp'
+        key: Object key in the bucket
+        size: Size in bytes (None if unknown)
+        etag: ETag reported by the provider
+        content_type: MIME type of the object
+    """
+    try:
+        StorageObject.objects.update_or_create(
+            backend=backend, key=key,
+            defaults={'size': size, 'etag': etag or '', 'content_type': content_type or '',
+                      'verified_at': timezone.now()}
+        )
+    except Exception as e:
+        logger.warning(f"Could not index {backend}:{key}: {str(e)}")
+
+
+def forget_object(backend, key):
+    """Remove an object from the index (after it was deleted)"""
+    StorageObject.objects.filter(backend=backend, key=key).delete()
+
+
+def lookup(key, backends):
+    """
+    Find an indexed object.
+
+    Args:
+        key: Object key in the bucket
+        backends: Backends to look in, in order of preference
+
+    Returns:
+        StorageObject: The first match, or None
+    """
+    objects = {obj.backend: obj for obj in StorageObject.objects.filter(key=key, backend__in=backends)}
+    for backend in backends:
+        if backend in objects:
+            return objects[backend]
+    return None
+
+
+def _max_keys():
+    """Most objects listed per prefix"""
+    return getattr(settings, 'STORAGE_RECONCILE_MAX_KEYS', 100000)
+
+
+def _list_aws(prefix):
+    """
+    List a prefix in the S3 bucket.
+
+    Returns:
+        tuple: ({key: (size, etag, content_type)}, complete) - complete is False if the listing hit the limit
+    """
+    from utils.s3_uploader import S3Uploader
+
+    # One key past the limit tells a full prefix apart from one that is exactly at it
+    files = S3Uploader().list_files(prefix=prefix, max_keys=_max_keys() + 1, raise_errors=True)
+    # list_objects_v2 does not return content types
+    listed = {item['key']: (item['size'], item['etag'].strip('"'), None) for item in files}
+    return listed, len(files) <= _max_keys()
+
+
+def _list_gcp(gcp_service, prefix):
+    """
+    List a prefix in the GCS bucket.
+
+    Returns:
+        tuple: ({key: (size, etag, content_type)}, complete) - complete is False if the listing hit the limit
+    """
+    blobs = gcp_service.client.list_blobs(gcp_service.bucket_name, prefix=prefix, max_results=_max_keys() + 1)
+    listed = {blob.name: (blob.size, blob.etag or '', blob.content_type) for blob in blobs}
+    return listed, len(listed) <= _max_keys()
+
+
+def reconcile_prefix(backend, prefix, listed, complete=True):
+    """
+    Bring the index for one prefix in line with a bucket listing.
+
+    Args:
+        backend: 'aws' or 'gcp'
+        prefix: Key prefix that was listed
+        listed: {key: (size, etag, content_type)} from the listing
+        complete: False if the listing was cut off; nothing is removed from the index then
+
+    Returns:
+        dict: Counts of added, updated, verified and removed entries
+    """
+    now = timezone.now()
+    indexed = {obj.key: obj for obj in StorageObject.objects.filter(backend=backend, key__startswith=prefix)}
+
+    added, changed, unchanged = [], [], []
+    for key, (size, etag, content_type) in listed.items():
+        obj = indexed.get(key)
+        if obj is None:
+            added.append(StorageObject(backend=backend, key=key, size=size, etag=etag or '',
+                                       content_type=content_type or '', verified_at=now))
+        elif obj.size != size or obj.etag != (etag or ''):
+            obj.size, obj.etag, obj.verified_at = size, etag or '', now
+            if content_type:
+                obj.content_type = content_type
+            changed.append(obj)
+        else:
+            unchanged.append(obj.id)
+
+    if complete:
+        removed = [obj.id for key, obj in indexed.items() if key not in listed]
+    else:
+        removed = []
+        logger.warning(f"Listing of {backend}:{prefix} stopped at {len(listed)} objects, "
+                       f"not removing unlisted index entries (raise STORAGE_RECONCILE_MAX_KEYS)")
+
+    if added:
+        StorageObject.objects.bulk_create(added, ignore_conflicts=True)
+    if changed:
+        StorageObject.objects.bulk_update(changed, ['size', 'etag', 'content_type', 'verified_at'])
+    if unchanged:
+        StorageObject.objects.filter(id__in=unchanged).update(verified_at=now)
+    if removed:
+        StorageObject.objects.filter(id__in=removed).delete()
+
+    return {'added': len(added), 'updated': len(changed), 'verified': len(unchanged), 'removed': len(removed)}
+
+
+def reconcile():
+    """
+    Reconcile the index with every configured bucket, one camera prefix at a time.
+
+    Returns:
+        dict: Totals per backend
+    """
+    from .storage_service import storage_service
+
+    listers = {}
+    if storage_service.aws_service:
+        listers['aws'] = _list_aws
+    if storage_service.gcp_service:
+        listers['gcp'] = lambda prefix: _list_gcp(storage_service.gcp_service, prefix)
+
+    camera_ids = Camera.objects.values_list('id', flat=True)
+    summary = {}
+
+    for backend, list_prefix in listers.items():
+        started = time.monotonic()
+        totals = {'added': 0, 'updated': 0, 'verified': 0, 'removed': 0, 'failed_prefixes': 0}
+
+        for camera_id in camera_ids:
+            prefix = f"{RECORDINGS_PREFIX}{camera_id}/"
+            try:
+                listed, complete = list_prefix(prefix)
+            except Exception as e:
+                # A failed listing must not look like an empty prefix
+                totals['failed_prefixes'] += 1
+                logger.warning(f"Could not list {backend}:{prefix}: {str(e)}")
+                continue
+
+            for name, count in reconcile_prefix(backend, prefix, listed, complete).items():
+                totals[name] += count
+
+        summary[backend] = totals
+        logger.info(f"🗂️ Storage index reconciled for {backend.upper()} in {time.monotonic() - started:.1f}s: "
+                    f"{totals['added']} added, {totals['updated']} updated, {totals['removed']} removed, "
+                    f"{totals['verified']} unchanged")
+
+    return summary
+
+
+def run_storage_reconciliation():
+    """Scheduled job entry point"""
+    try:
+        reconcile()
+    except Exception as e:
+        logger.error(f"Storage index reconciliation failed: {str(e)}")
@@ -4,7 +4,10 @@ This service provides a unified interface for local, AWS S3, and GCP storage.
 """
 
 import os
+import threading
+import time
 import logging
+from collections import OrderedDict
 from typing import Optional, BinaryIO, Union, Tuple
 from django.conf import settings
 from django.core.files.base import ContentFile
@@ -13,6 +16,8 @@ from django.core.files.uploadedfile import UploadedFile
 import tempfile
 import shutil
 
+from .resumable_upload import s3_multipart_upload, gcs_resumable_upload, uses_chunked_upload, upload_throttle
+
 logger = logging.getLogger(__name__)
 
 # Check AWS availability
@@ -114,13 +119,18 @@ class AWSS3StorageService:
             if content_type:
                 extra_args['ContentType'] = content_type
             
-            # Upload the file
-            self.client.upload_file(
-                file_path,
-                self.bucket_name,
-                destination_path,
-                ExtraArgs=extra_args
-            )
+            if uses_chunked_upload(file_path):
+                # Large recordings: parallel parts, resumable after a failure
+                s3_multipart_upload(self.client, self.bucket_name, destination_path, file_path,
+                                    content_type=content_type)
+            else:
+                upload_throttle.consume(os.path.getsize(file_path))
+                self.client.upload_file(
+                    file_path,
+                    self.bucket_name,
+                    destination_path,
+                    ExtraArgs=extra_args
+                )
             
             logger.info(f"Successfully uploaded {file_path} to s3://{self.bucket_name}/{destination_path}")
             return True
@@ -237,11 +247,8 @@ class AWSS3StorageService:
                 logger.debug(f"Skipping .tmp file URL generation: {file_path}")
                 return ""
             
-            # Check if file exists first
-            if not self.file_exists(file_path):
-                logger.warning(f"File does not exist in AWS S3: {file_path}")
-                return ""
-            
+            # No existence check: presigning is local, and whether the object
+            # exists is tracked on the Recording row (storage_type/upload_status)
             if signed:
                 # Generate presigned URL
                 expiration_seconds = expiration_minutes * 60
@@ -437,8 +444,13 @@ class GCPStorageService:
             if content_type:
                 blob.content_type = content_type
             
-            # Upload the file with timeout
-            blob.upload_from_filename(file_path, timeout=timeout)
+            if uses_chunked_upload(file_path):
+                # Large recordings: chunked resumable session, continues where a failed attempt stopped
+                gcs_resumable_upload(blob, file_path, content_type=content_type, timeout=timeout)
+            else:
+                # Upload the file with timeout
+                upload_throttle.consume(os.path.getsize(file_path))
+                blob.upload_from_filename(file_path, timeout=timeout)
             
             logger.info(f"Successfully uploaded {file_path} to gs://{self.bucket_name}/{destination_path}")
             return True
@@ -530,11 +542,8 @@ class GCPStorageService:
         try:
             blob = self.bucket.blob(file_path)
             
-            # Check if file exists first
-            if not blob.exists():
-                logger.error(f"File does not exist in GCP Storage: {file_path}")
-                return ""
-            
+            # No existence check: v4 signing is local, and whether the object
+            # exists is tracked on the Recording row (storage_type/upload_status)
             if signed:
                 # Generate signed URL with proper permissions
                 from datetime import timedelta
@@ -622,6 +631,61 @@ class GCPStorageService:
             return None
 
 
+class SignedUrlCache:
+    """
+    Reuses signed URLs until they get close to expiring.
+    
+    Keyed by (backend, path, expiry), so every caller asking for the same
+    object and lifetime gets the same URL (which also lets browsers cache the
+    video) instead of a freshly signed one.
+    """
+    
+    def __init__(self, max_entries=10000, min_remaining_fraction=0.25):
+        """
+        Args:
+            max_entries: URLs kept before the least recently used ones are dropped
+            min_remaining_fraction: Re-sign once less than this share of the lifetime is left
+        """
+        self.max_entries = max_entries
+        self.min_remaining_fraction = min_remaining_fraction
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Get a cached URL that is still comfortably valid, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                url, expires_at, lifetime = entry
+                if expires_at - time.time() > lifetime * self.min_remaining_fraction:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return url
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, url, lifetime_seconds):
+        """Remember a URL signed just now"""
+        with self._lock:
+            self._entries[key] = (url, time.time() + lifetime_seconds, lifetime_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, file_path):
+        """Forget all URLs for a path (e.g. after it was deleted)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == file_path]:
+                del self._entries[key]
+    
+    def stats(self):
+        """Hit/miss counters"""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
 class UnifiedStorageService:
     """
     Unified storage service that can work with local, AWS S3, or GCP storage
@@ -640,6 +704,7 @@ class UnifiedStorageService:
         # Initialize cloud service instances
         self.aws_service = AWSS3StorageService() if (self.use_aws or self.use_both) else None
         self.gcp_service = GCPStorageService() if (self.use_gcp or self.use_both) else None
+        self.url_cache = SignedUrlCache(max_entries=getattr(settings, 'SIGNED_URL_CACHE_SIZE', 10000))
         
         # Log initialization status
         storage_type = 'Local'
@@ -696,6 +761,7 @@ class UnifiedStorageService:
                 # Verify upload by checking if file exists in AWS
                 if self.aws_service.file_exists(storage_path):
                     logger.info(f"✅ Upload verified: {storage_path}")
+                    self._index_upload('aws', storage_path, file_size, filename)
                     
                     # Clean up local file after successful upload if enabled
                     if getattr(settings, 'AWS_STORAGE_CLEANUP_LOCAL', True):
@@ -716,6 +782,7 @@ class UnifiedStorageService:
                         )
                         if gcp_success:
                             logger.info(f"✅ Backup copy uploaded to GCP: {storage_path}")
+                            self._index_upload('gcp', storage_path, file_size, filename)
                     
                     return storage_path, 'aws'
                 else:
@@ -738,6 +805,7 @@ class UnifiedStorageService:
                 # Verify upload by checking if file exists in GCP
                 if self.gcp_service.file_exists(storage_path):
                     logger.info(f"✅ Upload verified: {storage_path}")
+                    self._index_upload('gcp', storage_path, file_size, filename)
                     
                     # Clean up local file after successful upload if enabled
                     if getattr(settings, 'GCP_STORAGE_CLEANUP_LOCAL', True):
@@ -757,49 +825,99 @@ class UnifiedStorageService:
         logger.info("Falling back to local storage...")
         return os.path.relpath(local_file_path, settings.MEDIA_ROOT), 'local'
     
-    def get_file_url(self, file_path: str, signed: bool = True, expiration_minutes: int = 120) -> str:
+    def _index_upload(self, backend: str, storage_path: str, file_size: int, filename: str):
+        """Record a verified upload in the storage index"""
+        from .storage_index import record_object
+        record_object(backend, storage_path, size=file_size or None, content_type=self._get_content_type(filename))
+    
+    def get_file_url(self, file_path: str, signed: bool = True, expiration_minutes: int = 120,
+                     storage_type: str = None) -> str:
         """
         Get URL for accessing a file
         
+        Signed URLs are cached and reused until close to expiry; no request is
+        made to the cloud provider to build them.
+        
         Args:
             file_path: Storage path to the file
             signed: Whether to generate a signed URL (for cloud storage, default: True)
             expiration_minutes: Expiration time for signed URLs (default: 120 minutes)
+            storage_type: Where the file is ('local', 'aws' or 'gcp', as stored on the
+                Recording); defaults to the configured primary backend
             
         Returns:
             str: URL to access the file, or empty string if failed
         """
         if not file_path:
             return ""
-            
-        try:
-            # Try AWS S3 first if enabled
-            if self.use_aws and self.aws_service:
-                url = self.aws_service.get_file_url(file_path, signed=signed, expiration_minutes=expiration_minutes)
-                if url:
-                    return url
-                # If AWS fails and we're using both, try GCP
-                if self.use_both and self.gcp_service:
-                    logger.info(f"AWS URL failed, trying GCP for {file_path}")
-                    url = self.gcp_service.get_file_url(file_path, signed=signed, expiration_minutes=expiration_minutes)
-                    return url if url is not None else ""
-                return ""
-            
-            # Try GCP if it's the primary backend or if AWS is not available
-            if self.use_gcp and self.gcp_service:
-                url = self.gcp_service.get_file_url(file_path, signed=signed, expiration_minutes=expiration_minutes)
-                return url if url is not None else ""
-            
+        
+        if storage_type is None:
+            storage_type = 'aws' if self.use_aws or self.use_both else 'gcp' if self.use_gcp else 'local'
+        
+        if storage_type == 'aws' and self.aws_service:
+            service = self.aws_service
+        elif storage_type == 'gcp' and self.gcp_service:
+            service = self.gcp_service
+        else:
             # Local storage URL
             return f"{settings.MEDIA_URL}{file_path}"
+        
+        cache_key = (storage_type, file_path, expiration_minutes if signed else None)
+        url = self.url_cache.get(cache_key)
+        if url:
+            return url
+        
+        try:
+            url = service.get_file_url(file_path, signed=signed, expiration_minutes=expiration_minutes) or ""
         except Exception as e:
             logger.error(f"Error getting file URL for {file_path}: {str(e)}")
             return ""
+        
+        if url:
+            # Public URLs never expire; keep them as long as a signed one
+            self.url_cache.put(cache_key, url, expiration_minutes * 60)
+        return url
+    
+    def _cloud_backends(self):
+        """Configured cloud services as [(backend, service)], primary first"""
+        backends = []
+        if self.aws_service:
+            backends.append(('aws', self.aws_service))
+        if self.gcp_service:
+            backends.append(('gcp', self.gcp_service))
+        return backends
+    
+    def _lookup_object(self, file_path: str):
+        """
+        Find a file in the storage index, falling back to one live lookup per backend
+        
+        Objects written before the index existed (or by another client) are not
+        indexed until the next reconciliation; a live hit is recorded so the
+        provider is only asked once.
+        
+        Returns:
+            tuple: (backend, size) or None if the file is not in cloud storage
+        """
+        from .storage_index import lookup, record_object
+        
+        backends = self._cloud_backends()
+        indexed = lookup(file_path, [backend for backend, _ in backends])
+        if indexed is not None:
+            return indexed.backend, indexed.size
+        
+        for backend, service in backends:
+            size = service.get_file_size(file_path)
+            if size is not None:
+                record_object(backend, file_path, size=size, content_type=self._get_content_type(file_path))
+                return backend, size
+        return None
     
     def file_exists(self, file_path: str) -> bool:
         """
         Check if a file exists in storage
         
+        Cloud files are looked up in the storage index (see storage_index.py).
+        
         Args:
             file_path: Storage path to the file
             
@@ -808,44 +926,15 @@ class UnifiedStorageService:
         """
         if not file_path:
             return False
-            
-        # Try AWS S3 first if enabled
-        if self.use_aws and self.aws_service:
-            try:
-                exists = self.aws_service.file_exists(file_path)
-                if exists:
-                    logger.debug(f"File exists in AWS S3: {file_path}")
-                    return True
-                # If using both, also check GCP
-                if self.use_both and self.gcp_service:
-                    exists = self.gcp_service.file_exists(file_path)
-                    if exists:
-                        logger.debug(f"File exists in GCP: {file_path}")
-                        return True
-                logger.debug(f"File not found in AWS S3: {file_path}")
-                return False
-            except Exception as e:
-                logger.error(f"Error checking file existence in AWS S3: {str(e)}")
-                # Try GCP if AWS check fails and we're using both
-                if self.use_both and self.gcp_service:
-                    try:
-                        return self.gcp_service.file_exists(file_path)
-                    except:
-                        pass
-                return False
         
-        # Try GCP if it's the primary backend
-        if self.use_gcp and self.gcp_service:
+        if self._cloud_backends():
             try:
-                exists = self.gcp_service.file_exists(file_path)
-                if exists:
-                    logger.debug(f"File exists in GCP: {file_path}")
-                else:
-                    logger.debug(f"File not found in GCP: {file_path}")
-                return exists
+                found = self._lookup_object(file_path)
             except Exception as e:
-                logger.error(f"Error checking file existence in GCP: {str(e)}")
+                logger.error(f"Error checking file existence in cloud storage: {str(e)}")
                 return False
+            logger.debug(f"File {'exists in ' + found[0].upper() if found else 'not found in cloud storage'}: {file_path}")
+            return found is not None
         
         # Check local file
         full_path = os.path.join(settings.MEDIA_ROOT, file_path)
@@ -860,30 +949,32 @@ class UnifiedStorageService:
         """
         Delete a file from storage
         
+        Only the backends the storage index lists the file in are asked to
+        delete it; files that are not indexed are deleted everywhere.
+        
         Args:
             file_path: Storage path to the file
             
         Returns:
             bool: True if successful, False otherwise
         """
-        success = False
+        self.url_cache.invalidate(file_path)
         
-        # Delete from AWS S3 if enabled
-        if self.use_aws and self.aws_service:
-            aws_success = self.aws_service.delete_file(file_path)
-            success = success or aws_success
-            
-            # Also delete from GCP if using both
-            if self.use_both and self.gcp_service:
-                gcp_success = self.gcp_service.delete_file(file_path)
-                success = success or gcp_success
-            
+        backends = self._cloud_backends()
+        if backends:
+            from .storage_index import forget_object
+            from .models import StorageObject
+            
+            indexed = set(StorageObject.objects.filter(key=file_path).values_list('backend', flat=True))
+            targets = [(backend, service) for backend, service in backends if backend in indexed] or backends
+            
+            success = False
+            for backend, service in targets:
+                if service.delete_file(file_path):
+                    forget_object(backend, file_path)
+                    success = True
             return success
         
-        # Delete from GCP if it's the primary backend
-        if self.use_gcp and self.gcp_service:
-            return self.gcp_service.delete_file(file_path)
-        
         # Delete local file
         if file_path:
             full_path = os.path.join(settings.MEDIA_ROOT, file_path)
@@ -900,25 +991,21 @@ class UnifiedStorageService:
         """
         Get file size
         
+        Cloud file sizes come from the storage index.
+        
         Args:
             file_path: Storage path to the file
             
         Returns:
             int: File size in bytes, or None if failed
         """
-        # Try AWS S3 first if enabled
-        if self.use_aws and self.aws_service:
-            size = self.aws_service.get_file_size(file_path)
-            if size is not None:
-                return size
-            # Try GCP if AWS fails and using both
-            if self.use_both and self.gcp_service:
-                return self.gcp_service.get_file_size(file_path)
-            return None
-        
-        # Try GCP if it's the primary backend
-        if self.use_gcp and self.gcp_service:
-            return self.gcp_service.get_file_size(file_path)
+        if self._cloud_backends():
+            try:
+                found = self._lookup_object(file_path)
+            except Exception as e:
+                logger.error(f"Error getting file size from cloud storage: {str(e)}")
+                return None
+            return found[1] if found else None
         
         # Get local file size
         if file_path:
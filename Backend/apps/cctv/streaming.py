@@ -52,6 +52,7 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from .models import Camera, Recording, LiveStream
+from .frame_bus import frame_bus, CONSUMER_STREAM, CONSUMER_VIEWER, CONSUMER_RECORDER
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,33 +63,30 @@ def safe_save_camera(camera, update_fields=None):
     Safely save camera updates, handling cases where the camera may have been deleted
     or modified by another process.
     
+    Field updates are handed to the coalescing status writer, which applies them
+    in batches from a single thread; only the named fields are written, so
+    concurrent changes to other fields are never overwritten.
+    
     Args:
         camera: Camera model instance
         update_fields: List of fields to update (optional)
     
     Returns:
-        bool: True if save was successful, False otherwise
+        bool: True if the update was queued or saved, False otherwise
     """
+    if update_fields:
+        from .status_writer import camera_status_writer
+        camera_status_writer.enqueue_camera(camera, update_fields)
+        return True
+    
     try:
         # Check if camera still exists in database
-        camera_id = camera.id
-        if not Camera.objects.filter(id=camera_id).exists():
-            logger.warning(f"Camera {camera_id} no longer exists in database, skipping save")
+        if not Camera.objects.filter(id=camera.id).exists():
+            logger.warning(f"Camera {camera.id} no longer exists in database, skipping save")
             return False
         
-        # Refresh from database to ensure we have the latest version
-        camera.refresh_from_db()
-        
-        # Save with update_fields if provided, otherwise save all fields
-        if update_fields:
-            camera.save(update_fields=update_fields)
-        else:
-            camera.save()
-        
+        camera.save()
         return True
-    except Camera.DoesNotExist:
-        logger.warning(f"Camera {camera.id} no longer exists in database, skipping save")
-        return False
     except Exception as e:
         # Handle "Save with update_fields did not affect any rows" error
         error_msg = str(e)
@@ -101,11 +99,27 @@ def safe_save_camera(camera, update_fields=None):
             return False
 
 
+def next_segment_boundary(start_time, segment_minutes):
+    """
+    Get the first wall-clock aligned segment boundary after ``start_time``.
+    
+    Boundaries are multiples of ``segment_minutes`` counted from local midnight,
+    e.g. 10:00, 10:05, 10:10 for 5 minute segments.
+    """
+    local_start = timezone.localtime(start_time)
+    midnight = local_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    segment_seconds = segment_minutes * 60
+    elapsed = (local_start - midnight).total_seconds()
+    return midnight + timedelta(seconds=(int(elapsed // segment_seconds) + 1) * segment_seconds)
+
+
 class RTSPStreamManager:
-    """Manages RTSP streams for cameras"""
+    """Manages RTSP streams for cameras on top of the shared frame bus"""
     
-    def __init__(self):
+    def __init__(self, bus=None):
+        self.bus = bus or frame_bus
         self.active_streams = {}
+        self.camera_streams = {}    # camera_id (str) -> qualities with an active stream, for O(1) lookups
         self.recording_streams = {}
         self.stream_locks = {}
         self.health_check_interval = 30  # seconds
@@ -122,54 +136,26 @@ class RTSPStreamManager:
         if stream_key in self.active_streams:
             return self.active_streams[stream_key]
         
-        # Get the appropriate stream URL
-        stream_url = camera.get_stream_url(quality)
-        
         try:
-            # Import OpenCV configuration
-            from .opencv_config import (configure_video_capture, test_camera_connection_robust, 
-                                       check_opencv_compatibility, optimize_capture_for_streaming)
-            
-            # Check OpenCV compatibility on first use
-            check_opencv_compatibility()
+            # Attach to the shared capture worker (opens the camera only if
+            # nobody else - e.g. the recorder - is already decoding it)
+            worker = self.bus.subscribe(camera, quality, consumer=CONSUMER_STREAM)
             
-            # Test connection first with robust method
-            connection_ok, connection_msg = test_camera_connection_robust(stream_url)
-            if not connection_ok:
-                raise Exception(f"Cannot connect to camera stream: {connection_msg}")
+            # Another request may have registered the stream while we were connecting
+            if stream_key in self.active_streams:
+                self.bus.unsubscribe(camera.id, quality, consumer=CONSUMER_STREAM, worker=worker)
+                return self.active_streams[stream_key]
             
-            # Create video capture object with proper backend
-            cap = cv2.VideoCapture(stream_url, cv2.CAP_FFMPEG)
-            
-            # Configure with optimal settings for streaming
-            optimize_capture_for_streaming(cap, stream_url)
-            
-            # Test if the stream is accessible
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                cap.release()
-                raise Exception(f"Cannot read frames from camera stream: {stream_url}")
-            
-            # Store the stream
             self.active_streams[stream_key] = {
-                'capture': cap,
+                'worker': worker,
                 'camera': camera,
                 'quality': quality,
-                'last_frame': frame,
-                'last_update': timezone.now(),
                 'viewers': 0
             }
+            self.camera_streams.setdefault(str(camera.id), set()).add(quality)
             
             logger.info(f"Started stream {stream_key} for camera {camera.name}")
             
-            # Start the frame reading thread
-            thread = threading.Thread(
-                target=self._update_stream_frames,
-                args=(stream_key,),
-                daemon=True
-            )
-            thread.start()
-            
             # Update camera status
             camera.status = 'active'
             camera.is_online = True
@@ -182,82 +168,30 @@ class RTSPStreamManager:
         except Exception as e:
             logger.error(f"Error starting stream for camera {camera.name}: {str(e)}")
             camera.status = 'error'
-            safe_save_camera(camera)
+            safe_save_camera(camera, update_fields=['status'])
             raise
     
-    def _update_stream_frames(self, stream_key):
-        """Continuously update frames for a stream with improved error handling"""
-        stream_info = self.active_streams.get(stream_key)
-        if not stream_info:
-            return
-        
-        cap = stream_info['capture']
-        camera = stream_info['camera']
-        consecutive_failures = 0
-        max_failures = 10
-        frame_count = 0
-        
-        logger.info(f"Starting frame update thread for camera {camera.name}")
-        
-        while stream_key in self.active_streams:
-            try:
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    # Successfully got a frame
-                    stream_info['last_frame'] = frame
-                    stream_info['last_update'] = timezone.now()
-                    stream_info['frame_count'] = stream_info.get('frame_count', 0) + 1
-                    consecutive_failures = 0
-                    frame_count += 1
-                    
-                    # Update camera last seen every 30 seconds
-                    if frame_count % 750 == 0:  # ~30 seconds at 25fps
-                        camera.last_seen = timezone.now()
-                        safe_save_camera(camera, update_fields=['last_seen'])
-                        
-                    # Control frame rate to prevent overwhelming
-                    time.sleep(0.04)  # Target ~25 FPS
-                    
-                else:
-                    consecutive_failures += 1
-                    logger.warning(f"Failed to read frame from camera {camera.name} (failure {consecutive_failures}/{max_failures})")
-                    
-                    if consecutive_failures >= max_failures:
-                        logger.error(f"Too many consecutive failures for camera {camera.name}, stopping stream")
-                        camera.status = 'error'
-                        safe_save_camera(camera, update_fields=['status'])
-                        break
-                    
-                    time.sleep(0.5)  # Wait before retrying
-                    
-            except Exception as e:
-                consecutive_failures += 1
-                logger.error(f"Error reading frame from camera {camera.name}: {str(e)} (failure {consecutive_failures}/{max_failures})")
-                
-                if consecutive_failures >= max_failures:
-                    logger.error(f"Too many consecutive errors for camera {camera.name}, stopping stream")
-                    camera.status = 'error'
-                    camera.is_streaming = False
-                    safe_save_camera(camera, update_fields=['status', 'is_streaming'])
-                    break
-                    
-                time.sleep(1)  # Wait longer after errors
-        
-        # Clean up
-        try:
-            cap.release()
-        except Exception as cleanup_error:
-            logger.error(f"Error releasing capture for camera {camera.name}: {str(cleanup_error)}")
-            
-        logger.info(f"Stream thread ended for camera {camera.name} (processed {frame_count} frames)")
+    def get_worker(self, camera_id, quality='main'):
+        """Get the capture worker backing a stream"""
+        stream_info = self.active_streams.get(self.get_stream_key(camera_id, quality))
+        return stream_info['worker'] if stream_info else None
     
     def stop_stream(self, camera_id, quality='main'):
-        """Stop a video stream"""
+        """Stop a video stream (other bus subscribers such as the recorder keep running)"""
         stream_key = self.get_stream_key(camera_id, quality)
         
         if stream_key in self.active_streams:
             stream_info = self.active_streams.pop(stream_key)
-            stream_info['capture'].release()
+            qualities = self.camera_streams.get(str(camera_id))
+            if qualities is not None:
+                qualities.discard(quality)
+                if not qualities:
+                    self.camera_streams.pop(str(camera_id), None)
+            worker = stream_info['worker']
+            
+            for _ in range(max(stream_info['viewers'], 0)):
+                self.bus.unsubscribe(camera_id, quality, consumer=CONSUMER_VIEWER, worker=worker)
+            self.bus.unsubscribe(camera_id, quality, consumer=CONSUMER_STREAM, worker=worker)
             
             # Update camera streaming status
             try:
@@ -270,32 +204,36 @@ class RTSPStreamManager:
             
             logger.info(f"Stopped stream {stream_key}")
     
+    def is_camera_streaming(self, camera_id):
+        """Check whether a camera has an active stream in any quality"""
+        return bool(self.camera_streams.get(str(camera_id)))
+    
     def get_frame(self, camera_id, quality='main'):
         """Get the latest frame from a stream"""
-        stream_key = self.get_stream_key(camera_id, quality)
-        
-        if stream_key not in self.active_streams:
-            return None
-        
-        stream_info = self.active_streams[stream_key]
-        return stream_info['last_frame']
+        worker = self.get_worker(camera_id, quality) or self.bus.get_worker(camera_id, quality)
+        return worker.get_frame() if worker else None
     
     def add_viewer(self, camera_id, quality='main'):
         """Add a viewer to a stream"""
         stream_key = self.get_stream_key(camera_id, quality)
         
         if stream_key in self.active_streams:
-            self.active_streams[stream_key]['viewers'] += 1
+            stream_info = self.active_streams[stream_key]
+            if self.bus.retain(stream_info['worker'], consumer=CONSUMER_VIEWER):
+                stream_info['viewers'] += 1
     
     def remove_viewer(self, camera_id, quality='main'):
         """Remove a viewer from a stream"""
         stream_key = self.get_stream_key(camera_id, quality)
         
         if stream_key in self.active_streams:
-            self.active_streams[stream_key]['viewers'] -= 1
+            stream_info = self.active_streams[stream_key]
+            stream_info['viewers'] -= 1
+            self.bus.unsubscribe(camera_id, quality, consumer=CONSUMER_VIEWER, worker=stream_info['worker'])
             
             # Stop stream if no viewers
-            if self.active_streams[stream_key]['viewers'] <= 0:
+            if stream_info['viewers'] <= 0:
+                stream_info['viewers'] = 0
                 self.stop_stream(camera_id, quality)
     
     def recover_stream(self, camera_id, quality='main'):
@@ -311,19 +249,21 @@ class RTSPStreamManager:
             camera = Camera.objects.get(id=camera_id)
             logger.info(f"Attempting to recover stream for camera {camera.name}")
             
-            # Test connection first
-            from .opencv_config import test_camera_connection_robust
-            stream_url = camera.get_stream_url(quality)
-            
-            connection_ok, connection_msg = test_camera_connection_robust(stream_url, max_attempts=3)
-            if not connection_ok:
-                logger.error(f"Cannot recover stream - connection test failed: {connection_msg}")
-                camera.status = 'error'
-                safe_save_camera(camera, update_fields=['status'])
-                return None
-            
-            # Wait a moment before retrying
-            time.sleep(2)
+            # Test connection first (not needed if another consumer still has a live worker)
+            if self.bus.get_worker(camera_id, quality) is None:
+                from .connection_health import connection_health
+                stream_url = camera.get_stream_url(quality)
+                
+                # Force a fresh probe: the cached state is the failure we are recovering from
+                connection_ok, connection_msg = connection_health.check(stream_url, max_attempts=3, force=True)
+                if not connection_ok:
+                    logger.error(f"Cannot recover stream - connection test failed: {connection_msg}")
+                    camera.status = 'error'
+                    safe_save_camera(camera, update_fields=['status'])
+                    return None
+                
+                # Wait a moment before retrying
+                time.sleep(2)
             
             # Try to start the stream again
             stream_info = self.start_stream(camera, quality)
@@ -352,10 +292,19 @@ class RTSPStreamManager:
             return {'status': 'inactive', 'error': 'Stream not found'}
         
         stream_info = self.active_streams[stream_key]
-        camera = stream_info['camera']
+        worker = stream_info['worker']
+        
+        if not worker.running:
+            return {
+                'status': 'unhealthy',
+                'error': worker.error or 'Capture worker stopped',
+                'last_update': worker.last_update.isoformat() if worker.last_update else None,
+                'viewers': stream_info.get('viewers', 0),
+                'read_timeouts': worker.read_timeouts
+            }
         
         # Check if stream is healthy
-        last_update = stream_info.get('last_update')
+        last_update = worker.last_update
         if last_update:
             time_since_update = (timezone.now() - last_update).total_seconds()
             if time_since_update > 30:  # More than 30 seconds since last frame
@@ -363,47 +312,30 @@ class RTSPStreamManager:
                     'status': 'unhealthy',
                     'error': f'No frames for {time_since_update:.1f} seconds',
                     'last_update': last_update.isoformat(),
-                    'viewers': stream_info.get('viewers', 0)
+                    'viewers': stream_info.get('viewers', 0),
+                    'read_timeouts': worker.read_timeouts
                 }
         
         return {
             'status': 'healthy',
             'last_update': last_update.isoformat() if last_update else None,
             'viewers': stream_info.get('viewers', 0),
-            'frame_count': stream_info.get('frame_count', 0)
+            'frame_count': worker.frame_count,
+            'read_timeouts': worker.read_timeouts,
+            'pacing': worker.pacing_stats(),
+            'subscribers': dict(worker.subscribers)
         }
     
     def is_stream_active(self, camera_id, quality='main'):
         """Check if a stream is currently active and healthy"""
-        stream_key = self.get_stream_key(camera_id, quality)
-        
-        if stream_key not in self.active_streams:
+        worker = self.get_worker(camera_id, quality)
+        if worker is None or not worker.running:
             return False
         
-        stream_info = self.active_streams[stream_key]
-        
-        # Check if capture object is still valid
-        if 'capture' not in stream_info:
-            return False
-        
-        cap = stream_info['capture']
-        if cap is None:
-            return False
-        
-        # Check if we can still read from the stream
-        try:
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                return False
-            
-            # Update the last frame and frame count
-            stream_info['last_frame'] = frame
-            stream_info['last_update'] = timezone.now()
-            stream_info['frame_count'] = stream_info.get('frame_count', 0) + 1
-            
-            return True
-        except Exception:
+        # The capture worker publishes continuously; a stale frame means the source stalled
+        if worker.last_update is None:
             return False
+        return (timezone.now() - worker.last_update).total_seconds() <= 10
 
 
 class RTSPRecordingManager:
@@ -412,31 +344,39 @@ class RTSPRecordingManager:
     def __init__(self):
         self.active_recordings = {}
         self.recording_locks = {}
+        self.starting_recordings = set()    # Camera ids whose recording is being set up
+        self._start_lock = threading.Lock()
+    
+    def _reserve_camera(self, camera_id):
+        """
+        Claim a camera for a recording that is being started.
+        
+        Setting up a recording (Recording row, connection probe, capture) takes a
+        while and the scheduler starts recordings from several threads, so the
+        camera is claimed before any of it runs.
+        """
+        with self._start_lock:
+            if camera_id in self.active_recordings or camera_id in self.starting_recordings:
+                raise Exception("Recording already in progress for this camera")
+            self.starting_recordings.add(camera_id)
+    
+    def _release_camera(self, camera_id):
+        """Drop the claim once the recording is registered in active_recordings (or failed to start)"""
+        with self._start_lock:
+            self.starting_recordings.discard(camera_id)
     
     def start_recording(self, camera, duration_minutes=None, recording_name=None, user=None, is_scheduled=False, schedule_id=None):
         """Start recording from a camera"""
-        if str(camera.id) in self.active_recordings:
-            raise Exception("Recording already in progress for this camera")
-        
-        # Create recording directory if it doesn't exist
-        camera_name_safe = "".join(c for c in camera.name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        if not camera_name_safe:  # Fallback if camera name has no valid characters
-            camera_name_safe = f"Camera_{str(camera.id)[:8]}"
-            
-        recording_dir = os.path.join(settings.MEDIA_ROOT, 'recordings', str(camera.id))
-        os.makedirs(recording_dir, exist_ok=True)
-        logger.info(f"📁 Recording directory created/verified: {recording_dir}")
-        
-        # Generate filename with safe camera name (extension will be determined by codec)
+        self._reserve_camera(str(camera.id))
+        try:
+            return self._start_recording(camera, duration_minutes, recording_name, user, is_scheduled)
+        finally:
+            self._release_camera(str(camera.id))
+    
+    def _start_recording(self, camera, duration_minutes, recording_name, user, is_scheduled):
+        """Set up a recording for a camera claimed by start_recording"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        # Add SCHEDULED prefix to filename if recording is from a schedule
-        if is_scheduled:
-            filename_base = f"SCHEDULED_{camera_name_safe}_{timestamp}"
-        else:
-            filename_base = f"{camera_name_safe}_{timestamp}"
-        
-        # Base file path without extension (codec will determine extension)
-        file_path = os.path.join(recording_dir, filename_base)
+        file_path, filename_base = self._recording_file_base(camera, timestamp, is_scheduled)
         
         # Create recording record (file_path will be updated after codec selection)
         recording_name = recording_name or f"Recording {timestamp}"
@@ -450,153 +390,34 @@ class RTSPRecordingManager:
         )
         
         try:
+            # Stream-copy engine: remux the camera's packets without decoding
+            if getattr(camera, 'recording_engine', 'opencv') == 'remux':
+                from .remux import remux_available
+                if remux_available():
+                    return self._start_remux_recording(camera, recording, file_path, duration_minutes)
+                logger.warning(f"⚠️ ffmpeg not found, falling back to OpenCV recording for camera '{camera.name}'")
+            
             if not OPENCV_AVAILABLE:
                 raise Exception("OpenCV is not available. Cannot record video.")
             
-            # Import OpenCV configuration
-            from .opencv_config import configure_video_capture, test_camera_connection_robust, check_opencv_compatibility
-            
-            # Check OpenCV compatibility on first use
-            check_opencv_compatibility()
+            worker, quality = self._subscribe_recorder(camera)
             
-            # Determine which RTSP URL to use for recording
-            # Try main stream first, fallback to sub stream if main fails
-            rtsp_url = camera.rtsp_url
-            logger.info(f"📹 Starting recording for camera '{camera.name}' using RTSP URL: {rtsp_url}")
-            
-            # Test connection first with main stream
-            connection_ok, connection_msg = test_camera_connection_robust(rtsp_url)
-            
-            # If main stream fails and sub stream is available, try sub stream
-            if not connection_ok and camera.rtsp_url_sub:
-                logger.warning(f"⚠️ Main stream connection failed for camera '{camera.name}'. Trying sub stream...")
-                rtsp_url = camera.rtsp_url_sub
-                connection_ok, connection_msg = test_camera_connection_robust(rtsp_url)
-                if connection_ok:
-                    logger.info(f"✅ Sub stream connection successful for camera '{camera.name}'")
-            
-            if not connection_ok:
-                error_msg = f"Cannot connect to camera '{camera.name}' for recording: {connection_msg}. Tried URL: {rtsp_url}"
-                logger.error(f"❌ {error_msg}")
-                raise Exception(error_msg)
+            test_frame = worker.get_frame()
+            if test_frame is None:
+                frame_bus.unsubscribe(camera.id, quality, consumer=CONSUMER_RECORDER, worker=worker)
+                raise Exception(f"Cannot read frames from camera '{camera.name}' stream: {worker.stream_url}")
             
-            # Setup video capture with optimized options
-            logger.info(f"📹 Connecting to camera '{camera.name}' at: {rtsp_url}")
-            cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
-            configure_video_capture(cap, rtsp_url)
-            
-            # Additional optimizations for video recording
-            try:
-                # Try to set capture to prefer MP4V format (most reliable)
-                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'mp4v'))
-                logger.debug("Set capture FOURCC to mp4v")
-            except Exception as fourcc_error:
-                logger.debug(f"Could not set capture FOURCC: {str(fourcc_error)}")
-                
-            # Set additional properties for better video compatibility
-            try:
-                # Set pixel format if available (helps with video encoding)
-                if hasattr(cv2, 'CAP_PROP_FORMAT'):
-                    cap.set(cv2.CAP_PROP_FORMAT, cv2.CAP_MODE_BGR)
-            except Exception as format_error:
-                logger.debug(f"Could not set pixel format: {str(format_error)}")
-            
-            # Test if we can read a frame first
-            ret, test_frame = cap.read()
-            if not ret or test_frame is None:
-                cap.release()
-                raise Exception(f"Cannot read frames from camera '{camera.name}' stream: {rtsp_url}")
-            
-            # Get video properties
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            if fps <= 0 or fps > 60:
-                fps = 25  # Default to 25 FPS if invalid
-                
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            # If properties are invalid, use test frame dimensions
-            if width <= 0 or height <= 0:
-                height, width = test_frame.shape[:2]
+            # Get video properties from the shared capture
+            fps = worker.fps
+            height, width = test_frame.shape[:2]
             
             logger.info(f"Recording properties: {width}x{height} @ {fps}fps")
             
-            # Use cached working codecs or test them once
-            from .opencv_config import get_cached_working_codecs, clear_codec_cache
-            
-            # Clear codec cache periodically to ensure we use updated priorities
-            # This ensures H.264 gets priority for browser compatibility
-            working_codecs = get_cached_working_codecs(width, height, fps)
-            
-            if not working_codecs:
-                logger.warning("No working codecs found, using emergency fallback")
-                # Emergency fallback - try basic codecs without testing
-                working_codecs = [
-                    ('MJPG', '.avi', 'Motion JPEG AVI - Emergency fallback'),
-                    ('mp4v', '.mp4', 'MPEG-4 MP4 - Emergency fallback'),
-                    ('XVID', '.avi', 'Xvid AVI - Emergency fallback')
-                ]
-            
-            out = None
-            used_codec = None
-            used_extension = None
-            
-            # Use the first working codec directly (since they were already tested)
-            codec, extension, description = working_codecs[0]
-            logger.info(f"🎬 Using codec: {codec} ({description}) - {extension} format")
-            
-            fourcc = cv2.VideoWriter_fourcc(*codec)
-            final_file_path = file_path + extension
-            
-            # Create VideoWriter with optimizations for MP4 codecs
-            if codec in ['mp4v', 'MJPG', 'XVID']:
-                logger.info(f"🎯 Applying MP4 optimizations for browser compatibility")
-                # Use isColor=True to ensure proper color encoding
-                out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height), True)
-            else:
-                out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height))
-            
-            if out.isOpened():
-                used_codec = codec
-                used_extension = extension
-                file_path = final_file_path  # Update file path
-                logger.info(f"✅ Successfully initialized recording with {codec}")
-            else:
-                logger.warning(f"Failed to open writer with first codec {codec}, trying fallback...")
-                out.release()
-                out = None
-                
-                # If first codec fails, try the rest as fallback
-                for codec, extension, description in working_codecs[1:]:
-                    try:
-                        logger.info(f"🎬 Trying fallback codec: {codec} ({description})")
-                        fourcc = cv2.VideoWriter_fourcc(*codec)
-                        final_file_path = file_path.rsplit('.', 1)[0] + extension
-                        
-                        # Apply MP4 optimizations for fallback codecs too
-                        if codec in ['mp4v', 'MJPG', 'XVID']:
-                            logger.info(f"🎯 Applying MP4 optimizations for fallback codec")
-                            out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height), True)
-                        else:
-                            out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height))
-                        
-                        if out.isOpened():
-                            used_codec = codec
-                            used_extension = extension
-                            file_path = final_file_path
-                            logger.info(f"✅ Fallback codec {codec} successful")
-                            break
-                        else:
-                            out.release()
-                            out = None
-                            
-                    except Exception as e:
-                        logger.warning(f"❌ Fallback codec {codec} failed: {str(e)}")
-                        continue
-            
-            if out is None:
-                cap.release()
-                raise Exception("Could not initialize video writer with any codec")
+            try:
+                out, used_codec, used_extension, file_path = self._open_video_writer(file_path, width, height, fps)
+            except Exception:
+                frame_bus.unsubscribe(camera.id, quality, consumer=CONSUMER_RECORDER, worker=worker)
+                raise
             
             # Update recording instance with initial file path and codec info
             try:
@@ -619,7 +440,8 @@ class RTSPRecordingManager:
             # Store recording info
             self.active_recordings[str(camera.id)] = {
                 'recording': recording,
-                'capture': cap,
+                'worker': worker,
+                'quality': quality,
                 'writer': out,
                 'start_time': timezone.now(),
                 'duration_minutes': duration_minutes,
@@ -646,13 +468,574 @@ class RTSPRecordingManager:
             logger.error(f"Error starting recording for camera {camera.name}: {str(e)}")
             raise
     
+    def _recording_file_base(self, camera, timestamp, is_scheduled=False):
+        """
+        Build the local output path (without extension) for a new recording file.
+        
+        Returns:
+            tuple: (absolute base path, filename base)
+        """
+        # Create recording directory if it doesn't exist
+        camera_name_safe = "".join(c for c in camera.name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        if not camera_name_safe:  # Fallback if camera name has no valid characters
+            camera_name_safe = f"Camera_{str(camera.id)[:8]}"
+            
+        recording_dir = os.path.join(settings.MEDIA_ROOT, 'recordings', str(camera.id))
+        os.makedirs(recording_dir, exist_ok=True)
+        logger.info(f"📁 Recording directory created/verified: {recording_dir}")
+        
+        # Add SCHEDULED prefix to filename if recording is from a schedule
+        if is_scheduled:
+            filename_base = f"SCHEDULED_{camera_name_safe}_{timestamp}"
+        else:
+            filename_base = f"{camera_name_safe}_{timestamp}"
+        
+        # Base file path without extension (codec will determine extension)
+        return os.path.join(recording_dir, filename_base), filename_base
+    
+    def _subscribe_recorder(self, camera):
+        """
+        Attach the recorder to the shared capture worker for this camera.
+        
+        If the camera is already being streamed this reuses the open RTSP session
+        instead of opening (and decoding) a second one.
+        
+        Returns:
+            tuple: (worker, quality)
+        """
+        # Try main stream first, fallback to sub stream if main fails
+        quality = 'main'
+        logger.info(f"📹 Starting recording for camera '{camera.name}' using RTSP URL: {camera.rtsp_url}")
+        
+        try:
+            worker = frame_bus.subscribe(camera, quality, consumer=CONSUMER_RECORDER)
+        except Exception as main_error:
+            if not camera.rtsp_url_sub:
+                error_msg = f"Cannot connect to camera '{camera.name}' for recording: {str(main_error)}. Tried URL: {camera.rtsp_url}"
+                logger.error(f"❌ {error_msg}")
+                raise Exception(error_msg)
+            
+            logger.warning(f"⚠️ Main stream connection failed for camera '{camera.name}'. Trying sub stream...")
+            quality = 'sub'
+            try:
+                worker = frame_bus.subscribe(camera, quality, consumer=CONSUMER_RECORDER)
+                logger.info(f"✅ Sub stream connection successful for camera '{camera.name}'")
+            except Exception as sub_error:
+                error_msg = f"Cannot connect to camera '{camera.name}' for recording: {str(sub_error)}. Tried URL: {camera.rtsp_url_sub}"
+                logger.error(f"❌ {error_msg}")
+                raise Exception(error_msg)
+        
+        return worker, quality
+    
+    def _open_video_writer(self, base_path, width, height, fps):
+        """
+        Create a VideoWriter using the first working codec.
+        
+        Args:
+            base_path: Output path without extension (the codec decides the extension)
+        
+        Returns:
+            tuple: (writer, codec, extension, file_path)
+        """
+        # Use cached working codecs or test them once
+        from .opencv_config import get_cached_working_codecs, clear_codec_cache
+        
+        # Clear codec cache periodically to ensure we use updated priorities
+        # This ensures H.264 gets priority for browser compatibility
+        working_codecs = get_cached_working_codecs(width, height, fps)
+        
+        if not working_codecs:
+            logger.warning("No working codecs found, using emergency fallback")
+            # Emergency fallback - try basic codecs without testing
+            working_codecs = [
+                ('MJPG', '.avi', 'Motion JPEG AVI - Emergency fallback'),
+                ('mp4v', '.mp4', 'MPEG-4 MP4 - Emergency fallback'),
+                ('XVID', '.avi', 'Xvid AVI - Emergency fallback')
+            ]
+        
+        out = None
+        used_codec = None
+        used_extension = None
+        
+        # Use the first working codec directly (since they were already tested)
+        codec, extension, description = working_codecs[0]
+        logger.info(f"🎬 Using codec: {codec} ({description}) - {extension} format")
+        
+        fourcc = cv2.VideoWriter_fourcc(*codec)
+        file_path = None
+        final_file_path = base_path + extension
+        
+        # Create VideoWriter with optimizations for MP4 codecs
+        if codec in ['mp4v', 'MJPG', 'XVID']:
+            logger.info(f"🎯 Applying MP4 optimizations for browser compatibility")
+            # Use isColor=True to ensure proper color encoding
+            out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height), True)
+        else:
+            out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height))
+        
+        if out.isOpened():
+            used_codec = codec
+            used_extension = extension
+            file_path = final_file_path  # Update file path
+            logger.info(f"✅ Successfully initialized recording with {codec}")
+        else:
+            logger.warning(f"Failed to open writer with first codec {codec}, trying fallback...")
+            out.release()
+            out = None
+            
+            # If first codec fails, try the rest as fallback
+            for codec, extension, description in working_codecs[1:]:
+                try:
+                    logger.info(f"🎬 Trying fallback codec: {codec} ({description})")
+                    fourcc = cv2.VideoWriter_fourcc(*codec)
+                    final_file_path = base_path + extension
+                    
+                    # Apply MP4 optimizations for fallback codecs too
+                    if codec in ['mp4v', 'MJPG', 'XVID']:
+                        logger.info(f"🎯 Applying MP4 optimizations for fallback codec")
+                        out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height), True)
+                    else:
+                        out = cv2.VideoWriter(final_file_path, fourcc, fps, (width, height))
+                    
+                    if out.isOpened():
+                        used_codec = codec
+                        used_extension = extension
+                        file_path = final_file_path
+                        logger.info(f"✅ Fallback codec {codec} successful")
+                        break
+                    else:
+                        out.release()
+                        out = None
+                        
+                except Exception as e:
+                    logger.warning(f"❌ Fallback codec {codec} failed: {str(e)}")
+                    continue
+        
+        if out is None:
+            raise Exception("Could not initialize video writer with any codec")
+        
+        return out, used_codec, used_extension, file_path
+    
+    def _start_remux_recording(self, camera, recording, file_path, duration_minutes):
+        """Start a stream-copy recording (ffmpeg -c copy) for a camera"""
+        from .remux import FFmpegRemuxer, probe_stream, REMUX_CONTAINERS
+        from .opencv_config import test_camera_connection_robust
+        
+        # Pick main stream, fallback to sub stream if main cannot be probed
+        rtsp_url = camera.rtsp_url
+        stream_props = probe_stream(rtsp_url)
+        if not stream_props['codec'] and camera.rtsp_url_sub:
+            logger.warning(f"⚠️ Could not probe main stream for camera '{camera.name}'. Trying sub stream...")
+            rtsp_url = camera.rtsp_url_sub
+            stream_props = probe_stream(rtsp_url)
+        
+        if not stream_props['codec']:
+            # ffprobe missing or silent; fall back to the regular connection test
+            connection_ok, connection_msg = test_camera_connection_robust(rtsp_url)
+            if not connection_ok:
+                raise Exception(f"Cannot connect to camera '{camera.name}' for recording: {connection_msg}. Tried URL: {rtsp_url}")
+        
+        # H.264/H.265 go into MP4; anything else is safer in Matroska
+        container = 'mp4' if stream_props['codec'] in (None, 'h264', 'hevc') else 'matroska'
+        file_path = file_path + REMUX_CONTAINERS[container]
+        fps = stream_props['fps'] or 25
+        
+        remuxer = FFmpegRemuxer(
+            rtsp_url,
+            file_path,
+            duration_seconds=duration_minutes * 60 if duration_minutes else None,
+            container=container,
+            codec=stream_props['codec'],
+        )
+        remuxer.start()
+        
+        try:
+            recording.file_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
+            recording.storage_type = 'local'
+            recording.codec = (stream_props['codec'] or 'copy')[:10]
+            if stream_props['width'] and stream_props['height']:
+                recording.resolution = f"{stream_props['width']}x{stream_props['height']}"
+            recording.frame_rate = fps
+            recording.save(update_fields=['file_path', 'storage_type', 'codec', 'resolution', 'frame_rate'])
+            
+            logger.info(f"🎬 Stream-copy recording details: {recording.resolution} @ {fps}fps, codec {recording.codec}, container {container}")
+        except Exception as db_error:
+            logger.error(f"Error updating recording database record: {str(db_error)}")
+        
+        self.active_recordings[str(camera.id)] = {
+            'recording': recording,
+            'engine': 'remux',
+            'remuxer': remuxer,
+            'start_time': timezone.now(),
+            'duration_minutes': duration_minutes,
+            'file_path': file_path,
+            'frame_count': 0,
+            'fps': fps,
+            'codec': recording.codec
+        }
+        
+        thread = threading.Thread(
+            target=self._record_remux,
+            args=(str(camera.id),),
+            daemon=True
+        )
+        thread.start()
+        
+        logger.info(f"Started stream-copy recording for camera {camera.name}")
+        return recording
+    
+    def _record_remux(self, camera_id):
+        """Supervise an ffmpeg stream-copy recording in a separate thread"""
+        recording_info = self.active_recordings.get(camera_id)
+        if not recording_info:
+            return
+        
+        remuxer = recording_info['remuxer']
+        recording = recording_info['recording']
+        start_time = recording_info['start_time']
+        fps = recording_info['fps']
+        
+        try:
+            # ffmpeg stops itself at the duration limit (-t); we only poll for
+            # external stop requests and keep the frame estimate up to date
+            while camera_id in self.active_recordings and remuxer.is_running():
+                if recording_info.get('stop_requested'):
+                    break
+                elapsed = (timezone.now() - start_time).total_seconds()
+                recording_info['frame_count'] = int(elapsed * fps)
+                remuxer.wait(timeout=1)
+        except Exception as e:
+            logger.error(f"Critical error during recording {recording.id}: {str(e)}")
+        finally:
+            returncode = remuxer.stop()
+            if returncode not in (0, None, 255) and remuxer.error_output:
+                # 255 is ffmpeg's exit code after a 'q' quit request
+                logger.warning(f"ffmpeg exited with {returncode} for recording {recording.id}: {remuxer.error_output}")
+            
+            elapsed = (timezone.now() - start_time).total_seconds()
+            frames_written = int(elapsed * fps)
+            recording_info['frame_count'] = frames_written
+            self._finalize_recording(camera_id, recording_info, frames_written)
+    
+    def start_segmented_recording(self, camera, segment_minutes=None, recording_name=None, user=None, schedule=None):
+        """
+        Start continuous recording that rolls to a new file at wall-clock aligned boundaries.
+        
+        One capture is held open for the whole session, so there is no reconnect (and no
+        lost footage) between files. Every segment gets its own Recording row and is handed
+        to upload as soon as it is closed.
+        
+        Args:
+            camera: Camera instance
+            segment_minutes: Segment length (default: settings.RECORDING_SEGMENT_MINUTES)
+            recording_name: Name prefix for the segment recordings
+            user: User the recordings are attributed to
+            schedule: RecordingSchedule the segments belong to (optional)
+        
+        Returns:
+            Recording: The row for the first (in-progress) segment
+        """
+        camera_id = str(camera.id)
+        self._reserve_camera(camera_id)
+        try:
+            return self._start_segmented_recording(camera, segment_minutes, recording_name, user, schedule)
+        finally:
+            self._release_camera(camera_id)
+    
+    def _start_segmented_recording(self, camera, segment_minutes, recording_name, user, schedule):
+        """Set up a segmented recording for a camera claimed by start_segmented_recording"""
+        camera_id = str(camera.id)
+        recording_info = {
+            'segmented': True,
+            'segment_minutes': segment_minutes or getattr(settings, 'RECORDING_SEGMENT_MINUTES', 5),
+            'name_prefix': recording_name or f"Continuous - {camera.name}",
+            'user': user or camera.created_by,
+            'schedule': schedule,
+            'schedule_id': schedule.id if schedule else None,
+            'start_time': timezone.now(),
+            'duration_minutes': None,
+            'frame_count': 0,
+            'segments_completed': 0,
+            'stop_requested': False,
+        }
+        
+        recording = self._create_segment_recording(camera, recording_info)
+        
+        try:
+            use_remux = False
+            if getattr(camera, 'recording_engine', 'opencv') == 'remux':
+                from .remux import remux_available
+                use_remux = remux_available()
+                if not use_remux:
+                    logger.warning(f"⚠️ ffmpeg not found, falling back to OpenCV recording for camera '{camera.name}'")
+            
+            if use_remux:
+                recording_info['engine'] = 'remux'
+                target = self._record_remux_segments
+            else:
+                if not OPENCV_AVAILABLE:
+                    raise Exception("OpenCV is not available. Cannot record video.")
+                worker, quality = self._subscribe_recorder(camera)
+                recording_info.update({'engine': 'opencv', 'worker': worker, 'quality': quality})
+                target = self._record_segments
+            
+            self.active_recordings[camera_id] = recording_info
+            
+            thread = threading.Thread(target=target, args=(camera_id,), daemon=True)
+            thread.start()
+            
+            logger.info(f"Started segmented recording for camera {camera.name} "
+                        f"({recording_info['segment_minutes']} minute segments, {recording_info['engine']} engine)")
+            return recording
+            
+        except Exception as e:
+            recording.status = 'failed'
+            recording.error_message = str(e)
+            recording.save()
+            logger.error(f"Error starting segmented recording for camera {camera.name}: {str(e)}")
+            raise
+    
+    def _create_segment_recording(self, camera, recording_info):
+        """Create the Recording row for the next segment of a segmented recording"""
+        start_time = timezone.now()
+        local_start = timezone.localtime(start_time)
+        base_path, filename_base = self._recording_file_base(
+            camera, local_start.strftime('%Y%m%d_%H%M%S'), is_scheduled=recording_info['schedule'] is not None
+        )
+        
+        recording = Recording.objects.create(
+            camera=camera,
+            schedule=recording_info['schedule'],
+            name=f"{recording_info['name_prefix']} - {local_start.strftime('%Y-%m-%d %H:%M:%S')}",
+            file_path=os.path.join('recordings', str(camera.id), f"{filename_base}.tmp"),  # Temporary path
+            start_time=start_time,
+            status='recording',
+            created_by=recording_info['user']
+        )
+        
+        recording_info['recording'] = recording
+        recording_info['base_path'] = base_path
+        recording_info['file_path'] = None
+        return recording
+    
+    def _record_segments(self, camera_id):
+        """Write frames from the shared capture worker into rolling segment files"""
+        recording_info = self.active_recordings.get(camera_id)
+        if not recording_info:
+            return
+        
+        from .opencv_config import STREAM_SETTINGS
+        
+        camera = recording_info['recording'].camera
+        worker = recording_info['worker']
+        pacer = worker.add_pacer(CONSUMER_RECORDER, worker.fps)
+        out = None
+        boundary = None
+        frames_written = 0
+        consecutive_failures = 0
+        max_failures = 30
+        last_sequence = worker.sequence - 1
+        
+        try:
+            while camera_id in self.active_recordings and not recording_info['stop_requested']:
+                recording = recording_info['recording']
+                
+                # Lost the camera: close what we have and reattach (reconnecting if needed)
+                if worker is None or not worker.running or consecutive_failures >= max_failures:
+                    if out is not None:
+                        out.release()
+                        out = None
+                        self._close_recording(recording, recording_info['file_path'], frames_written)
+                        recording = self._create_segment_recording(camera, recording_info)
+                    
+                    if worker is not None:
+                        worker.remove_pacer(pacer)
+                        frame_bus.unsubscribe(camera.id, recording_info['quality'],
+                                              consumer=CONSUMER_RECORDER, worker=worker)
+                        worker = recording_info['worker'] = None
+                    
+                    try:
+                        worker, quality = self._subscribe_recorder(camera)
+                        recording_info.update({'worker': worker, 'quality': quality})
+                        pacer = worker.add_pacer(CONSUMER_RECORDER, worker.fps)
+                        last_sequence = worker.sequence - 1
+                        consecutive_failures = 0
+                    except Exception as e:
+                        logger.warning(f"Segmented recording for camera {camera.name} waiting for camera: {str(e)}")
+                        time.sleep(STREAM_SETTINGS['reconnect_delay'])
+                        continue
+                
+                # Open the writer for a new segment
+                if out is None:
+                    frame = worker.get_frame()
+                    if frame is None:
+                        consecutive_failures += 1
+                        time.sleep(0.1)
+                        continue
+                    
+                    height, width = frame.shape[:2]
+                    out, codec, extension, file_path = self._open_video_writer(
+                        recording_info['base_path'], width, height, worker.fps
+                    )
+                    recording_info['file_path'] = file_path
+                    recording.file_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
+                    recording.storage_type = 'local'
+                    recording.codec = codec
+                    recording.resolution = f"{width}x{height}"
+                    recording.frame_rate = worker.fps
+                    recording.save(update_fields=['file_path', 'storage_type', 'codec', 'resolution', 'frame_rate'])
+                    
+                    boundary = next_segment_boundary(recording.start_time, recording_info['segment_minutes'])
+                    frames_written = 0
+                
+                last_sequence, frame = worker.wait_for_frame(last_sequence, timeout=2.0)
+                if frame is not None and not pacer.offer():
+                    continue
+                if frame is not None and frame.size > 0:
+                    out.write(frame)
+                    frames_written += 1
+                    recording_info['frame_count'] += 1
+                    consecutive_failures = 0
+                else:
+                    consecutive_failures += 1
+                
+                # Roll over to the next segment at the boundary
+                if timezone.now() >= boundary:
+                    out.release()
+                    out = None
+                    self._close_recording(recording, recording_info['file_path'], frames_written)
+                    recording_info['segments_completed'] += 1
+                    self._create_segment_recording(camera, recording_info)
+                    
+        except Exception as e:
+            logger.error(f"Critical error during segmented recording for camera {camera.name}: {str(e)}")
+        finally:
+            recording = recording_info['recording']
+            try:
+                if out is not None:
+                    out.release()
+            except Exception as e:
+                logger.error(f"Error releasing writer for recording {recording.id}: {str(e)}")
+            
+            if recording_info['file_path']:
+                self._close_recording(recording, recording_info['file_path'], frames_written)
+            else:
+                # The last segment never got a file (stopped right at a boundary)
+                recording.delete()
+            
+            if recording_info.get('worker') is not None:
+                recording_info['worker'].remove_pacer(pacer)
+                frame_bus.unsubscribe(camera.id, recording_info['quality'],
+                                      consumer=CONSUMER_RECORDER, worker=recording_info['worker'])
+            
+            self.active_recordings.pop(camera_id, None)
+            logger.info(f"🏁 Segmented recording ended for camera {camera.name} "
+                        f"({recording_info['segments_completed']} segments)")
+    
+    def _record_remux_segments(self, camera_id):
+        """Supervise an ffmpeg segment muxer and register each closed segment"""
+        recording_info = self.active_recordings.get(camera_id)
+        if not recording_info:
+            return
+        
+        from .remux import FFmpegRemuxer, probe_stream, read_completed_segments, REMUX_CONTAINERS
+        from .opencv_config import STREAM_SETTINGS
+        
+        camera = recording_info['recording'].camera
+        recording_dir = os.path.dirname(recording_info['base_path'])
+        remuxer = None
+        segments_seen = 0
+        
+        def register_segments():
+            nonlocal segments_seen
+            for filename, start, end in read_completed_segments(recording_info['segment_list'], segments_seen):
+                segments_seen += 1
+                if not filename:
+                    continue
+                recording = recording_info['recording']
+                file_path = os.path.join(recording_dir, os.path.basename(filename))
+                fps = recording_info['fps']
+                
+                recording.file_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
+                recording.save(update_fields=['file_path'])
+                self._close_recording(recording, file_path, int((end - start) * fps))
+                recording_info['segments_completed'] += 1
+                self._create_segment_recording(camera, recording_info)
+        
+        try:
+            while camera_id in self.active_recordings and not recording_info['stop_requested']:
+                if remuxer is None or not remuxer.is_running():
+                    if remuxer is not None:
+                        register_segments()
+                        logger.warning(f"ffmpeg segment recorder for camera {camera.name} exited: {remuxer.error_output}")
+                        time.sleep(STREAM_SETTINGS['reconnect_delay'])
+                    
+                    stream_props = probe_stream(camera.rtsp_url)
+                    container = 'mp4' if stream_props['codec'] in (None, 'h264', 'hevc') else 'matroska'
+                    # ffmpeg expands the strftime pattern with each segment's start time
+                    output_pattern, _ = self._recording_file_base(
+                        camera, '%Y%m%d_%H%M%S', is_scheduled=recording_info['schedule'] is not None
+                    )
+                    
+                    recording_info['fps'] = stream_props['fps'] or 25
+                    recording_info['segment_list'] = os.path.join(
+                        recording_dir, f".segments_{int(time.time())}.csv"
+                    )
+                    segments_seen = 0
+                    
+                    recording = recording_info['recording']
+                    recording.storage_type = 'local'
+                    recording.codec = (stream_props['codec'] or 'copy')[:10]
+                    if stream_props['width'] and stream_props['height']:
+                        recording.resolution = f"{stream_props['width']}x{stream_props['height']}"
+                    recording.frame_rate = recording_info['fps']
+                    recording.save(update_fields=['storage_type', 'codec', 'resolution', 'frame_rate'])
+                    
+                    remuxer = FFmpegRemuxer(
+                        camera.rtsp_url,
+                        output_pattern + REMUX_CONTAINERS[container],
+                        container=container,
+                        codec=stream_props['codec'],
+                        segment_seconds=recording_info['segment_minutes'] * 60,
+                        segment_list_path=recording_info['segment_list'],
+                    )
+                    remuxer.start()
+                    recording_info['remuxer'] = remuxer
+                
+                register_segments()
+                
+                elapsed = (timezone.now() - recording_info['recording'].start_time).total_seconds()
+                recording_info['frame_count'] = int(elapsed * recording_info['fps'])
+                remuxer.wait(timeout=1)
+                
+        except Exception as e:
+            logger.error(f"Critical error during segmented recording for camera {camera.name}: {str(e)}")
+        finally:
+            if remuxer is not None:
+                remuxer.stop()
+                register_segments()
+                try:
+                    os.remove(recording_info['segment_list'])
+                except OSError:
+                    pass
+            
+            # The segment that was open when we stopped has been registered above;
+            # what is left is the placeholder row for a segment that never started
+            recording = recording_info['recording']
+            if recording.status == 'recording':
+                recording.delete()
+            
+            self.active_recordings.pop(camera_id, None)
+            logger.info(f"🏁 Segmented recording ended for camera {camera.name} "
+                        f"({recording_info['segments_completed']} segments)")
+    
     def _record_frames(self, camera_id):
         """Record frames in a separate thread"""
         recording_info = self.active_recordings.get(camera_id)
         if not recording_info:
             return
         
-        cap = recording_info['capture']
+        worker = recording_info['worker']
         out = recording_info['writer']
         recording = recording_info['recording']
         start_time = recording_info['start_time']
@@ -662,14 +1045,19 @@ class RTSPRecordingManager:
             consecutive_failures = 0
             max_failures = 30  # Allow 30 consecutive failures before giving up
             frames_written = 0
+            last_sequence = worker.sequence - 1  # Start with the frame already decoded
+            
+            # Write at the rate the file is declared with, whatever the camera delivers
+            pacer = recording_info['pacer'] = worker.add_pacer(CONSUMER_RECORDER, worker.fps)
             
-            while camera_id in self.active_recordings:
+            while camera_id in self.active_recordings and not recording_info.get('stop_requested'):
                 try:
-                    # Use timeout for frame reading to prevent hanging
-                    from .opencv_config import get_frame_with_timeout
-                    ret, frame = get_frame_with_timeout(cap, timeout_ms=2000)
+                    # Wait for the next frame published by the shared capture worker
+                    last_sequence, frame = worker.wait_for_frame(last_sequence, timeout=2.0)
                     
-                    if ret and frame is not None:
+                    if frame is not None:
+                        if not pacer.offer():
+                            continue
                         try:
                             # Verify frame is valid before writing
                             if frame.size > 0 and len(frame.shape) == 3:
@@ -720,8 +1108,10 @@ class RTSPRecordingManager:
         finally:
             # Ensure proper cleanup
             try:
-                if cap:
-                    cap.release()
+                if recording_info.get('pacer'):
+                    worker.remove_pacer(recording_info['pacer'])
+                frame_bus.unsubscribe(recording.camera_id, recording_info['quality'],
+                                      consumer=CONSUMER_RECORDER, worker=worker)
             except Exception as e:
                 logger.error(f"Error releasing capture for recording {recording.id}: {str(e)}")
             
@@ -731,194 +1121,112 @@ class RTSPRecordingManager:
             except Exception as e:
                 logger.error(f"Error releasing writer for recording {recording.id}: {str(e)}")
             
-            # Update recording status
-            recording.end_time = timezone.now()
-            recording.duration = recording.end_time - recording.start_time
-            
-            # Get file size and validate recording
-            file_path = recording_info.get('file_path', '')
-            if file_path and os.path.exists(file_path):
-                try:
-                    file_size = os.path.getsize(file_path)
-                    recording.file_size = file_size
-                    
-                    # Check if we actually recorded something meaningful
-                    if file_size > 1000 and frames_written > 10:  # At least 1KB and 10 frames
-                        recording.status = 'completed'
-                        logger.info(f"✅ Recording {recording.id} completed successfully: {file_size} bytes, {frames_written} frames")
-                        
-                        # CRITICAL: Upload to GCP immediately after recording completion
-                        upload_success = self._upload_completed_recording(recording, file_path)
-                        
-                        # Log upload result
-                        if upload_success:
-                            logger.info(f"🚀 Recording {recording.id} successfully uploaded to GCP")
-                        else:
-                            logger.warning(f"⚠️ Recording {recording.id} upload failed, will retry via background sync")
-                        
-                    else:
-                        recording.status = 'failed'
-                        recording.error_message = f"Recording too small: {file_size} bytes, {frames_written} frames"
-                        logger.warning(f"❌ Recording {recording.id} failed: {recording.error_message}")
-                except Exception as e:
-                    logger.error(f"Error checking file size for recording {recording.id}: {str(e)}")
-                    recording.status = 'failed'
-                    recording.error_message = f"File access error: {str(e)}"
-            else:
-                recording.status = 'failed'
-                recording.error_message = "Recording file not found"
-                logger.error(f"❌ Recording {recording.id} failed: file not found at {file_path}")
-            
-            # Update recording properties
-            if frames_written > 0 and recording.duration and recording.duration.total_seconds() > 0:
-                recording.frame_rate = frames_written / recording.duration.total_seconds()
-            
-            # Save recording with error handling
+            self._finalize_recording(camera_id, recording_info, frames_written)
+    
+    def _finalize_recording(self, camera_id, recording_info, frames_written):
+        """Close out the recording session and remove it from the active recordings"""
+        recording = recording_info['recording']
+        
+        self._close_recording(recording, recording_info.get('file_path', ''), frames_written)
+        
+        # Remove from active recordings
+        try:
+            if camera_id in self.active_recordings:
+                del self.active_recordings[camera_id]
+            logger.info(f"🏁 Recording completed for camera {recording.camera.name}")
+        except Exception as e:
+            logger.error(f"Error cleaning up active recording: {str(e)}")
+    
+    def _close_recording(self, recording, file_path, frames_written):
+        """
+        Validate a finished recording file, update its Recording row and queue it for upload.
+        
+        Args:
+            recording: Recording instance
+            file_path: Absolute local path of the written file
+            frames_written: Number of frames in the file
+        """
+        # Update recording status
+        recording.end_time = timezone.now()
+        recording.duration = recording.end_time - recording.start_time
+        upload_pending = False
+        
+        # Get file size and validate recording
+        if file_path and os.path.exists(file_path):
             try:
-                recording.save()
-                logger.info(f"📝 Recording {recording.id} database record updated")
+                file_size = os.path.getsize(file_path)
+                recording.file_size = file_size
+                
+                # Check if we actually recorded something meaningful
+                if file_size > 1000 and frames_written > 10:  # At least 1KB and 10 frames
+                    recording.status = 'completed'
+                    logger.info(f"✅ Recording {recording.id} completed successfully: {file_size} bytes, {frames_written} frames")
+                    # Save the completed row first; the upload queue updates the path
+                    upload_pending = True
+                else:
+                    recording.status = 'failed'
+                    recording.error_message = f"Recording too small: {file_size} bytes, {frames_written} frames"
+                    logger.warning(f"❌ Recording {recording.id} failed: {recording.error_message}")
             except Exception as e:
-                logger.error(f"Error saving recording {recording.id}: {str(e)}")
-            
-            # Handle 'once' schedule deactivation after successful recording completion
-            if recording.schedule and recording.schedule.schedule_type == 'once' and recording.status == 'completed':
-                try:
-                    if recording.schedule.is_active:
-                        logger.info(f"Deactivating 'once' schedule '{recording.schedule.name}' (ID: {recording.schedule.id}) after successful video storage")
-                        recording.schedule.is_active = False
-                        recording.schedule.save()
-                        
-                        # Remove from active jobs in scheduler if available
-                        try:
-                            from .scheduler import recording_scheduler
-                            if hasattr(recording_scheduler, 'remove_schedule'):
-                                recording_scheduler.remove_schedule(recording.schedule.id)
-                        except (ImportError, AttributeError) as e:
-                            logger.debug(f"Scheduler not available or method missing: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Error handling schedule deactivation: {str(e)}")
-            
-            # Remove from active recordings
+                logger.error(f"Error checking file size for recording {recording.id}: {str(e)}")
+                recording.status = 'failed'
+                recording.error_message = f"File access error: {str(e)}"
+        else:
+            recording.status = 'failed'
+            recording.error_message = "Recording file not found"
+            logger.error(f"❌ Recording {recording.id} failed: file not found at {file_path}")
+        
+        # Update recording properties
+        if frames_written > 0 and recording.duration and recording.duration.total_seconds() > 0:
+            recording.frame_rate = frames_written / recording.duration.total_seconds()
+        
+        # Save recording with error handling
+        try:
+            recording.save()
+            logger.info(f"📝 Recording {recording.id} database record updated")
+        except Exception as e:
+            logger.error(f"Error saving recording {recording.id}: {str(e)}")
+        
+        # Handle 'once' schedule deactivation after successful recording completion
+        if recording.schedule and recording.schedule.schedule_type == 'once' and recording.status == 'completed':
             try:
-                if camera_id in self.active_recordings:
-                    del self.active_recordings[camera_id]
-                logger.info(f"🏁 Recording completed for camera {recording.camera.name}")
+                if recording.schedule.is_active:
+                    logger.info(f"Deactivating 'once' schedule '{recording.schedule.name}' (ID: {recording.schedule.id}) after successful video storage")
+                    recording.schedule.is_active = False
+                    recording.schedule.save()
+                    
+                    # Remove from active jobs in scheduler if available
+                    try:
+                        from .scheduler import recording_scheduler
+                        if hasattr(recording_scheduler, 'remove_schedule'):
+                            recording_scheduler.remove_schedule(recording.schedule.id)
+                    except (ImportError, AttributeError) as e:
+                        logger.debug(f"Scheduler not available or method missing: {str(e)}")
             except Exception as e:
-                logger.error(f"Error cleaning up active recording: {str(e)}")
+                logger.error(f"Error handling schedule deactivation: {str(e)}")
+        
+        if upload_pending:
+            self._upload_completed_recording(recording, file_path)
     
     def _upload_completed_recording(self, recording, local_file_path):
-        """Upload completed recording to cloud storage (AWS S3 or GCP) if enabled"""
-        upload_success = False
+        """
+        Hand a completed recording to the upload queue.
         
-        try:
-            from .storage_service import storage_service
-            from django.conf import settings
-            import time
-            
-            # Check which cloud storage backend is configured
-            cloud_backend = getattr(settings, 'CLOUD_STORAGE_BACKEND', 'LOCAL').upper()
-            
-            # If no cloud storage is configured, keep local
-            if cloud_backend == 'LOCAL':
-                logger.debug(f"Cloud storage not enabled, keeping recording {recording.id} in local storage")
-                return True  # Not an error, just not configured
-            
-            # Check if cloud storage service is available
-            if not storage_service.use_aws and not storage_service.use_gcp:
-                logger.debug(f"Cloud storage service not available, keeping recording {recording.id} in local storage")
-                return True  # Not an error, just not available
-            
-            # Verify file exists and is accessible before upload
-            if not os.path.exists(local_file_path):
-                logger.error(f"Cannot upload recording {recording.id}: file not found at {local_file_path}")
-                return False
-            
-            # Get file info
-            file_size = os.path.getsize(local_file_path)
-            logger.info(f"🚀 Uploading completed recording {recording.id} to {cloud_backend} storage... ({storage_service._format_size(file_size)})")
-            
-            # Add retry mechanism for upload
-            max_retries = 3
-            retry_delay = 5  # seconds
-            
-            for attempt in range(max_retries):
-                try:
-                    # Upload file to cloud storage (AWS S3 or GCP)
-                    storage_result = storage_service.upload_recording(
-                        local_file_path=local_file_path,
-                        recording_id=str(recording.id),
-                        camera_id=str(recording.camera.id),
-                        filename=os.path.basename(local_file_path)
-                    )
-                    
-                    if storage_result and storage_result[0]:  # storage_path is not None
-                        storage_path, storage_type = storage_result
-                        
-                        # Update recording with cloud storage info
-                        recording.file_path = storage_path
-                        recording.storage_type = storage_type
-                        
-                        # Add upload timestamp
-                        recording.updated_at = timezone.now()
-                        recording.save(update_fields=['file_path', 'storage_type', 'updated_at'])
-                        
-                        logger.info(f"✅ Recording {recording.id} successfully uploaded to {storage_type.upper()}: {storage_path}")
-                        upload_success = True
-                        
-                        # Clean up local file after successful upload based on storage type
-                        cleanup_enabled = False
-                        if storage_type == 'aws' and getattr(settings, 'AWS_STORAGE_CLEANUP_LOCAL', True):
-                            cleanup_enabled = True
-                        elif storage_type == 'gcp' and getattr(settings, 'GCP_STORAGE_CLEANUP_LOCAL', True):
-                            cleanup_enabled = True
-                        
-                        if cleanup_enabled:
-                            try:
-                                # Wait a moment to ensure cloud upload is fully processed
-                                time.sleep(2)
-                                os.remove(local_file_path)
-                                logger.info(f"🗑️ Local file cleaned up after {storage_type.upper()} upload: {local_file_path}")
-                            except Exception as cleanup_error:
-                                logger.warning(f"Failed to cleanup local file {local_file_path}: {str(cleanup_error)}")
-                                # Don't fail the upload just because cleanup failed
-                        
-                        break  # Success, exit retry loop
-                        
-                    else:
-                        logger.warning(f"Upload attempt {attempt + 1} failed for recording {recording.id}")
-                        if attempt < max_retries - 1:
-                            logger.info(f"Retrying upload in {retry_delay} seconds...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2  # Exponential backoff
-                        else:
-                            logger.error(f"All upload attempts failed for recording {recording.id}, keeping in local storage")
-                            
-                except Exception as upload_error:
-                    logger.error(f"Upload attempt {attempt + 1} error for recording {recording.id}: {str(upload_error)}")
-                    if attempt < max_retries - 1:
-                        logger.info(f"Retrying upload in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        logger.error(f"All upload attempts failed for recording {recording.id}: {str(upload_error)}")
-                        break
-                        
-        except Exception as e:
-            logger.error(f"Critical error uploading recording {recording.id} to cloud storage: {str(e)}")
-            upload_success = False
+        Returns immediately; conversion to fast-start MP4, the upload itself,
+        retries and local cleanup are done by the queue's workers.
         
-        # If upload failed, ensure recording stays in local storage for background sync
-        if not upload_success:
-            try:
-                # Make sure storage_type is set to local for failed uploads
-                if recording.storage_type != 'local':
-                    recording.storage_type = 'local'
-                    recording.save(update_fields=['storage_type'])
-                    logger.info(f"Recording {recording.id} marked as local storage for background sync retry")
-            except Exception as db_error:
-                logger.error(f"Error updating recording storage type: {str(db_error)}")
+        Returns:
+            bool: True if the recording was queued (or cloud storage is disabled)
+        """
+        from .upload_queue import upload_queue, enqueue_recording_upload
         
-        return upload_success
+        if not upload_queue.cloud_enabled():
+            logger.debug(f"Cloud storage not enabled, keeping recording {recording.id} in local storage")
+            from .transcode import recording_transcoder
+            recording_transcoder.submit(recording, local_file_path)
+            return True
+        
+        return enqueue_recording_upload(recording, local_file_path) is not None
     
     def stop_recording(self, camera_id):
         """Stop an active recording"""
@@ -927,6 +1235,12 @@ class RTSPRecordingManager:
         
         recording_info = self.active_recordings[str(camera_id)]
         recording = recording_info['recording']
+        recording_info['stop_requested'] = True
+        
+        if recording_info.get('segmented'):
+            # The segment loop closes and finalizes the open segment itself
+            logger.info(f"Stopping segmented recording for camera {recording.camera.name}")
+            return recording
         
         # Update recording status
         recording.status = 'stopped'
@@ -938,8 +1252,8 @@ class RTSPRecordingManager:
         return recording
     
     def is_recording(self, camera_id):
-        """Check if a camera is currently recording"""
-        return str(camera_id) in self.active_recordings
+        """Check if a camera is currently recording (or a recording is being started)"""
+        return str(camera_id) in self.active_recordings or str(camera_id) in self.starting_recordings
     
     def get_active_recordings(self):
         """Get all active recordings"""
@@ -957,99 +1271,84 @@ def test_camera_connection(rtsp_url):
         return False, "OpenCV is not installed. Please install opencv-python to use camera functionality."
     
     try:
-        # Import OpenCV configuration for robust testing
-        from .opencv_config import test_camera_connection_robust
-        return test_camera_connection_robust(rtsp_url)
+        # Explicit tests always probe, and refresh the cached connection state
+        from .connection_health import connection_health
+        return connection_health.check(rtsp_url, force=True)
             
     except Exception as e:
         return False, f"Connection error: {str(e)}"
 
 
-def generate_frames(camera, quality='main'):
-    """Generator function for streaming frames with enhanced performance and error handling"""
+def generate_frames(camera, quality='main', width=None):
+    """
+    Generator function for streaming frames as MJPEG.
+
+    Frames are encoded once per capture worker and output width, and the same
+    chunk is shared by every viewer; each viewer just waits for the next
+    sequence number.
+    
+    Args:
+        camera: Camera instance
+        quality: 'main' or 'sub'
+        width: Downscale to this width (see frame_bus.resolve_stream_width), None for full size
+    """
     stream_started = False
-    last_frame = None
+    worker = None
+    pacer = None
     consecutive_errors = 0
     max_errors = 5
+    frame_count = 0
     
     try:
+        from .opencv_config import STREAM_SETTINGS
+        
         # Start the stream
-        stream_info = stream_manager.start_stream(camera, quality)
+        stream_manager.start_stream(camera, quality)
         stream_manager.add_viewer(camera.id, quality)
         stream_started = True
+        worker = stream_manager.get_worker(camera.id, quality)
+        pacer = worker.add_pacer(CONSUMER_VIEWER, STREAM_SETTINGS['fps'])
         
-        # Stream frames continuously
-        frame_count = 0
-        last_frame_time = time.time()
+        last_sequence = 0
         last_health_check = time.time()
         
         logger.info(f"Starting frame generation for camera {camera.name} (quality: {quality})")
         
         while True:
             try:
-                frame = stream_manager.get_frame(camera.id, quality)
+                last_sequence, part = worker.wait_for_mjpeg_part(last_sequence, timeout=2.0, pacer=pacer, width=width)
                 
-                if frame is not None:
-                    # Use optimized JPEG encoding from opencv_config
-                    from .opencv_config import JPEG_ENCODING_SETTINGS
-                    ret, buffer = cv2.imencode('.jpg', frame, JPEG_ENCODING_SETTINGS)
-                    
-                    if ret:
-                        frame_bytes = buffer.tobytes()
-                        frame_count += 1
-                        last_frame_time = time.time()
-                        last_frame = frame_bytes  # Cache last good frame
-                        consecutive_errors = 0
-                        
-                        # Yield the frame in MJPEG format
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n'
-                               b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n' + 
-                               frame_bytes + b'\r\n')
-                    else:
-                        logger.warning(f"Failed to encode frame for camera {camera.name}")
-                        consecutive_errors += 1
-                        
-                        # Use last good frame if available
-                        if last_frame and consecutive_errors < 3:
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n'
-                                   b'Content-Length: ' + str(len(last_frame)).encode() + b'\r\n\r\n' + 
-                                   last_frame + b'\r\n')
+                if part is not None:
+                    frame_count += 1
+                    consecutive_errors = 0
+                    yield part
                 else:
-                    # No frame available
+                    # No new frame within the timeout (or it could not be encoded)
                     consecutive_errors += 1
                     
-                    if consecutive_errors >= max_errors:
+                    if consecutive_errors >= max_errors or not worker.running:
                         logger.error(f"Too many consecutive errors for camera {camera.name}, attempting recovery")
                         
-                        # Try to recover the stream
-                        recovery_result = stream_manager.recover_stream(camera.id, quality)
-                        if recovery_result:
-                            consecutive_errors = 0
-                            logger.info(f"Stream recovered for camera {camera.name}")
-                        else:
-                            logger.error(f"Failed to recover stream for camera {camera.name}")
-                            break
-                    
-                    # Use last good frame if available, otherwise wait
-                    if last_frame and consecutive_errors < 3:
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n'
-                               b'Content-Length: ' + str(len(last_frame)).encode() + b'\r\n\r\n' + 
-                               last_frame + b'\r\n')
-                    else:
-                        time.sleep(0.1)  # Wait for frames
-                        continue
-                
-                # Adaptive frame rate control
-                current_time = time.time()
-                time_since_last_frame = current_time - last_frame_time
-                
-                if time_since_last_frame < 0.04:  # Target 25 FPS
-                    time.sleep(0.04 - time_since_last_frame)
+                        current = stream_manager.get_worker(camera.id, quality)
+                        if current is None or current is worker or not current.running:
+                            # Try to recover the stream
+                            recovery_result = stream_manager.recover_stream(camera.id, quality)
+                            if not recovery_result:
+                                logger.error(f"Failed to recover stream for camera {camera.name}")
+                                break
+                        
+                        # Recovery restarts the stream without viewers, so re-register
+                        stream_manager.add_viewer(camera.id, quality)
+                        worker.remove_pacer(pacer)
+                        worker = stream_manager.get_worker(camera.id, quality)
+                        pacer = worker.add_pacer(CONSUMER_VIEWER, STREAM_SETTINGS['fps'])
+                        last_sequence = 0
+                        consecutive_errors = 0
+                        logger.info(f"Stream recovered for camera {camera.name}")
+                    continue
                 
                 # Periodic health check (every 5 seconds)
+                current_time = time.time()
                 if current_time - last_health_check > 5:
                     if not stream_manager.is_stream_active(camera.id, quality):
                         logger.warning(f"Stream no longer active for camera {camera.name}")
@@ -1082,8 +1381,100 @@ def generate_frames(camera, quality='main'):
                error_msg + b'\r\n')
     finally:
         try:
+            if pacer is not None:
+                worker.remove_pacer(pacer)
             if stream_started:
                 stream_manager.remove_viewer(camera.id, quality)
                 logger.info(f"Frame generation ended for camera {camera.name} (processed {frame_count} frames)")
         except Exception as cleanup_error:
             logger.error(f"Error during stream cleanup for camera {camera.name}: {str(cleanup_error)}")
+
+
+async def agenerate_frames(camera, quality='main', width=None):
+    """
+    Async generator streaming frames as MJPEG (for the ASGI stream endpoint).
+
+    Same frames and shared encode cache as generate_frames, but a viewer is
+    a coroutine awaiting the capture bus instead of a thread blocked on it, so
+    idle viewers cost no worker. Each viewer only ever gets the newest frame:
+    while the server waits for a slow client to take the previous chunk, the
+    frames in between are skipped rather than buffered. The generator ends
+    when the client disconnects only because config.asgi cancels it
+    (see asgi_middleware).
+    
+    Args:
+        camera: Camera instance
+        quality: 'main' or 'sub'
+        width: Downscale to this width (see frame_bus.resolve_stream_width), None for full size
+    """
+    import asyncio
+    from .opencv_config import STREAM_SETTINGS
+    
+    stream_started = False
+    worker = None
+    pacer = None
+    consecutive_errors = 0
+    max_errors = 5
+    frame_count = 0
+    
+    try:
+        # Opening the camera blocks; keep it off the event loop
+        await asyncio.to_thread(stream_manager.start_stream, camera, quality)
+        stream_manager.add_viewer(camera.id, quality)
+        stream_started = True
+        worker = stream_manager.get_worker(camera.id, quality)
+        pacer = worker.add_pacer(CONSUMER_VIEWER, STREAM_SETTINGS['fps'])
+        last_sequence = 0
+        
+        logger.info(f"Starting async frame generation for camera {camera.name} (quality: {quality})")
+        
+        while True:
+            last_sequence, part = await worker.wait_for_mjpeg_part_async(last_sequence, timeout=2.0, pacer=pacer, width=width)
+            
+            if part is not None:
+                frame_count += 1
+                consecutive_errors = 0
+                yield part
+                continue
+            
+            consecutive_errors += 1
+            if consecutive_errors < max_errors and worker.running:
+                continue
+            
+            logger.error(f"Too many consecutive errors for camera {camera.name}, attempting recovery")
+            current = stream_manager.get_worker(camera.id, quality)
+            if current is None or current is worker or not current.running:
+                if not await asyncio.to_thread(stream_manager.recover_stream, camera.id, quality):
+                    logger.error(f"Failed to recover stream for camera {camera.name}")
+                    break
+            
+            # Recovery restarts the stream without viewers, so re-register
+            stream_manager.add_viewer(camera.id, quality)
+            worker.remove_pacer(pacer)
+            worker = stream_manager.get_worker(camera.id, quality)
+            pacer = worker.add_pacer(CONSUMER_VIEWER, STREAM_SETTINGS['fps'])
+            last_sequence = 0
+            consecutive_errors = 0
+            logger.info(f"Stream recovered for camera {camera.name}")
+    
+    except Exception as e:
+        logger.error(f"Critical error in async frame generation for camera {camera.name}: {str(e)}")
+        error_msg = f"Critical streaming error: {str(e)}".encode()
+        yield (b'--frame\r\n'
+               b'Content-Type: text/plain\r\n'
+               b'Content-Length: ' + str(len(error_msg)).encode() + b'\r\n\r\n' +
+               error_msg + b'\r\n')
+    finally:
+        # Also runs on cancellation after a client disconnect. Removing the last viewer stops the
+        # stream and saves the camera, which must not happen on the event loop.
+        def release():
+            try:
+                if pacer is not None:
+                    worker.remove_pacer(pacer)
+                if stream_started:
+                    stream_manager.remove_viewer(camera.id, quality)
+                    logger.info(f"Async frame generation ended for camera {camera.name} (processed {frame_count} frames)")
+            except Exception as cleanup_error:
+                logger.error(f"Error during stream cleanup for camera {camera.name}: {str(cleanup_error)}")
+        
+        threading.Thread(target=release, name=f"stream-release-{camera.id}", daemon=True).start()
@@ -1,3 +1,779 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import os
+import tempfile
+import threading
+import uuid
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .frame_bus import FrameBus, CaptureWorker, CONSUMER_VIEWER, CONSUMER_RECORDER, resolve_stream_width
+from .pacing import FramePacer
+from .connection_health import ConnectionHealthCache
+from .health_monitor import CameraHealthMonitor
+from . import status_writer
+from .upload_queue import UploadQueue, upload_backoff_seconds
+from . import resumable_upload
+from .storage_service import SignedUrlCache
+from . import storage_index
+from .range_serving import parse_range_header
+from .transcode import needs_transcode, build_transcode_command
+from .hls import rewrite_playlist
+from .live_hls import LiveHLSRemuxer
+from .remux import FFmpegRemuxer
+from .asgi_middleware import StreamDisconnectMiddleware
+from .rollup import rollup_hour
+from .recording_stats import compute_recording_stats
+from .streaming import RTSPStreamManager, RTSPRecordingManager, next_segment_boundary
+from .recording_listing import InvalidCursor, encode_cursor, decode_cursor, serialize_recording_row
+from .models import Camera
+
+
+def _fake_camera():
+    camera_id = uuid.uuid4()
+    return SimpleNamespace(
+        id=camera_id,
+        name=f"Camera {camera_id}",
+        get_stream_url=lambda quality='main': f"rtsp://example/{camera_id}/{quality}",
+    )
+
+
+@mock.patch.object(CaptureWorker, 'ensure_open', return_value=True)
+class FrameBusTest(SimpleTestCase):
+    def setUp(self):
+        self.bus = FrameBus()
+        self.camera = _fake_camera()
+
+    def test_consumers_share_one_worker(self, _ensure_open):
+        viewer_worker = self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_VIEWER)
+        recorder_worker = self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_RECORDER)
+
+        self.assertIs(viewer_worker, recorder_worker)
+        self.assertEqual(len(self.bus.workers), 1)
+        self.assertEqual(viewer_worker.subscriber_count, 2)
+
+    def test_worker_stops_when_last_subscriber_leaves(self, _ensure_open):
+        worker = self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_VIEWER)
+        self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_RECORDER)
+
+        with mock.patch.object(worker, 'stop') as stop:
+            self.bus.unsubscribe(self.camera.id, 'main', consumer=CONSUMER_VIEWER)
+            stop.assert_not_called()
+
+            self.bus.unsubscribe(self.camera.id, 'main', consumer=CONSUMER_RECORDER)
+            stop.assert_called_once()
+
+        self.assertEqual(self.bus.workers, {})
+
+    def test_unsubscribe_ignores_replaced_worker(self, _ensure_open):
+        old_worker = self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_VIEWER)
+        self.bus._worker_exited(old_worker)
+        new_worker = self.bus.subscribe(self.camera, 'main', consumer=CONSUMER_VIEWER)
+
+        self.bus.unsubscribe(self.camera.id, 'main', consumer=CONSUMER_VIEWER, worker=old_worker)
+
+        self.assertEqual(new_worker.subscriber_count, 1)
+
+
+class ResolveStreamWidthTest(SimpleTestCase):
+    def test_tiers_and_widths(self):
+        self.assertEqual(resolve_stream_width('tile'), 640)
+        self.assertIsNone(resolve_stream_width('full'))
+        self.assertEqual(resolve_stream_width(width=300), 320)  # Rounded up so similar sizes share a cache
+        self.assertIsNone(resolve_stream_width('unknown'))
+
+
+class FrameReaderTest(SimpleTestCase):
+    def test_read_times_out_without_spawning_threads(self):
+        from .opencv_config import FrameReader
+
+        stalled = threading.Event()
+        capture = mock.Mock()
+        capture.read.side_effect = lambda: (stalled.wait(), None)
+        reader = FrameReader(capture, name='stalled')
+        threads_before = threading.active_count()
+
+        try:
+            self.assertEqual(reader.read(timeout_ms=20), (False, None))
+            self.assertEqual(reader.read(timeout_ms=20), (False, None))
+            self.assertEqual(reader.timeouts, 2)
+            self.assertEqual(threading.active_count(), threads_before)
+        finally:
+            reader.running = False
+            stalled.set()
+            reader.stop()
+
+
+class FramePacerTest(SimpleTestCase):
+    def test_skips_frames_above_target_rate(self):
+        pacer = FramePacer(target_fps=10)
+
+        accepted = sum(pacer.offer(timestamp=i / 30) for i in range(300))  # 10s of a 30fps source
+
+        self.assertEqual(accepted, 100)
+        self.assertEqual(pacer.dropped, 200)
+
+    def test_jitter_does_not_drop_frames_at_source_rate(self):
+        pacer = FramePacer(target_fps=25)
+
+        accepted = sum(pacer.offer(timestamp=i / 25 + (0.005 if i % 2 else -0.005)) for i in range(250))
+
+        self.assertEqual(accepted, 250)
+
+
+class ConnectionHealthCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = ConnectionHealthCache()
+        self.url = "rtsp://example/camera"
+
+    def test_streaming_camera_is_not_probed(self):
+        self.cache.mark(self.url, True, "Camera is streaming")
+
+        with mock.patch.object(self.cache, '_probe') as probe:
+            self.assertEqual(self.cache.check(self.url), (True, "Camera is streaming"))
+            probe.assert_not_called()
+
+    def test_concurrent_cold_probes_are_shared(self):
+        release = threading.Event()
+
+        def slow_probe(stream_url, max_attempts=None):
+            release.wait(5)
+            return True, "ok"
+
+        with mock.patch.object(self.cache, '_probe', side_effect=slow_probe) as probe:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(self.cache.check(self.url)))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(results, [(True, "ok")] * 5)
+
+
+@mock.patch.object(status_writer, 'close_old_connections')
+class CameraStatusWriterTest(SimpleTestCase):
+    def test_keeps_latest_value_and_batches_by_fields(self, _close_old_connections):
+        writer = status_writer.CameraStatusWriter(flush_interval_ms=60000)
+        first, second = uuid.uuid4(), uuid.uuid4()
+
+        with mock.patch.object(status_writer.CameraStatusWriter, '_run'):
+            writer.enqueue(first, status='error')
+            writer.enqueue(first, status='active', is_streaming=True)
+            writer.enqueue(second, is_streaming=True, status='active')
+
+        with mock.patch.object(Camera.objects, 'bulk_update') as bulk_update:
+            self.assertEqual(writer.flush(), 2)
+
+        bulk_update.assert_called_once()
+        cameras, fields = bulk_update.call_args[0]
+        self.assertEqual(fields, ['is_streaming', 'status'])
+        self.assertEqual({camera.id: camera.status for camera in cameras}, {first: 'active', second: 'active'})
+        self.assertEqual(writer.pending, {})
+
+
+class UploadBackoffTest(SimpleTestCase):
+    def test_doubles_per_attempt_up_to_the_cap(self):
+        delays = [upload_backoff_seconds(attempts, base_seconds=30, max_seconds=600) for attempts in range(1, 7)]
+        self.assertEqual(delays, [30, 60, 120, 240, 480, 600])
+
+
+@mock.patch('apps.cctv.upload_queue.transaction')
+@mock.patch('apps.cctv.upload_queue.Recording')
+@mock.patch('apps.cctv.upload_queue.UploadTask')
+class UploadClaimTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = UploadQueue(max_workers=1, max_attempts=3)
+        self.task = SimpleNamespace(id=uuid.uuid4(), recording_id=uuid.uuid4(), attempts=0)
+
+    def test_stale_worker_does_not_overwrite_the_new_owner(self, upload_task, recording, _transaction):
+        upload_task.objects.filter.return_value.update.return_value = 0
+
+        self.assertFalse(self.queue._complete(self.task, 'old-worker', 'recordings/a.mp4', 'aws'))
+        self.queue._fail(self.task, 'old-worker', 'timeout')
+
+        upload_task.objects.filter.assert_called_with(id=self.task.id, claimed_by='old-worker')
+        recording.objects.filter.assert_not_called()
+        self.assertEqual((self.queue.uploaded_count, self.queue.failed_count), (0, 0))
+
+    @mock.patch('apps.cctv.upload_queue.connections')
+    def test_claim_is_refreshed_until_it_is_lost(self, _connections, upload_task, _recording, _transaction):
+        self.queue.claim_timeout = datetime.timedelta(seconds=0.03)
+        upload_task.objects.filter.return_value.update.side_effect = [1, 1, 0]
+
+        self.queue._hold_claim(self.task, 'worker', threading.Event())
+
+        self.assertEqual(upload_task.objects.filter.return_value.update.call_count, 3)
+        upload_task.objects.filter.assert_called_with(id=self.task.id, status='uploading', claimed_by='worker')
+
+
+class S3MultipartResumeTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.file_path = os.path.join(self.tmp.name, 'recording.mp4')
+        with open(self.file_path, 'wb') as recording:
+            recording.write(os.urandom(resumable_upload.S3_MIN_PART_SIZE * 2 + 1000))
+
+        store = resumable_upload.UploadStateStore(os.path.join(self.tmp.name, 'state'))
+        patcher = mock.patch.object(resumable_upload, 'upload_state', store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, stored_parts):
+        client = mock.Mock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        client.upload_part.side_effect = lambda **kwargs: {'ETag': f"etag-{kwargs['PartNumber']}"}
+        client.get_paginator.return_value.paginate.return_value = [{'Parts': stored_parts}]
+        return client
+
+    def test_resumes_from_acknowledged_parts(self):
+        part_size = resumable_upload.S3_MIN_PART_SIZE
+        failing = self._client([])
+        failing.upload_part.side_effect = [{'ETag': 'etag-1'}, Exception("connection reset"), Exception("reset")]
+
+        with self.assertRaises(Exception):
+            resumable_upload.s3_multipart_upload(failing, 'bucket', 'key', self.file_path,
+                                                 part_size=part_size, max_concurrency=1)
+
+        resumed = self._client([{'PartNumber': 1, 'ETag': 'etag-1', 'Size': part_size}])
+        resumable_upload.s3_multipart_upload(resumed, 'bucket', 'key', self.file_path,
+                                             part_size=part_size, max_concurrency=1)
+
+        resumed.create_multipart_upload.assert_not_called()
+        self.assertEqual(sorted(call.kwargs['PartNumber'] for call in resumed.upload_part.call_args_list), [2, 3])
+        parts = resumed.complete_multipart_upload.call_args.kwargs['MultipartUpload']['Parts']
+        self.assertEqual([part['PartNumber'] for part in parts], [1, 2, 3])
+        self.assertIsNone(resumable_upload.upload_state.load('s3:bucket:key'))
+
+
+class SignedUrlCacheTest(SimpleTestCase):
+    def test_reuses_url_until_close_to_expiry(self):
+        cache = SignedUrlCache(min_remaining_fraction=0.25)
+        key = ('aws', 'recordings/cam/file.mp4', 120)
+
+        with mock.patch('apps.cctv.storage_service.time.time', return_value=1000.0):
+            cache.put(key, 'https://signed/1', 7200)
+        with mock.patch('apps.cctv.storage_service.time.time', return_value=1000.0 + 5000):
+            self.assertEqual(cache.get(key), 'https://signed/1')
+        with mock.patch('apps.cctv.storage_service.time.time', return_value=1000.0 + 5500):
+            self.assertIsNone(cache.get(key))
+
+    def test_invalidate_drops_every_expiry_for_path(self):
+        cache = SignedUrlCache()
+        cache.put(('gcp', 'a.mp4', 120), 'u1', 7200)
+        cache.put(('gcp', 'a.mp4', 10), 'u2', 600)
+        cache.put(('gcp', 'b.mp4', 120), 'u3', 7200)
+
+        cache.invalidate('a.mp4')
+
+        self.assertIsNone(cache.get(('gcp', 'a.mp4', 120)))
+        self.assertEqual(cache.get(('gcp', 'b.mp4', 120)), 'u3')
+
+
+class StorageIndexReconcileTest(SimpleTestCase):
+    def test_listing_adds_updates_and_removes_entries(self):
+        prefix = 'recordings/cam/'
+        same = SimpleNamespace(id=1, key=prefix + 'same.mp4', size=10, etag='a', content_type='video/mp4')
+        grown = SimpleNamespace(id=2, key=prefix + 'grown.mp4', size=10, etag='b', content_type='video/mp4')
+        gone = SimpleNamespace(id=3, key=prefix + 'gone.mp4', size=10, etag='c', content_type='video/mp4')
+        listed = {
+            same.key: (10, 'a', None),
+            grown.key: (20, 'b2', None),
+            prefix + 'new.mp4': (30, 'd', 'video/mp4'),
+        }
+
+        id_lookups = {}
+
+        def filter_objects(**lookups):
+            if 'id__in' in lookups:
+                return id_lookups.setdefault(tuple(lookups['id__in']), mock.Mock())
+            return [same, grown, gone]
+
+        with mock.patch.object(storage_index, 'StorageObject') as model:
+            model.objects.filter.side_effect = filter_objects
+            counts = storage_index.reconcile_prefix('aws', prefix, listed)
+
+        self.assertEqual(counts, {'added': 1, 'updated': 1, 'verified': 1, 'removed': 1})
+        self.assertEqual((grown.size, grown.etag), (20, 'b2'))
+        model.objects.bulk_update.assert_called_once()
+        id_lookups[(1,)].update.assert_called_once_with(verified_at=mock.ANY)
+        id_lookups[(3,)].delete.assert_called_once_with()
+
+    def test_truncated_listing_removes_nothing(self):
+        prefix = 'recordings/cam/'
+        unlisted = SimpleNamespace(id=1, key=prefix + 'unlisted.mp4', size=10, etag='a', content_type='video/mp4')
+
+        with mock.patch.object(storage_index, 'StorageObject') as model:
+            model.objects.filter.return_value = [unlisted]
+            counts = storage_index.reconcile_prefix('aws', prefix, {prefix + 'new.mp4': (30, 'd', None)}, complete=False)
+
+        self.assertEqual(counts, {'added': 1, 'updated': 0, 'verified': 0, 'removed': 0})
+        model.objects.filter.return_value.delete.assert_not_called()
+
+    def test_both_backends_report_a_listing_cut_off_at_the_limit(self):
+        blobs = [SimpleNamespace(name=f"recordings/cam/{index}.ts", size=1, etag='e', content_type=None)
+                 for index in range(3)]
+        gcp_service = SimpleNamespace(bucket_name='bucket', client=mock.Mock())
+        gcp_service.client.list_blobs.side_effect = lambda bucket, prefix, max_results: blobs[:max_results]
+        files = [{'key': blob.name, 'size': 1, 'etag': '"e"'} for blob in blobs]
+
+        with self.settings(STORAGE_RECONCILE_MAX_KEYS=2), \
+                mock.patch('utils.s3_uploader.S3Uploader') as uploader:
+            uploader.return_value.list_files.side_effect = lambda prefix, max_keys, raise_errors: files[:max_keys]
+            self.assertFalse(storage_index._list_gcp(gcp_service, 'recordings/cam/')[1])
+            self.assertFalse(storage_index._list_aws('recordings/cam/')[1])
+
+        with self.settings(STORAGE_RECONCILE_MAX_KEYS=3), \
+                mock.patch('utils.s3_uploader.S3Uploader') as uploader:
+            uploader.return_value.list_files.side_effect = lambda prefix, max_keys, raise_errors: files[:max_keys]
+            self.assertTrue(storage_index._list_gcp(gcp_service, 'recordings/cam/')[1])
+            self.assertTrue(storage_index._list_aws('recordings/cam/')[1])
+
+
+class ParseRangeHeaderTest(SimpleTestCase):
+    def test_open_suffix_and_clamped_ranges(self):
+        self.assertEqual(parse_range_header('bytes=100-', 1000), [(100, 999)])
+        self.assertEqual(parse_range_header('bytes=-200', 1000), [(800, 999)])
+        self.assertEqual(parse_range_header('bytes=900-5000', 1000), [(900, 999)])
+
+    def test_multiple_ranges_are_sorted_and_merged(self):
+        self.assertEqual(parse_range_header('bytes=500-600, 0-99, 550-700, 701-710', 1000),
+                         [(0, 99), (500, 710)])
+
+    def test_unsatisfiable_and_malformed(self):
+        self.assertEqual(parse_range_header('bytes=1000-1100', 1000), [])
+        self.assertIsNone(parse_range_header('bytes=abc', 1000))
+        self.assertIsNone(parse_range_header('items=0-1', 1000))
+        self.assertIsNone(parse_range_header(None, 1000))
+
+
+class TranscodeCommandTest(SimpleTestCase):
+    def test_stream_copy_mp4_is_left_alone(self):
+        self.assertFalse(needs_transcode('/m/rec.mp4', 'h264'))
+        self.assertTrue(needs_transcode('/m/rec.mp4', 'mp4v'))
+        self.assertTrue(needs_transcode('/m/rec.avi', 'XVID'))
+
+    def test_h264_is_remuxed_and_others_reencoded(self):
+        remux = build_transcode_command('in.avi', 'out.mp4', 'avc1')
+        self.assertEqual(remux[remux.index('-c:v') + 1], 'copy')
+        self.assertEqual(remux[remux.index('-movflags') + 1], '+faststart')
+
+        encode = build_transcode_command('in.avi', 'out.mp4', 'MJPG', fragmented=True)
+        self.assertEqual(encode[encode.index('-c:v') + 1], 'libx264')
+        self.assertIn('yuv420p', encode)
+        self.assertEqual(encode[encode.index('-movflags') + 1], '+frag_keyframe+empty_moov+default_base_moof')
+
+
+class RewritePlaylistTest(SimpleTestCase):
+    def test_segments_and_variants_are_replaced(self):
+        master = "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nv1/index.m3u8\n"
+        media = "#EXTM3U\n#EXTINF:4.000,\nseg_00000.ts\n#EXTINF:2.500,\nseg_00001.ts\n#EXT-X-ENDLIST\n"
+
+        rewritten_master = rewrite_playlist(master, lambda uri: 'seg:' + uri, lambda uri: 'api?variant=' + uri)
+        rewritten_media = rewrite_playlist(media, lambda uri: 'https://signed/' + uri, lambda uri: uri)
+
+        self.assertIn('api?variant=v1/index.m3u8', rewritten_master)
+        self.assertEqual(rewritten_media.splitlines()[2], 'https://signed/seg_00000.ts')
+        self.assertEqual(rewritten_media.splitlines()[4], 'https://signed/seg_00001.ts')
+        self.assertTrue(rewritten_media.rstrip().endswith('#EXT-X-ENDLIST'))
+
+
+class LiveHLSCommandTest(SimpleTestCase):
+    def test_h264_is_remuxed_into_rolling_playlist(self):
+        command = LiveHLSRemuxer('rtsp://cam', '/tmp/live/cam/main', codec='h264', list_size=5).build_command()
+
+        self.assertEqual(command[command.index('-c:v') + 1], 'copy')
+        self.assertEqual(command[command.index('-hls_list_size') + 1], '5')
+        self.assertIn('delete_segments', command[command.index('-hls_flags') + 1])
+        self.assertEqual(command[-1], os.path.join('/tmp/live/cam/main', 'index.m3u8'))
+
+    def test_other_codecs_are_encoded_to_h264(self):
+        command = LiveHLSRemuxer('rtsp://cam', '/tmp/live/cam/main', codec='hevc').build_command()
+        self.assertEqual(command[command.index('-c:v') + 1], 'libx264')
+
+
+@mock.patch('apps.cctv.frame_bus.cv2')
+class MJPEGEncodeCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.worker = CaptureWorker(FrameBus(), 'cam:main', _fake_camera(), 'main', 'rtsp://example')
+        self.worker.width = 1920
+
+    def test_frame_is_encoded_once_for_all_viewers(self, cv2):
+        cv2.imencode.return_value = (True, mock.Mock(tobytes=mock.Mock(return_value=b'jpeg')))
+        self.worker._publish('f1')
+
+        parts = [self.worker.get_mjpeg_part() for _ in range(3)]
+
+        cv2.imencode.assert_called_once()
+        self.assertEqual([sequence for sequence, _ in parts], [1, 1, 1])
+        self.assertTrue(all(part is parts[0][1] for _, part in parts))
+        self.assertTrue(parts[0][1].endswith(b'\r\n\r\njpeg\r\n'))
+
+        self.worker._publish('f2')
+        self.assertEqual(self.worker.get_mjpeg_part()[0], 2)
+        self.assertEqual(cv2.imencode.call_count, 2)
+
+    def test_full_width_requests_share_the_source_cache(self, cv2):
+        cv2.imencode.return_value = (True, mock.Mock(tobytes=mock.Mock(return_value=b'jpeg')))
+        self.worker._publish('f1')
+
+        self.worker.get_mjpeg_part()
+        self.worker.get_mjpeg_part(width=1920)
+        self.worker.get_mjpeg_part(width=3840)
+
+        cv2.imencode.assert_called_once()
+        cv2.resize.assert_not_called()
+
+
+class AsyncFrameWaitTest(SimpleTestCase):
+    def test_async_viewers_share_one_wakeup_per_frame(self):
+        worker = CaptureWorker(FrameBus(), 'cam:main', _fake_camera(), 'main', 'rtsp://example')
+        worker.running = True
+
+        async def watch():
+            loop = asyncio.get_running_loop()
+            viewers = [asyncio.ensure_future(worker.wait_for_frame_async(0, timeout=2.0)) for _ in range(3)]
+            await asyncio.sleep(0)
+            self.assertEqual(len(worker._async_waiters), 1)
+            # Published from the capture thread
+            await loop.run_in_executor(None, worker._publish, 'f1')
+            return await asyncio.gather(*viewers)
+
+        self.assertEqual(asyncio.run(watch()), [(1, 'f1')] * 3)
+        self.assertEqual(worker._async_waiters, {})
+
+    def test_times_out_without_frames(self):
+        worker = CaptureWorker(FrameBus(), 'cam:main', _fake_camera(), 'main', 'rtsp://example')
+        worker.running = True
+
+        self.assertEqual(asyncio.run(worker.wait_for_frame_async(0, timeout=0.05)), (0, None))
+
+
+class RecordingCursorTest(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        start_time = datetime.datetime(2026, 10, 16, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+        recording_id = uuid.uuid4()
+
+        self.assertEqual(decode_cursor(encode_cursor(start_time, recording_id)), (start_time, str(recording_id)))
+
+    def test_rejects_malformed_cursor(self):
+        for cursor in ('not-a-cursor', '', 'e30'):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_cloud_row_is_serialized_without_queries(self):
+        row = {
+            'id': uuid.uuid4(), 'camera_id': uuid.uuid4(), 'camera__name': 'Gate', 'schedule_id': None,
+            'schedule__name': None, 'name': 'rec', 'file_path': 'recordings/a.mp4', 'file_size': 3 * 1024 * 1024,
+            'duration': datetime.timedelta(minutes=5), 'start_time': datetime.datetime(2026, 10, 16, 8, 0),
+            'end_time': None, 'status': 'completed', 'error_message': None, 'resolution': '1920x1080',
+            'frame_rate': 25.0, 'codec': 'h264', 'storage_type': 'aws', 'upload_status': 'completed',
+            'hls_playlist': None, 'created_at': None, 'updated_at': None,
+        }
+        with mock.patch('apps.cctv.storage_service.storage_service.get_file_url', return_value='https://signed'):
+            item = serialize_recording_row(row)
+
+        self.assertEqual(item['file_url'], 'https://signed')
+        self.assertTrue(item['file_exists'])
+        self.assertEqual(item['file_size_mb'], 3.0)
+        self.assertEqual(item['duration_seconds'], 300.0)
+        self.assertEqual(item['start_time'], '2026-10-16T08:00:00')
+
+
+class RollupHourTest(SimpleTestCase):
+    def test_buckets_by_server_time_zone_hour(self):
+        with self.settings(TIME_ZONE='Asia/Kolkata'):
+            # 08:10 UTC is 13:40 in Kolkata, so the bucket starts at 13:00 local (07:30 UTC)
+            moment = datetime.datetime(2026, 10, 16, 8, 10, tzinfo=datetime.timezone.utc)
+            hour = rollup_hour(moment)
+
+        self.assertEqual((hour.hour, hour.minute), (13, 0))
+        self.assertEqual(hour.astimezone(datetime.timezone.utc),
+                         datetime.datetime(2026, 10, 16, 7, 30, tzinfo=datetime.timezone.utc))
+
+
+class RecordingStatsTest(SimpleTestCase):
+    def test_folds_camera_and_storage_groups(self):
+        camera_id = uuid.uuid4()
+        groups = [
+            {'camera_id': camera_id, 'camera__name': 'Gate', 'storage_type': 'gcp', 'count': 3, 'completed': 2,
+             'failed': 1, 'active': 0, 'size': 3 * 1024 ** 3, 'duration': datetime.timedelta(hours=1)},
+            {'camera_id': camera_id, 'camera__name': 'Gate', 'storage_type': 'local', 'count': 1, 'completed': 0,
+             'failed': 0, 'active': 1, 'size': None, 'duration': None},
+        ]
+        queryset = mock.Mock()
+        queryset.order_by.return_value.values.return_value.annotate.return_value = groups
+
+        stats = compute_recording_stats(queryset)
+
+        self.assertEqual(stats['total_recordings'], 4)
+        self.assertEqual(stats['success_rate'], 50.0)
+        self.assertEqual(stats['total_size_gb'], 3.0)
+        self.assertEqual(stats['total_duration_hours'], 1.0)
+        self.assertEqual(len(stats['per_camera']), 1)
+        self.assertEqual(stats['per_camera'][0]['active_recordings'], 1)
+        self.assertEqual([row['storage_type'] for row in stats['per_storage']], ['gcp', 'local'])
+
+
+@mock.patch('apps.cctv.streaming.safe_save_camera', return_value=True)
+class CameraStreamIndexTest(SimpleTestCase):
+    def test_tracks_streaming_cameras_across_qualities(self, _save):
+        manager = RTSPStreamManager(bus=mock.Mock())
+        camera, other = _fake_camera(), _fake_camera()
+
+        manager.start_stream(camera, 'main')
+        manager.start_stream(camera, 'sub')
+        self.assertTrue(manager.is_camera_streaming(camera.id))
+        self.assertFalse(manager.is_camera_streaming(other.id))
+
+        manager.stop_stream(camera.id, 'main')
+        self.assertTrue(manager.is_camera_streaming(str(camera.id)))
+        manager.stop_stream(camera.id, 'sub')
+        self.assertFalse(manager.is_camera_streaming(camera.id))
+        self.assertEqual(manager.camera_streams, {})
+
+
+class SegmentBoundaryTest(SimpleTestCase):
+    def test_boundaries_are_aligned_to_the_wall_clock(self):
+        with self.settings(TIME_ZONE='UTC'):
+            def at(hour, minute, second=0):
+                return datetime.datetime(2026, 10, 16, hour, minute, second, tzinfo=datetime.timezone.utc)
+
+            self.assertEqual(next_segment_boundary(at(12, 3), 5), at(12, 5))
+            self.assertEqual(next_segment_boundary(at(12, 5), 5), at(12, 10))
+            self.assertEqual(next_segment_boundary(at(12, 4, 59), 5), at(12, 5))
+            self.assertEqual(next_segment_boundary(at(23, 58), 5), at(23, 55) + datetime.timedelta(minutes=5))
+
+
+class RecordingReservationTest(SimpleTestCase):
+    def test_second_start_is_rejected_while_the_first_is_being_set_up(self):
+        manager = RTSPRecordingManager()
+        camera = _fake_camera()
+        rejected = []
+
+        def slow_setup(*args):
+            # A concurrent scheduler job arrives while the first start is still probing
+            with self.assertRaises(Exception):
+                manager.start_segmented_recording(camera)
+            rejected.append(True)
+            self.assertTrue(manager.is_recording(camera.id))
+            return 'recording'
+
+        with mock.patch.object(manager, '_start_segmented_recording', side_effect=slow_setup):
+            self.assertEqual(manager.start_segmented_recording(camera), 'recording')
+
+        self.assertEqual(rejected, [True])
+        self.assertEqual(manager.starting_recordings, set())
+
+    def test_claim_is_released_when_start_fails(self):
+        manager = RTSPRecordingManager()
+        camera = _fake_camera()
+
+        with mock.patch.object(manager, '_start_recording', side_effect=Exception('Cannot connect')):
+            with self.assertRaises(Exception):
+                manager.start_recording(camera)
+
+        self.assertFalse(manager.is_recording(camera.id))
+
+
+class RemuxCommandTest(SimpleTestCase):
+    def test_stream_copy_into_faststart_mp4(self):
+        command = FFmpegRemuxer('rtsp://example', '/tmp/out.mp4', duration_seconds=90, codec='hevc').build_command()
+
+        self.assertEqual(command[command.index('-c:v') + 1], 'copy')
+        self.assertEqual(command[command.index('-t') + 1], '90')
+        self.assertEqual(command[command.index('-tag:v') + 1], 'hvc1')
+        self.assertEqual(command[command.index('-movflags') + 1], '+faststart')
+        self.assertEqual(command[-3:], ['mp4', '-y', '/tmp/out.mp4'])
+
+    def test_matroska_segments_without_mp4_options(self):
+        command = FFmpegRemuxer('rtsp://example', '/tmp/%Y%m%d_%H%M%S.mkv', container='matroska', codec='mjpeg',
+                                segment_seconds=300, segment_list_path='/tmp/segments.csv').build_command()
+
+        self.assertEqual(command[command.index('-segment_time') + 1], '300')
+        self.assertEqual(command[command.index('-segment_format') + 1], 'matroska')
+        self.assertEqual(command[command.index('-segment_list') + 1], '/tmp/segments.csv')
+        self.assertNotIn('-t', command)
+        self.assertNotIn('-tag:v', command)
+        self.assertNotIn('-movflags', command)
+        self.assertNotIn('-segment_format_options', command)
+
+
+@mock.patch('apps.cctv.streaming.Recording')
+class RemuxEngineSelectionTest(SimpleTestCase):
+    def setUp(self):
+        self.manager = RTSPRecordingManager()
+        self.camera = _fake_camera()
+        self.camera.recording_engine = 'remux'
+        self.camera.created_by = None
+        self.file_base = mock.patch.object(self.manager, '_recording_file_base', return_value=('/tmp/rec', 'rec'))
+        self.file_base.start()
+        self.addCleanup(self.file_base.stop)
+
+    def test_uses_remux_engine_when_ffmpeg_is_installed(self, _recording):
+        with mock.patch('apps.cctv.remux.remux_available', return_value=True), \
+                mock.patch.object(self.manager, '_start_remux_recording', return_value='recording') as start_remux:
+            self.assertEqual(self.manager.start_recording(self.camera), 'recording')
+
+        start_remux.assert_called_once()
+
+    def test_falls_back_to_opencv_without_ffmpeg(self, _recording):
+        with mock.patch('apps.cctv.remux.remux_available', return_value=False), \
+                mock.patch('apps.cctv.streaming.OPENCV_AVAILABLE', False), \
+                mock.patch.object(self.manager, '_start_remux_recording') as start_remux:
+            with self.assertRaisesMessage(Exception, 'OpenCV is not available'):
+                self.manager.start_recording(self.camera)
+
+        start_remux.assert_not_called()
+        self.assertFalse(self.manager.is_recording(self.camera.id))
+
+    def test_non_h264_streams_are_copied_into_matroska(self, _recording):
+        self.camera.rtsp_url = 'rtsp://example/main'
+        self.camera.rtsp_url_sub = ''
+        stream = {'codec': 'mjpeg', 'width': 1280, 'height': 720, 'fps': 15}
+
+        with mock.patch('apps.cctv.remux.probe_stream', return_value=stream), \
+                mock.patch('apps.cctv.remux.FFmpegRemuxer') as remuxer, \
+                mock.patch.object(self.manager, '_record_remux'):
+            self.manager._start_remux_recording(self.camera, mock.Mock(), '/tmp/rec', 10)
+
+        remuxer.assert_called_once_with('rtsp://example/main', '/tmp/rec.mkv', duration_seconds=600,
+                                        container='matroska', codec='mjpeg')
+        remuxer.return_value.start.assert_called_once_with()
+        self.assertEqual(self.manager.active_recordings[str(self.camera.id)]['engine'], 'remux')
+
+
+class CameraHealthMonitorTest(SimpleTestCase):
+    def setUp(self):
+        self.monitor = CameraHealthMonitor(max_workers=2, probe_timeout=5, history_size=3)
+        self.addCleanup(self.monitor._executor.shutdown)
+        self.frame_bus = mock.patch('apps.cctv.health_monitor.frame_bus').start()
+        self.frame_bus.get_worker.return_value = None
+        self.check = mock.patch('apps.cctv.health_monitor.connection_health.check').start()
+        self.cameras = mock.patch('apps.cctv.health_monitor.Camera').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _camera(self, **fields):
+        camera = _fake_camera()
+        camera.__dict__.update({'status': 'active', 'is_online': False, 'last_seen': None, **fields})
+        return camera
+
+    def _sweep(self, *cameras):
+        self.cameras.objects.exclude.return_value.exclude.return_value = list(cameras)
+        return self.monitor.sweep()
+
+    def test_streaming_cameras_are_not_probed_and_changes_are_bulk_written(self):
+        streaming, reachable, offline = self._camera(), self._camera(), self._camera(is_online=False)
+        live_worker = mock.Mock(last_update=datetime.datetime.now(datetime.timezone.utc))
+        self.frame_bus.get_worker.side_effect = lambda camera_id, quality: live_worker if camera_id == streaming.id else None
+        self.check.side_effect = lambda url, **kwargs: (str(reachable.id) in url, 'checked')
+
+        summary = self._sweep(streaming, reachable, offline)
+
+        self.assertEqual(self.check.call_count, 2)
+        self.assertEqual((summary['online'], summary['offline'], summary['probed']), (2, 1, 2))
+        self.cameras.objects.bulk_update.assert_called_once_with([streaming, reachable], ['is_online', 'last_seen'])
+        self.cameras.objects.filter.assert_not_called()
+        self.assertTrue(reachable.is_online)
+        self.assertIsNotNone(reachable.last_seen)
+
+    def test_status_changed_during_the_sweep_is_kept(self):
+        camera = self._camera(status='error')
+        self.check.return_value = (True, 'OK')
+        # Someone put the camera into maintenance while it was being probed
+        self.cameras.objects.filter.return_value.update.return_value = 0
+
+        summary = self._sweep(camera)
+
+        self.assertEqual(summary['updated'], 1)
+        self.cameras.objects.bulk_update.assert_called_once_with([camera], ['is_online', 'last_seen'])
+        self.cameras.objects.filter.assert_called_once_with(id=camera.id, status='error')
+        self.cameras.objects.filter.return_value.update.assert_called_once_with(status='active')
+
+    def test_camera_goes_to_error_after_consecutive_failures(self):
+        camera = self._camera(is_online=True)
+        self.check.return_value = (False, 'Connection refused')
+
+        for _ in range(self.monitor.failure_threshold - 1):
+            self._sweep(camera)
+        self.assertEqual((camera.is_online, camera.status), (False, 'active'))
+
+        self._sweep(camera)
+        self.assertEqual(camera.status, 'error')
+        self.cameras.objects.filter.assert_called_once_with(id=camera.id, status='active')
+        self.cameras.objects.filter.return_value.update.assert_called_once_with(status='error')
+
+        self.check.return_value = (True, 'OK')
+        self._sweep(camera)
+        self.assertEqual((camera.is_online, camera.status), (True, 'active'))
+
+        # History is bounded to history_size
+        summary = self.monitor.get_summary(camera.id)
+        self.assertEqual(summary['checks'], 3)
+        self.assertEqual(summary['consecutive_failures'], 0)
+        self.assertEqual([entry['online'] for entry in self.monitor.get_history(camera.id)], [False, False, True])
+
+
+class StreamDisconnectMiddlewareTest(SimpleTestCase):
+    def _run(self, app, disconnect_after_sends):
+        sent = []
+
+        async def run():
+            disconnected = asyncio.Event()
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+                if len(sent) == disconnect_after_sends:
+                    disconnected.set()
+
+            middleware = StreamDisconnectMiddleware(app)
+            await asyncio.wait_for(middleware({'type': 'http', 'path': '/stream/async/'}, receive, send), timeout=2)
+
+        asyncio.run(run())
+        return sent
+
+    def test_endless_stream_is_cancelled_on_disconnect(self):
+        cleaned_up = []
+
+        async def app(scope, receive, send):
+            await receive()
+            await send({'type': 'http.response.start', 'status': 200})
+            try:
+                while True:
+                    await send({'type': 'http.response.body', 'body': b'frame', 'more_body': True})
+                    await asyncio.sleep(0.01)
+            finally:
+                cleaned_up.append(True)
+
+        sent = self._run(app, disconnect_after_sends=3)
+
+        self.assertEqual(cleaned_up, [True])
+        self.assertLessEqual(len(sent), 4)
+
+    def test_completed_response_is_not_cancelled(self):
+        finished = []
+
+        async def app(scope, receive, send):
+            await receive()
+            await send({'type': 'http.response.start', 'status': 200})
+            await send({'type': 'http.response.body', 'body': b'a', 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'b', 'more_body': False})
+            await asyncio.sleep(0.05)
+            finished.append(True)
+
+        self._run(app, disconnect_after_sends=3)
+
+        self.assertEqual(finished, [True])
@@ -0,0 +1,235 @@
+"""
+Post-recording conversion to fast-start, browser-playable MP4.
+
+OpenCV recordings are mp4v/MJPG/XVID in .mp4/.avi files with the moov atom
+at the end, which browsers either cannot play or must download completely
+before starting. Each completed recording is converted to H.264 MP4 with
+``+faststart`` (or fragmented MP4) and replaces the original before it is
+uploaded. H.264 sources are only remuxed; everything else is re-encoded.
+The ffmpeg runs are dispatched to a small, bounded process pool so a burst
+of finished recordings cannot saturate the CPU needed for live ingest.
+"""
+
+import os
+import subprocess
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .remux import FFMPEG_BINARY
+
+logger = logging.getLogger(__name__)
+
+# Codec names as stored on Recording (ffprobe names and OpenCV fourccs) that are already H.264
+H264_CODECS = {'h264', 'avc1', 'x264', 'avc'}
+
+# Written by the stream-copy engine with +faststart already; nothing to do
+FASTSTART_SOURCE_CODECS = {'h264', 'hevc'}
+
+
+def transcode_enabled():
+    """Check whether recordings should be converted after recording"""
+    return getattr(settings, 'RECORDING_TRANSCODE_ENABLED', True) and FFMPEG_BINARY is not None
+
+
+def needs_transcode(file_path, codec):
+    """
+    Check whether a recording still has to be converted.
+
+    Args:
+        file_path: Local path of the recording
+        codec: Recording.codec
+
+    Returns:
+        bool: False for stream-copy MP4 recordings, which are already fast-start
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    return not (extension == '.mp4' and (codec or '').lower() in FASTSTART_SOURCE_CODECS)
+
+
+def build_transcode_command(source_path, target_path, codec, fragmented=False):
+    """
+    Build the ffmpeg command converting a recording to browser-playable MP4.
+
+    Args:
+        source_path: Recording as written by the recorder
+        target_path: Output MP4 path
+        codec: Recording.codec of the source
+        fragmented: Write fragmented MP4 instead of a single moov at the front
+
+    Returns:
+        list: Command line
+    """
+    command = [FFMPEG_BINARY, '-hide_banner', '-nostats', '-loglevel', 'error', '-y', '-i', source_path,
+               '-map', '0:v:0', '-an']
+
+    if (codec or '').lower() in H264_CODECS:
+        command += ['-c:v', 'copy']
+    else:
+        command += [
+            '-c:v', 'libx264',
+            '-preset', getattr(settings, 'RECORDING_TRANSCODE_PRESET', 'veryfast'),
+            '-crf', str(getattr(settings, 'RECORDING_TRANSCODE_CRF', 23)),
+            '-pix_fmt', 'yuv420p',      # Browsers do not decode 4:2:2/4:4:4 H.264
+            '-threads', str(getattr(settings, 'RECORDING_TRANSCODE_THREADS', 2)),
+        ]
+
+    if fragmented:
+        command += ['-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+    else:
+        command += ['-movflags', '+faststart']
+
+    command += ['-f', 'mp4', target_path]
+    return command
+
+
+def run_ffmpeg(command, timeout):
+    """
+    Run one ffmpeg conversion (executed in a pool process).
+
+    Returns:
+        tuple: (returncode, last lines of stderr)
+    """
+    try:
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, timeout=timeout, check=False)
+    except subprocess.TimeoutExpired:
+        return None, f"timed out after {timeout}s"
+    return result.returncode, result.stderr.decode(errors='replace').strip()[-2000:]
+
+
+class RecordingTranscoder:
+    """Converts completed recordings with a bounded pool of ffmpeg processes"""
+
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        Args:
+            max_workers: Conversions running at once (default: settings.RECORDING_TRANSCODE_WORKERS)
+            timeout: Seconds one conversion may take (default: settings.RECORDING_TRANSCODE_TIMEOUT_SECONDS)
+        """
+        self.max_workers = max_workers or getattr(settings, 'RECORDING_TRANSCODE_WORKERS', 1)
+        self.timeout = timeout or getattr(settings, 'RECORDING_TRANSCODE_TIMEOUT_SECONDS', 3600)
+        self.converted_count = 0
+        self.failed_count = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        """Create the process pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                # Spawned (not forked) workers: the server process has many threads
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def run(self, command):
+        """
+        Run an ffmpeg command in the pool and wait for it.
+
+        Returns:
+            tuple: (returncode or None, error output)
+        """
+        try:
+            return self._pool().submit(run_ffmpeg, command, self.timeout).result()
+        except Exception as e:
+            return None, str(e)
+
+    def process(self, recording, local_path):
+        """
+        Convert a recording and replace the original (blocking).
+
+        The Recording row (file_path, codec, file_size) and any queued
+        UploadTask are pointed at the converted file before the original is
+        removed. On failure the original is kept and returned unchanged.
+
+        Args:
+            recording: Completed Recording instance
+            local_path: Absolute local path of the recording
+
+        Returns:
+            str: Local path of the file to keep/upload
+        """
+        if not transcode_enabled() or not needs_transcode(local_path, recording.codec):
+            return local_path
+
+        from .models import Recording, UploadTask
+        from .rollup import schedule_rollup_refresh
+        from .recording_stats import invalidate_recording_stats
+
+        target_path = os.path.splitext(local_path)[0] + '.mp4'
+        temp_path = target_path + '.transcoding'
+        fragmented = getattr(settings, 'RECORDING_TRANSCODE_FRAGMENTED', False)
+        command = build_transcode_command(local_path, temp_path, recording.codec, fragmented=fragmented)
+
+        logger.info(f"🎞️ Converting recording {recording.id} to fast-start H.264 MP4: {os.path.basename(local_path)}")
+        returncode, error_output = self.run(command)
+
+        if returncode != 0 or not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            self.failed_count += 1
+            logger.warning(f"⚠️ Conversion of recording {recording.id} failed, keeping original: {error_output}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return local_path
+
+        os.replace(temp_path, target_path)
+        file_size = os.path.getsize(target_path)
+        codec = 'h264'
+        Recording.objects.filter(id=recording.id).update(
+            file_path=os.path.relpath(target_path, settings.MEDIA_ROOT),
+            codec=codec,
+            file_size=file_size
+        )
+        UploadTask.objects.filter(recording_id=recording.id).update(local_path=target_path)
+        recording.file_path, recording.codec, recording.file_size = \
+            os.path.relpath(target_path, settings.MEDIA_ROOT), codec, file_size
+        # update() sends no post_save, so the rollup and stats are refreshed here
+        schedule_rollup_refresh(recording.camera_id, recording.start_time)
+        invalidate_recording_stats()
+
+        if target_path != local_path:
+            try:
+                os.remove(local_path)
+            except OSError as e:
+                logger.warning(f"Could not remove original recording {local_path}: {str(e)}")
+
+        self.converted_count += 1
+        logger.info(f"✅ Recording {recording.id} converted ({file_size} bytes): {os.path.basename(target_path)}")
+        return target_path
+
+    def submit(self, recording, local_path):
+        """Convert and package a recording in the background (for recordings that stay in local storage)"""
+        from .hls import hls_enabled, package_and_publish
+
+        if not (transcode_enabled() and needs_transcode(local_path, recording.codec)) and not hls_enabled():
+            return
+
+        def convert():
+            from django.db import close_old_connections
+            try:
+                converted_path = self.process(recording, local_path)
+                package_and_publish(recording, converted_path, 'local')
+            except Exception as e:
+                logger.error(f"Error converting recording {recording.id}: {str(e)}")
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=convert, name=f"transcode-{recording.id}", daemon=True).start()
+
+    def stats(self):
+        """Counters for this process"""
+        return {
+            'enabled': transcode_enabled(),
+            'workers': self.max_workers,
+            'converted': self.converted_count,
+            'failed': self.failed_count,
+        }
+
+
+# Global instance
+recording_transcoder = RecordingTranscoder()
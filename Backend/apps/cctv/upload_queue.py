@@ -0,0 +1,349 @@
+"""
+Durable recording upload queue.
+
+Finished recordings are not uploaded by whoever noticed them (recorder
+threads, the Recording post_save signal, the periodic sync job). Each of them
+only adds an ``UploadTask`` row; a fixed pool of worker threads claims due
+tasks with a conditional UPDATE, converts them to fast-start MP4 (see
+transcode.py), uploads them one at a time and reschedules
+failures with exponential backoff. A recording has at most one task, so the
+same file is never uploaded twice, and queued work survives restarts.
+
+A worker refreshes its claim while it converts and uploads, so only a
+worker that really disappeared loses its task, and it records the outcome
+only while it still owns the claim.
+"""
+
+import os
+import socket
+import threading
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Recording, UploadTask
+
+logger = logging.getLogger(__name__)
+
+
+def upload_backoff_seconds(attempts, base_seconds=None, max_seconds=None):
+    """
+    Delay before the next attempt after ``attempts`` failed uploads.
+
+    Args:
+        attempts: Number of failed attempts so far (1 after the first failure)
+        base_seconds: Delay after the first failure (default: settings.UPLOAD_RETRY_BASE_SECONDS)
+        max_seconds: Upper bound for the delay (default: settings.UPLOAD_RETRY_MAX_SECONDS)
+
+    Returns:
+        int: Seconds to wait
+    """
+    base_seconds = base_seconds or getattr(settings, 'UPLOAD_RETRY_BASE_SECONDS', 30)
+    max_seconds = max_seconds or getattr(settings, 'UPLOAD_RETRY_MAX_SECONDS', 3600)
+    return min(base_seconds * 2 ** max(attempts - 1, 0), max_seconds)
+
+
+class UploadQueue:
+    """Fixed-size worker pool draining the UploadTask table"""
+
+    def __init__(self, max_workers=None, poll_interval=None, max_attempts=None, claim_timeout_minutes=None):
+        """
+        Args:
+            max_workers: Number of concurrent uploads (default: settings.UPLOAD_QUEUE_WORKERS)
+            poll_interval: Seconds an idle worker sleeps before looking for due tasks again
+            max_attempts: Failed attempts before a task is given up on
+            claim_timeout_minutes: Age after which an 'uploading' claim is considered abandoned
+        """
+        self.max_workers = max_workers or getattr(settings, 'UPLOAD_QUEUE_WORKERS', 2)
+        self.poll_interval = poll_interval or getattr(settings, 'UPLOAD_QUEUE_POLL_SECONDS', 30)
+        self.max_attempts = max_attempts or getattr(settings, 'UPLOAD_MAX_ATTEMPTS', 8)
+        self.claim_timeout = timedelta(minutes=claim_timeout_minutes or getattr(settings, 'UPLOAD_CLAIM_TIMEOUT_MINUTES', 30))
+
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.uploaded_count = 0
+        self.failed_count = 0
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def cloud_enabled(self):
+        """Check whether a cloud storage backend is configured and available"""
+        if getattr(settings, 'CLOUD_STORAGE_BACKEND', 'LOCAL').upper() == 'LOCAL':
+            return False
+
+        from .storage_service import storage_service
+        return bool(storage_service.use_aws or storage_service.use_gcp)
+
+    def enqueue(self, recording, local_path):
+        """
+        Queue a finished recording for upload.
+
+        Safe to call several times for the same recording: only the first call
+        creates a task, later calls just wake the workers.
+
+        Args:
+            recording: Completed Recording instance
+            local_path: Absolute local path of the recording file
+
+        Returns:
+            UploadTask: The recording's task, or None if cloud storage is not enabled
+        """
+        if not self.cloud_enabled():
+            logger.debug(f"Cloud storage not enabled, keeping recording {recording.id} in local storage")
+            return None
+
+        try:
+            task, created = UploadTask.objects.get_or_create(
+                recording_id=recording.id,
+                defaults={'local_path': local_path}
+            )
+        except IntegrityError:
+            # Another producer created the task between our lookup and insert
+            task, created = UploadTask.objects.get(recording_id=recording.id), False
+
+        if created:
+            logger.info(f"📥 Queued upload for recording {recording.id}: {os.path.basename(local_path)}")
+
+        self.wake()
+        return task
+
+    def wake(self):
+        """Make sure the workers are running and let an idle one look for work now"""
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the worker threads (no-op if they are already running)"""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.max_workers):
+                name = f"upload-worker-{index}"
+                thread = threading.Thread(target=self._run, args=(f"{self.worker_prefix}:{name}",),
+                                          name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, worker_id):
+        """Worker loop: claim and upload due tasks until there are none, then sleep"""
+        while True:
+            try:
+                close_old_connections()
+                task = self.claim_next(worker_id)
+                if task is not None:
+                    self.process(task, worker_id)
+                    continue
+            except Exception as e:
+                logger.error(f"Upload worker {worker_id} error: {str(e)}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claimable(self, now):
+        """Tasks that are due, including ones whose worker disappeared mid-upload"""
+        return Q(status='queued', next_attempt_at__lte=now) | \
+            Q(status='uploading', claimed_at__lt=now - self.claim_timeout)
+
+    def claim_next(self, worker_id):
+        """
+        Atomically claim the next due task.
+
+        The claim is a conditional UPDATE, so when several workers (or
+        processes) race for the same row exactly one of them gets it.
+
+        Returns:
+            UploadTask: The claimed task, or None if nothing is due
+        """
+        now = timezone.now()
+        candidates = UploadTask.objects.filter(self._claimable(now)) \
+            .order_by('next_attempt_at').values_list('id', flat=True)[:self.max_workers * 2]
+
+        for task_id in candidates:
+            claimed = UploadTask.objects.filter(self._claimable(now), id=task_id).update(
+                status='uploading', claimed_by=worker_id, claimed_at=now
+            )
+            if claimed:
+                return UploadTask.objects.select_related('recording', 'recording__camera').get(id=task_id)
+        return None
+
+    def _owns_claim(self, task, worker_id):
+        """Check that the task is still claimed by this worker"""
+        return UploadTask.objects.filter(id=task.id, status='uploading', claimed_by=worker_id).exists()
+
+    def _hold_claim(self, task, worker_id, done):
+        """Refresh the claim until ``done`` is set, so long conversions and uploads are not re-claimed"""
+        interval = self.claim_timeout.total_seconds() / 3
+        try:
+            while not done.wait(interval):
+                refreshed = UploadTask.objects.filter(
+                    id=task.id, status='uploading', claimed_by=worker_id
+                ).update(claimed_at=timezone.now())
+                if not refreshed:
+                    logger.warning(f"Upload task {task.id} is no longer claimed by {worker_id}")
+                    return
+        except Exception as e:
+            logger.error(f"Error refreshing claim of upload task {task.id}: {str(e)}")
+        finally:
+            connections.close_all()
+
+    def process(self, task, worker_id):
+        """
+        Upload one claimed task and record the outcome.
+
+        Returns:
+            bool: True if the recording is now in cloud storage
+        """
+        done = threading.Event()
+        threading.Thread(target=self._hold_claim, args=(task, worker_id, done),
+                         name=f"upload-claim-{task.id}", daemon=True).start()
+        try:
+            return self._process(task, worker_id)
+        finally:
+            done.set()
+
+    def _process(self, task, worker_id):
+        """Convert and upload a task while process() keeps its claim fresh"""
+        recording = task.recording
+        Recording.objects.filter(id=recording.id).update(upload_status='uploading')
+
+        if not os.path.exists(task.local_path):
+            if recording.storage_type != 'local':
+                # Uploaded before this task ran (e.g. by an older producer)
+                return self._complete(task, worker_id, recording.file_path, recording.storage_type)
+            self._fail(task, worker_id, f"File not found: {task.local_path}", retry=False)
+            return False
+
+        try:
+            from .storage_service import storage_service
+            from .transcode import recording_transcoder
+            from .hls import hls_packager
+
+            # Convert to fast-start H.264 MP4 first; the converted file replaces the original
+            local_path = recording_transcoder.process(recording, task.local_path)
+            hls_dir = self._package_hls(recording, local_path)
+
+            if not self._owns_claim(task, worker_id):
+                logger.warning(f"Upload task {task.id} was taken over by another worker, not uploading it again")
+                return False
+
+            logger.info(f"🚀 Uploading recording {recording.id} "
+                        f"(attempt {task.attempts + 1}/{self.max_attempts}, {worker_id})")
+            storage_path, storage_type = storage_service.upload_recording(
+                local_file_path=local_path,
+                recording_id=str(recording.id),
+                camera_id=str(recording.camera_id),
+                filename=os.path.basename(local_path)
+            )
+        except Exception as e:
+            self._fail(task, worker_id, str(e))
+            return False
+
+        # upload_recording falls back to ('<relative path>', 'local') when every backend failed
+        if not storage_path or storage_type == 'local':
+            self._fail(task, worker_id, "Upload to cloud storage failed")
+            return False
+
+        if not self._complete(task, worker_id, storage_path, storage_type):
+            return False
+        if hls_dir:
+            try:
+                hls_packager.publish(recording, hls_dir, storage_type)
+            except Exception as e:
+                logger.error(f"Error storing HLS files of recording {recording.id}: {str(e)}")
+        return True
+
+    def _package_hls(self, recording, local_path):
+        """Package for HLS before the upload removes the local file; failures only cost HLS playback"""
+        from .hls import hls_packager
+
+        try:
+            return hls_packager.package(recording, local_path)
+        except Exception as e:
+            logger.error(f"Error packaging recording {recording.id} for HLS: {str(e)}")
+            return None
+
+    def _complete(self, task, worker_id, storage_path, storage_type):
+        """
+        Point the recording at its cloud copy and close the task.
+
+        Returns:
+            bool: False if another worker took the task over (nothing is written then)
+        """
+        from .recording_stats import invalidate_recording_stats
+        
+        now = timezone.now()
+        with transaction.atomic():
+            closed = UploadTask.objects.filter(id=task.id, claimed_by=worker_id).update(
+                status='completed', claimed_by=None, claimed_at=None, last_error=None, updated_at=now
+            )
+            if not closed:
+                logger.warning(f"Upload task {task.id} was taken over by another worker, discarding this result")
+                return False
+            Recording.objects.filter(id=task.recording_id).update(
+                file_path=storage_path,
+                storage_type=storage_type,
+                upload_status='completed',
+                updated_at=now
+            )
+        # update() sends no post_save; the per-storage stats changed (the hourly rollup does not depend on storage)
+        invalidate_recording_stats()
+        self.uploaded_count += 1
+        logger.info(f"✅ Recording {task.recording_id} uploaded to {storage_type.upper()}: {storage_path}")
+        return True
+
+    def _fail(self, task, worker_id, error, retry=True):
+        """Reschedule a failed task with backoff, or give up on it (only while this worker owns it)"""
+        now = timezone.now()
+        attempts = task.attempts + 1
+        owned = UploadTask.objects.filter(id=task.id, claimed_by=worker_id)
+
+        if retry and attempts < self.max_attempts:
+            delay = upload_backoff_seconds(attempts)
+            if not owned.update(
+                status='queued', attempts=attempts, last_error=error,
+                next_attempt_at=now + timedelta(seconds=delay),
+                claimed_by=None, claimed_at=None, updated_at=now
+            ):
+                logger.warning(f"Upload task {task.id} was taken over by another worker, discarding this failure")
+                return
+            Recording.objects.filter(id=task.recording_id).update(upload_status='pending')
+            logger.warning(f"⚠️ Upload of recording {task.recording_id} failed ({error}), retrying in {delay}s")
+        else:
+            if not owned.update(
+                status='failed', attempts=attempts, last_error=error,
+                claimed_by=None, claimed_at=None, updated_at=now
+            ):
+                logger.warning(f"Upload task {task.id} was taken over by another worker, discarding this failure")
+                return
+            Recording.objects.filter(id=task.recording_id).update(upload_status='failed')
+            self.failed_count += 1
+            logger.error(f"❌ Giving up on upload of recording {task.recording_id} after {attempts} attempts: {error}")
+
+    def stats(self):
+        """Queue depth per status plus counters for this process"""
+        counts = dict(UploadTask.objects.values_list('status').annotate(count=Count('id')))
+        return {
+            'queued': counts.get('queued', 0),
+            'uploading': counts.get('uploading', 0),
+            'completed': counts.get('completed', 0),
+            'failed': counts.get('failed', 0),
+            'workers': sum(thread.is_alive() for thread in self._threads),
+            'uploaded_by_this_process': self.uploaded_count,
+            'failed_in_this_process': self.failed_count,
+        }
+
+
+def enqueue_recording_upload(recording, local_path):
+    """Queue a finished recording for upload (see UploadQueue.enqueue)"""
+    try:
+        return upload_queue.enqueue(recording, local_path)
+    except Exception as e:
+        logger.error(f"Error queueing upload for recording {recording.id}: {str(e)}")
+        return None
+
+
+# Global instance
+upload_queue = UploadQueue()
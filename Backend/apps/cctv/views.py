@@ -2,16 +2,18 @@
 Views for CCTV camera management
 """
 
-from django.http import StreamingHttpResponse, HttpResponse, JsonResponse
+from django.http import StreamingHttpResponse, HttpResponse, JsonResponse, Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
+import os
 import uuid
 import json
 import logging
@@ -25,6 +27,7 @@ from .serializers import (
 )
 from .streaming import stream_manager, recording_manager, test_camera_connection, generate_frames
 from .scheduler import recording_scheduler
+from .range_serving import serve_media_file
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -94,6 +97,13 @@ class CameraViewSet(viewsets.ModelViewSet):
         camera = self.get_object()
         quality = request.GET.get('quality', 'main')
         
+        from .frame_bus import resolve_stream_width
+        try:
+            width = int(request.GET.get('width', 0)) or None
+        except ValueError:
+            width = None
+        width = resolve_stream_width(request.GET.get('tier'), width)
+        
         try:
             # Create live stream session
             session_id = str(uuid.uuid4())
@@ -107,7 +117,7 @@ class CameraViewSet(viewsets.ModelViewSet):
             
             # Generate streaming response
             response = StreamingHttpResponse(
-                generate_frames(camera, quality),
+                generate_frames(camera, quality, width),
                 content_type='multipart/x-mixed-replace; boundary=frame'
             )
             
@@ -609,10 +619,8 @@ class RecordingViewSet(viewsets.ModelViewSet):
         recording = self.get_object()
         
         try:
-            from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
+            from django.http import HttpResponseRedirect
             from .storage_service import storage_service
-            import tempfile
-            import os
             
             logger.info(f"Download request for recording {recording.id}: {recording.name}")
             
@@ -621,15 +629,16 @@ class RecordingViewSet(viewsets.ModelViewSet):
                 logger.error(f"Recording file not found: {recording.file_path}")
                 raise Http404("Recording file not found")
             
-            # If using GCP storage, redirect to signed URL for direct download
-            if recording.storage_type == 'gcp' or getattr(settings, 'GCP_STORAGE_USE_GCS', False):
-                logger.info(f"Generating GCP download URL for: {recording.file_path}")
+            # Cloud recordings: redirect to a signed URL for direct download
+            if recording.storage_type != 'local' or getattr(settings, 'GCP_STORAGE_USE_GCS', False):
+                logger.info(f"Generating {recording.storage_type.upper()} download URL for: {recording.file_path}")
                 
                 # Generate signed URL with longer expiration for downloads (2 hours)
                 signed_url = storage_service.get_file_url(
                     recording.file_path, 
                     signed=True, 
-                    expiration_minutes=120
+                    expiration_minutes=120,
+                    storage_type=recording.storage_type
                 )
                 
                 if signed_url:
@@ -647,45 +656,17 @@ class RecordingViewSet(viewsets.ModelViewSet):
                         'file_path': recording.file_path
                     }, status=500)
             
-            # For local storage, serve file directly
-            temp_file_path = storage_service.download_file_to_temp(recording.file_path)
-            if not temp_file_path:
-                logger.error(f"Failed to get temp file for {recording.file_path}")
-                raise Http404("Recording file not found")
-            
-            # Determine content type and filename based on actual file extension
-            file_extension = os.path.splitext(recording.file_path)[1].lower()
-            
-            # Map file extensions to content types
-            content_type_map = {
-                '.mp4': 'video/mp4',
-                '.avi': 'video/x-msvideo',
-                '.mov': 'video/quicktime',
-                '.mkv': 'video/x-matroska'
-            }
-            
-            content_type = content_type_map.get(file_extension, 'video/mp4')  # Default to MP4
-            safe_filename = f"{recording.name}{file_extension}"  # Use actual extension
-            
-            # Create file response
-            response = FileResponse(
-                open(temp_file_path, 'rb'),
-                content_type=content_type,
-                as_attachment=True,
-                filename=safe_filename
+            # Local recordings are served straight from MEDIA_ROOT with byte-range support
+            return serve_media_file(
+                request,
+                recording.file_path,
+                content_type=self._get_content_type_for_file(recording.file_path),
+                filename=f"{recording.name}{os.path.splitext(recording.file_path)[1].lower()}",
+                as_attachment=True
             )
             
-            # Clean up temp file after response
-            def cleanup_temp_file():
-                try:
-                    os.remove(temp_file_path)
-                except:
-                    pass
-            
-            response.closed = cleanup_temp_file
-            
-            return response
-            
+        except Http404:
+            raise
         except Exception as e:
             logger.error(f"Error downloading recording {recording.id}: {str(e)}")
             return Response(
@@ -717,9 +698,8 @@ class RecordingViewSet(viewsets.ModelViewSet):
         recording = self.get_object()
         
         try:
-            from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
+            from django.http import HttpResponseRedirect
             from .storage_service import storage_service
-            import os
             
             logger.info(f"Stream request for recording {recording.id}: {recording.name}")
             
@@ -728,15 +708,16 @@ class RecordingViewSet(viewsets.ModelViewSet):
                 logger.error(f"Recording file not found for streaming: {recording.file_path}")
                 raise Http404("Recording file not found")
             
-            # If using GCP storage, redirect to signed URL for streaming
-            if recording.storage_type == 'gcp' or getattr(settings, 'GCP_STORAGE_USE_GCS', False):
-                logger.info(f"Generating GCP streaming URL for: {recording.file_path}")
+            # Cloud recordings: redirect to a signed URL; the storage service handles Range requests
+            if recording.storage_type != 'local' or getattr(settings, 'GCP_STORAGE_USE_GCS', False):
+                logger.info(f"Generating {recording.storage_type.upper()} streaming URL for: {recording.file_path}")
                 
                 # Generate signed URL with longer expiration for streaming (2 hours)
                 signed_url = storage_service.get_file_url(
                     recording.file_path, 
                     signed=True, 
-                    expiration_minutes=120
+                    expiration_minutes=120,
+                    storage_type=recording.storage_type
                 )
                 
                 if signed_url:
@@ -761,44 +742,15 @@ class RecordingViewSet(viewsets.ModelViewSet):
                         'file_path': recording.file_path
                     }, status=500)
             
-            # For local storage, stream file directly
-            temp_file_path = storage_service.download_file_to_temp(recording.file_path)
-            if not temp_file_path:
-                raise Http404("Recording file not found")
-            
-            # Determine content type based on actual file extension
-            file_extension = os.path.splitext(recording.file_path)[1].lower()
-            content_type_map = {
-                '.mp4': 'video/mp4',
-                '.avi': 'video/x-msvideo',
-                '.mov': 'video/quicktime',
-                '.mkv': 'video/x-matroska'
-            }
-            content_type = content_type_map.get(file_extension, 'video/mp4')  # Default to MP4
-            
-            # Create file response for streaming
-            response = FileResponse(
-                open(temp_file_path, 'rb'),
-                content_type=content_type
+            # Local recordings are served straight from MEDIA_ROOT; the browser seeks with Range requests
+            return serve_media_file(
+                request,
+                recording.file_path,
+                content_type=self._get_content_type_for_file(recording.file_path)
             )
             
-            # Add headers for video streaming
-            response['Accept-Ranges'] = 'bytes'
-            file_size = storage_service.get_file_size(recording.file_path)
-            if file_size:
-                response['Content-Length'] = file_size
-            
-            # Clean up temp file after response
-            def cleanup_temp_file():
-                try:
-                    os.remove(temp_file_path)
-                except:
-                    pass
-            
-            response.closed = cleanup_temp_file
-            
-            return response
-            
+        except Http404:
+            raise
         except Exception as e:
             logger.error(f"Error streaming recording {recording.id}: {str(e)}")
             return Response(
@@ -815,30 +767,8 @@ class RecordingViewSet(viewsets.ModelViewSet):
     def stats(self, request):
         """Get recording statistics"""
         try:
-            recordings = self.get_queryset()
-            
-            total_recordings = recordings.count()
-            completed_recordings = recordings.filter(status='completed').count()
-            failed_recordings = recordings.filter(status='failed').count()
-            recording_recordings = recordings.filter(status='recording').count()
-            
-            total_size = sum(r.file_size for r in recordings if r.file_size)
-            total_duration = sum(
-                (r.duration.total_seconds() for r in recordings if r.duration), 
-                start=0
-            )
-            
-            return Response({
-                'total_recordings': total_recordings,
-                'completed_recordings': completed_recordings,
-                'failed_recordings': failed_recordings,
-                'active_recordings': recording_recordings,
-                'total_size_bytes': total_size,
-                'total_size_gb': round(total_size / (1024**3), 2),
-                'total_duration_seconds': total_duration,
-                'total_duration_hours': round(total_duration / 3600, 2),
-                'success_rate': round((completed_recordings / total_recordings * 100), 2) if total_recordings > 0 else 0
-            })
+            from .recording_stats import compute_recording_stats
+            return Response(compute_recording_stats(self.get_queryset()))
             
         except Exception as e:
             logger.error(f"Error getting recording stats: {str(e)}")
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.cctv.asgi_middleware import StreamDisconnectMiddleware
+
+# Ends the async live stream when the viewer disconnects (Django 4.2 does not)
+application = StreamDisconnectMiddleware(django_application)
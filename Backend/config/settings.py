@@ -236,6 +236,58 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# ================================
+# Recording Configuration
+# ================================
+RECORDING_SEGMENT_MINUTES = 5        # Continuous recordings roll to a new file every N minutes (wall-clock aligned)
+RECORDING_TRANSCODE_ENABLED = True   # Convert finished recordings to fast-start H.264 MP4 before upload (needs ffmpeg)
+RECORDING_TRANSCODE_WORKERS = 1      # ffmpeg conversions running at once (process pool size)
+RECORDING_TRANSCODE_THREADS = 2      # Encoder threads per conversion
+RECORDING_TRANSCODE_PRESET = 'veryfast'  # libx264 preset
+RECORDING_TRANSCODE_CRF = 23         # libx264 quality (lower = better, larger)
+RECORDING_TRANSCODE_FRAGMENTED = False  # Write fragmented MP4 instead of moving the moov atom to the front
+RECORDING_TRANSCODE_TIMEOUT_SECONDS = 3600  # Give up on a conversion after this long and keep the original
+RECORDING_HLS_ENABLED = False        # Also package recordings as HLS (segments + playlists next to the recording)
+RECORDING_HLS_SEGMENT_SECONDS = 4    # Target HLS segment duration
+RECORDING_HLS_RENDITIONS = []        # Extra lower-bitrate renditions as (height, kbps), e.g. [(480, 800), (240, 300)]
+LIVE_HLS_ENABLED = False             # Offer /cameras/{id}/live/playlist/ (remuxed live HLS) next to MJPEG; needs ffmpeg
+LIVE_HLS_ROOT = os.path.join(MEDIA_ROOT, 'live')  # Live segments, served as static files
+LIVE_HLS_URL = f"{MEDIA_URL}live/"   # URL LIVE_HLS_ROOT is served under (nginx location or CDN)
+LIVE_HLS_SEGMENT_SECONDS = 2         # Segment length; glass-to-glass latency is about three segments
+LIVE_HLS_LIST_SIZE = 6               # Segments kept in the live playlist
+LIVE_HLS_IDLE_SECONDS = 60           # Stop a camera's packager when its playlist was not requested for this long
+LIVE_HLS_START_TIMEOUT_SECONDS = 10  # How long the first playlist request waits for the first segment
+
+# ================================
+# Camera Health Monitor
+# ================================
+CAMERA_HEALTH_CHECK_INTERVAL = 60    # Seconds between health sweeps over all cameras
+CAMERA_HEALTH_MAX_WORKERS = 8        # Cameras probed concurrently
+CAMERA_HEALTH_PROBE_TIMEOUT = 20     # Seconds before a single probe counts as failed
+CAMERA_HEALTH_HISTORY_SIZE = 60      # Probe results kept per camera for latency history
+CAMERA_STATUS_FLUSH_MS = 500         # Camera status changes are batched and written every N ms
+
+# ================================
+# Recording Upload Queue
+# ================================
+UPLOAD_QUEUE_WORKERS = 2             # Recordings uploaded concurrently
+UPLOAD_QUEUE_POLL_SECONDS = 30       # Idle workers look for due uploads this often
+UPLOAD_MAX_ATTEMPTS = 8              # Failed attempts before an upload is marked failed
+UPLOAD_RETRY_BASE_SECONDS = 30       # Backoff after the first failure, doubled on each further failure
+UPLOAD_RETRY_MAX_SECONDS = 3600      # Longest wait between two attempts
+UPLOAD_CLAIM_TIMEOUT_MINUTES = 30    # A claim not refreshed for this long (worker died) is picked up again
+UPLOAD_PART_SIZE_MB = 8              # Files larger than this are uploaded in resumable parts of this size
+UPLOAD_MAX_CONCURRENCY = 4           # Parts of one S3 upload sent in parallel
+UPLOAD_BANDWIDTH_LIMIT_KBPS = 0      # Combined upload rate cap in kilobytes per second (0 = unlimited)
+UPLOAD_STATE_DIR = os.path.join(BASE_DIR, 'upload_state')  # Progress of interrupted uploads, for resuming
+SIGNED_URL_CACHE_SIZE = 10000        # Signed recording URLs kept and reused until close to expiry
+STORAGE_RECONCILE_INTERVAL_MINUTES = 360  # How often the storage index is re-checked against bucket listings
+STORAGE_RECONCILE_MAX_KEYS = 100000  # Most objects listed per camera prefix; larger prefixes are not pruned
+DASHBOARD_ANALYTICS_CACHE_SECONDS = 60  # How long dashboard chart data is reused before the rollups are read again
+RECORDING_STATS_CACHE_SECONDS = 300   # Upper bound on cached recording stats (also dropped whenever a recording changes)
+RECORDING_SENDFILE_BACKEND = os.getenv('RECORDING_SENDFILE_BACKEND', '')  # '' (Django serves), 'nginx' (X-Accel-Redirect) or 'xsendfile'
+RECORDING_SENDFILE_URL_PREFIX = '/protected-media/'  # nginx 'internal' location aliased to MEDIA_ROOT
+
 # ================================
 # Cloud Storage Configuration
 # ================================
@@ -4,6 +4,8 @@ Camera manager for health monitoring and connection testing
 import cv2
 import logging
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Optional, List
 import httpx
@@ -25,6 +27,10 @@ class CameraManager:
         self.cameras: Dict[str, CameraSchema] = {}
         self.camera_status: Dict[str, Dict] = {}
         self.health_check_interval = 300  # 5 minutes
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.HEALTH_CHECK_CONCURRENCY,
+            thread_name_prefix='camera-health'
+        )
     
     def update_cameras(self, cameras: List[CameraSchema]):
         """Update camera list"""
@@ -65,27 +71,35 @@ class CameraManager:
         
         logger.info(f"Cameras updated: {len(self.cameras)} total ({added_count} processed)")
     
-    async def check_camera_health(self, camera: CameraSchema) -> bool:
-        """Check if camera is accessible"""
-        camera_id = str(camera.id)
-        
+    def _probe_camera(self, rtsp_url: str) -> bool:
+        """Open the RTSP stream and try to read a frame (blocking, runs in a worker thread)"""
+        cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
         try:
-            logger.debug(f"Health check for camera {camera.name}")
-            
-            # Try to connect to RTSP stream
-            cap = cv2.VideoCapture(camera.rtsp_url, cv2.CAP_FFMPEG)
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
-            # Try to read a frame with timeout
-            success = False
+            # Try to read a frame
             for attempt in range(3):
                 ret, frame = cap.read()
                 if ret and frame is not None:
-                    success = True
-                    break
-                await asyncio.sleep(0.5)
-            
+                    return True
+                time.sleep(0.5)
+            return False
+        finally:
             cap.release()
+    
+    async def check_camera_health(self, camera: CameraSchema) -> bool:
+        """Check if camera is accessible"""
+        camera_id = str(camera.id)
+        
+        try:
+            logger.debug(f"Health check for camera {camera.name}")
+            
+            # cv2 calls block, so keep them off the event loop and bound how long they may take
+            loop = asyncio.get_running_loop()
+            success = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._probe_camera, camera.rtsp_url),
+                timeout=config.HEALTH_CHECK_TIMEOUT_SECONDS
+            )
             
             if success:
                 self.camera_status[camera_id]['status'] = 'online'
@@ -100,6 +114,12 @@ class CameraManager:
             self.camera_status[camera_id]['last_check'] = datetime.now()
             return success
             
+        except asyncio.TimeoutError:
+            logger.warning(f"Health check for camera {camera.name} timed out")
+            self.camera_status[camera_id]['status'] = 'offline'
+            self.camera_status[camera_id]['consecutive_failures'] += 1
+            self.camera_status[camera_id]['last_check'] = datetime.now()
+            return False
         except Exception as e:
             logger.error(f"Error checking camera {camera.name}: {str(e)}")
             self.camera_status[camera_id]['status'] = 'error'
@@ -114,9 +134,16 @@ class CameraManager:
         
         logger.debug(f"Checking health of {len(self.cameras)} cameras")
         
+        # Bound the number of RTSP sessions opened at the same time
+        semaphore = asyncio.Semaphore(config.HEALTH_CHECK_CONCURRENCY)
+        
+        async def check_with_limit(camera):
+            async with semaphore:
+                return await self.check_camera_health(camera)
+        
         tasks = [
-            self.check_camera_health(camera)
-            for camera in self.cameras.values()
+            check_with_limit(camera)
+            for camera in list(self.cameras.values())
         ]
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -57,12 +57,20 @@ class Config:
     # System Settings
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
     MAX_CONCURRENT_RECORDINGS: int = int(os.getenv('MAX_CONCURRENT_RECORDINGS', '4'))
+    HEALTH_CHECK_CONCURRENCY: int = int(os.getenv('HEALTH_CHECK_CONCURRENCY', '4'))
+    HEALTH_CHECK_TIMEOUT_SECONDS: int = int(os.getenv('HEALTH_CHECK_TIMEOUT_SECONDS', '15'))
+    UPLOAD_CHUNK_SIZE_MB: int = int(os.getenv('UPLOAD_CHUNK_SIZE_MB', '8'))
+    UPLOAD_BANDWIDTH_LIMIT_KBPS: int = int(os.getenv('UPLOAD_BANDWIDTH_LIMIT_KBPS', '0'))
+    LIVE_UPLOAD_ENABLED: bool = os.getenv('LIVE_UPLOAD_ENABLED', 'false').lower() == 'true'
+    LIVE_UPLOAD_SEGMENT_SECONDS: int = int(os.getenv('LIVE_UPLOAD_SEGMENT_SECONDS', '30'))
+    LIVE_UPLOAD_FINISH_TIMEOUT_SECONDS: int = int(os.getenv('LIVE_UPLOAD_FINISH_TIMEOUT_SECONDS', '120'))
     
     # File paths
     CACHE_DIR: Path = Path(RECORDING_BASE_DIR) / 'cache'
     LOGS_DIR: Path = Path(RECORDING_BASE_DIR) / 'logs'
     RECORDINGS_DIR: Path = Path(RECORDING_BASE_DIR) / 'recordings'
     PENDING_UPLOADS_DIR: Path = Path(RECORDING_BASE_DIR) / 'pending_uploads'
+    UPLOAD_STATE_DIR: Path = Path(RECORDING_BASE_DIR) / 'cache' / 'uploads'
     
     @classmethod
     def validate(cls) -> Tuple[bool, List[str]]:
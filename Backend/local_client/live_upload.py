@@ -0,0 +1,90 @@
+"""
+Live upload of recordings while they are still being recorded
+Each finished segment is appended to the recording's object in the bucket
+in order, so at most one segment of footage exists only on this machine and
+a stopped recording is finalized as soon as its last segment is sent
+"""
+
+import logging
+import queue
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class LiveUploader:
+    """Appends a recording's finished segments to one bucket object, in order"""
+
+    def __init__(self, storage_manager, gcp_path: str, retry_delay: float = 5.0, max_retry_delay: float = 60.0):
+        self.storage_manager = storage_manager
+        self.gcp_path = gcp_path
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.segments: list[Path] = []
+        self.uploaded = 0
+        self.committed_size = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._abandon = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"live-upload-{Path(gcp_path).name}", daemon=True)
+        self._thread.start()
+
+    def add_segment(self, segment_path: Path):
+        """Queue a segment ffmpeg has finished writing"""
+        self.segments.append(segment_path)
+        self._queue.put(segment_path)
+
+    def _run(self):
+        """Upload queued segments one by one, retrying each until it is stored"""
+        while True:
+            segment_path = self._queue.get()
+            if segment_path is None:
+                return
+
+            delay = self.retry_delay
+            while not self._abandon.is_set():
+                try:
+                    self.committed_size = self.storage_manager.append_segment(
+                        self.gcp_path, segment_path, self.committed_size
+                    )
+                    self.uploaded += 1
+                    logger.debug(f"Live upload {self.gcp_path}: segment {self.uploaded} stored ({self.committed_size} bytes)")
+                    break
+                except Exception as e:
+                    # Later segments must not overtake this one, so keep retrying it
+                    self.last_error = str(e)
+                    logger.warning(f"Live upload of {segment_path.name} failed, retrying in {delay:.0f}s: {str(e)}")
+                    self._abandon.wait(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+
+            if self._abandon.is_set():
+                return
+
+    def finish(self, timeout: float):
+        """
+        Wait for the remaining segments after the recording stopped (blocking)
+
+        Returns:
+            Tuple of (gcp_path, success); on failure the caller uploads the whole file instead
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+        if self._thread.is_alive():
+            self._abandon.set()
+            logger.warning(f"Live upload {self.gcp_path} did not finish in {timeout}s: {self.last_error}")
+            return None, False
+
+        success = bool(self.segments) and self.uploaded == len(self.segments)
+        return (self.gcp_path, True) if success else (None, False)
+
+    def stats(self) -> dict:
+        """Progress for status reporting"""
+        return {
+            'gcp_path': self.gcp_path,
+            'segments': len(self.segments),
+            'uploaded': self.uploaded,
+            'bytes_uploaded': self.committed_size,
+            'last_error': self.last_error,
+        }
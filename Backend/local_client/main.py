@@ -188,9 +188,29 @@ async def handle_recording_completion(recording_info: Dict[str, Any]):
             )
             return
         
-        # Upload to GCP if storage manager is available
+        # Live-upload recordings only need their last segments sent
         gcp_path = None
-        if storage_manager.is_available():
+        uploader = recording_info.get('live_upload')
+        if uploader is not None:
+            loop = asyncio.get_running_loop()
+            gcp_path, live_success = await loop.run_in_executor(
+                None, uploader.finish, config.LIVE_UPLOAD_FINISH_TIMEOUT_SECONDS
+            )
+            
+            if live_success:
+                logger.info(f"Recording {recording_id} live-uploaded to GCP: {gcp_path} ({uploader.uploaded} segments)")
+                if config.CLEANUP_AFTER_UPLOAD:
+                    await loop.run_in_executor(None, recording_manager.discard_segments, recording_info)
+                else:
+                    await loop.run_in_executor(None, recording_manager.assemble_segments, recording_info)
+            else:
+                logger.warning(f"Live upload of recording {recording_id} incomplete, uploading the whole file")
+                file_path = await loop.run_in_executor(None, recording_manager.assemble_segments, recording_info)
+        
+        # Upload to GCP if storage manager is available (and the file was not live-uploaded)
+        if gcp_path:
+            logger.debug(f"Recording {recording_id} already in GCP")
+        elif storage_manager.is_available():
             gcp_path, upload_success = await storage_manager.upload_recording(
                 local_path=file_path,
                 recording_id=recording_id,
@@ -245,8 +265,8 @@ async def lifespan(app: FastAPI):
     
     # Initialize managers
     api_client = BackendAPIClient()
-    recording_manager = RecordingManager()
     storage_manager = StorageManager()
+    recording_manager = RecordingManager(storage_manager=storage_manager)
     camera_manager = CameraManager()
     
     scheduler_manager = SchedulerManager(recording_callback=execute_recording)
@@ -360,6 +380,8 @@ async def get_status():
                     "camera_name": info['camera'].name if 'camera' in info and hasattr(info['camera'], 'name') else 'Unknown',
                     "recording_id": info.get('recording_id', 'unknown'),
                     "frames": info.get('frame_count', 0),
+                    "pacing": info['pacer'].stats() if info.get('pacer') else None,
+                    "live_upload": info['live_upload'].stats() if info.get('live_upload') else None,
                     "started": info['start_time'].isoformat() if 'start_time' in info else datetime.now().isoformat()
                 })
             except Exception as e:
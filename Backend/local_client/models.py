@@ -17,6 +17,7 @@ class CameraSchema(BaseModel):
     camera_type: str = "rtsp"
     location: Optional[str] = None
     record_quality: str = "medium"
+    recording_engine: str = "opencv"  # opencv (re-encode) or remux (ffmpeg stream copy)
     
     class Config:
         from_attributes = True
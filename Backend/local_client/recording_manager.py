@@ -1,6 +1,8 @@
 """
 Recording manager for local client
-Handles OpenCV-based video recording from RTSP streams
+Handles OpenCV-based video recording from RTSP streams, or stream-copy
+recording through ffmpeg for cameras using the 'remux' engine, optionally
+uploading finished segments while the recording is still running
 """
 import warnings
 import logging
@@ -13,6 +15,7 @@ warnings.filterwarnings('ignore', message='.*tag.*')
 warnings.filterwarnings('ignore', message='.*fallback.*')
 
 import cv2
+import shutil
 import threading
 import time
 from pathlib import Path
@@ -26,9 +29,15 @@ logging.getLogger('cv2').setLevel(logging.ERROR)
 try:
     from .config import config
     from .models import CameraSchema
+    from .remux import FFmpegRemuxer, probe_stream, remux_available, read_completed_segments, REMUX_CONTAINERS
+    from .pacing import FramePacer
+    from .live_upload import LiveUploader
 except ImportError:
     from config import config
     from models import CameraSchema
+    from remux import FFmpegRemuxer, probe_stream, remux_available, read_completed_segments, REMUX_CONTAINERS
+    from pacing import FramePacer
+    from live_upload import LiveUploader
 
 logger = logging.getLogger(__name__)
 
@@ -36,10 +45,15 @@ logger = logging.getLogger(__name__)
 class RecordingManager:
     """Manages video recordings from cameras"""
     
-    def __init__(self):
+    def __init__(self, storage_manager=None):
         self.active_recordings: Dict[str, Dict[str, Any]] = {}
         self.recording_locks = {}
         self.completed_recordings = []
+        self.storage_manager = storage_manager
+    
+    def _live_upload_available(self) -> bool:
+        """Check whether recordings can be uploaded while they are running"""
+        return config.LIVE_UPLOAD_ENABLED and self.storage_manager is not None and self.storage_manager.is_available()
         
     def start_recording(
         self,
@@ -79,6 +93,17 @@ class RecordingManager:
             filename_base = f"recording_{timestamp}"
             file_path = camera_dir / f"{filename_base}.avi"
             
+            if camera.recording_engine == 'remux':
+                if remux_available():
+                    return self._start_remux_recording(
+                        camera, recording_id, camera_dir, filename_base, duration_minutes, schedule_id
+                    )
+                logger.warning(f"ffmpeg not found, falling back to OpenCV recording for camera {camera.name}")
+            
+            if self._live_upload_available():
+                # OpenCV files are only valid once closed, so they cannot be sent in pieces
+                logger.info(f"Camera {camera.name} records with OpenCV; it will be uploaded when the recording ends")
+            
             logger.info(f"Starting recording for camera {camera.name}: {file_path}")
             
             # Open camera stream
@@ -149,7 +174,8 @@ class RecordingManager:
                 'duration_minutes': duration_minutes,
                 'frame_count': 0,
                 'schedule_id': schedule_id,
-                'codec': used_codec
+                'codec': used_codec,
+                'pacer': FramePacer(fps)
             }
             
             # Start recording thread
@@ -167,6 +193,160 @@ class RecordingManager:
             logger.error(f"Error starting recording for camera {camera.name}: {str(e)}")
             return False
     
+    def _start_remux_recording(
+        self,
+        camera: CameraSchema,
+        recording_id: str,
+        camera_dir: Path,
+        filename_base: str,
+        duration_minutes: Optional[int],
+        schedule_id: Optional[str]
+    ) -> bool:
+        """Start a stream-copy recording (ffmpeg -c copy) for a camera"""
+        camera_id = str(camera.id)
+        
+        rtsp_url = camera.rtsp_url
+        stream_props = probe_stream(rtsp_url)
+        if not stream_props['codec'] and camera.rtsp_url_sub:
+            logger.warning(f"Could not probe main stream for camera {camera.name}, trying sub stream")
+            rtsp_url = camera.rtsp_url_sub
+            stream_props = probe_stream(rtsp_url)
+        
+        live_upload = self._live_upload_available()
+        if live_upload:
+            # MPEG-TS segments can be appended to each other, both in the bucket and locally
+            container = 'mpegts'
+        else:
+            # H.264/H.265 go into MP4; anything else is safer in Matroska
+            container = 'mp4' if stream_props['codec'] in (None, 'h264', 'hevc') else 'matroska'
+        file_path = camera_dir / f"{filename_base}{REMUX_CONTAINERS[container]}"
+        fps = stream_props['fps'] or 25
+        
+        segment_list_path = camera_dir / f"{filename_base}_segments.csv" if live_upload else None
+        remuxer = FFmpegRemuxer(
+            rtsp_url,
+            camera_dir / f"{filename_base}_%Y%m%d_%H%M%S.ts" if live_upload else file_path,
+            duration_seconds=duration_minutes * 60 if duration_minutes else None,
+            container=container,
+            codec=stream_props['codec'],
+            segment_seconds=config.LIVE_UPLOAD_SEGMENT_SECONDS if live_upload else None,
+            segment_list_path=segment_list_path
+        )
+        remuxer.start()
+        
+        logger.info(
+            f"Stream-copy recording for camera {camera.name}: {file_path} "
+            f"({stream_props['width']}x{stream_props['height']} @ {fps}fps, codec {stream_props['codec']})"
+        )
+        
+        self.active_recordings[camera_id] = {
+            'recording_id': recording_id,
+            'camera': camera,
+            'engine': 'remux',
+            'remuxer': remuxer,
+            'file_path': file_path,
+            'start_time': datetime.now(),
+            'duration_minutes': duration_minutes,
+            'frame_count': 0,
+            'fps': fps,
+            'resolution': f"{stream_props['width']}x{stream_props['height']}" if stream_props['width'] else None,
+            'schedule_id': schedule_id,
+            'codec': stream_props['codec'] or 'copy',
+            'segment_list': segment_list_path,
+            'segments_seen': 0,
+            'live_upload': LiveUploader(
+                self.storage_manager, self.storage_manager.build_path(camera_id, file_path.name)
+            ) if live_upload else None
+        }
+        
+        thread = threading.Thread(
+            target=self._record_remux,
+            args=(camera_id,),
+            daemon=True
+        )
+        thread.start()
+        
+        logger.info(f"Recording started for camera {camera.name} (ID: {recording_id})")
+        return True
+    
+    def _record_remux(self, camera_id: str):
+        """Supervise an ffmpeg stream-copy recording in a separate thread"""
+        recording_info = self.active_recordings.get(camera_id)
+        if not recording_info:
+            return
+        
+        remuxer = recording_info['remuxer']
+        recording_id = recording_info['recording_id']
+        start_time = recording_info['start_time']
+        fps = recording_info['fps']
+        
+        try:
+            # ffmpeg stops itself at the duration limit (-t); stop_recording
+            # removes the entry from active_recordings to end it early
+            while camera_id in self.active_recordings and remuxer.is_running():
+                recording_info['frame_count'] = int((datetime.now() - start_time).total_seconds() * fps)
+                self._collect_segments(recording_info)
+                remuxer.wait(timeout=1)
+        except Exception as e:
+            logger.error(f"Critical error during recording {recording_id}: {str(e)}")
+        finally:
+            returncode = remuxer.stop()
+            if returncode not in (0, None, 255) and remuxer.error_output:
+                logger.warning(f"ffmpeg exited with {returncode} for recording {recording_id}: {remuxer.error_output}")
+            
+            # ffmpeg closes the last segment on exit
+            self._collect_segments(recording_info)
+            
+            frames_written = int((datetime.now() - start_time).total_seconds() * fps)
+            self._finish_recording(camera_id, recording_info, frames_written)
+    
+    def _collect_segments(self, recording_info: Dict[str, Any]):
+        """Hand segments ffmpeg has finished to the live uploader"""
+        uploader = recording_info.get('live_upload')
+        if uploader is None:
+            return
+        
+        segment_dir = recording_info['file_path'].parent
+        for name, _start, _end in read_completed_segments(recording_info['segment_list'], recording_info['segments_seen']):
+            recording_info['segments_seen'] += 1
+            if name:
+                uploader.add_segment(segment_dir / name)
+    
+    def assemble_segments(self, recording_info: Dict[str, Any]) -> Path:
+        """
+        Join a live-upload recording's segments into its single local file (blocking)
+        
+        Returns:
+            Path of the assembled file
+        """
+        uploader = recording_info.get('live_upload')
+        file_path = recording_info['file_path']
+        if uploader is None:
+            return file_path
+        
+        with open(file_path, 'wb') as output:
+            for segment_path in uploader.segments:
+                if segment_path.exists():
+                    with open(segment_path, 'rb') as segment:
+                        shutil.copyfileobj(segment, output)
+        
+        self.discard_segments(recording_info)
+        return file_path
+    
+    def discard_segments(self, recording_info: Dict[str, Any]):
+        """Delete a live-upload recording's segment files and segment list"""
+        uploader = recording_info.get('live_upload')
+        if uploader is None:
+            return
+        
+        for path in uploader.segments + [recording_info['segment_list']]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete {path}: {str(e)}")
+    
     def _record_frames(self, camera_id: str):
         """Record frames in a separate thread"""
         recording_info = self.active_recordings.get(camera_id)
@@ -179,6 +359,7 @@ class RecordingManager:
         start_time = recording_info['start_time']
         duration_minutes = recording_info['duration_minutes']
         file_path = recording_info['file_path']
+        pacer = recording_info['pacer']
         
         try:
             consecutive_failures = 0
@@ -189,9 +370,15 @@ class RecordingManager:
             
             while camera_id in self.active_recordings:
                 try:
+                    # cap.read() blocks until the camera delivers, so no sleep is needed;
+                    # frames beyond the file's frame rate are skipped by timestamp
                     ret, frame = cap.read()
                     
                     if ret and frame is not None and frame.size > 0:
+                        if not pacer.offer():
+                            consecutive_failures = 0
+                            continue
+                        
                         out.write(frame)
                         frames_written += 1
                         recording_info['frame_count'] = frames_written
@@ -209,9 +396,6 @@ class RecordingManager:
                                 logger.info(f"Recording {recording_id} reached duration limit")
                                 break
                         
-                        # Small delay to control frame rate
-                        time.sleep(0.04)  # ~25 FPS
-                        
                     else:
                         consecutive_failures += 1
                         if consecutive_failures >= max_failures:
@@ -242,40 +426,51 @@ class RecordingManager:
             except Exception as e:
                 logger.error(f"Error releasing writer: {str(e)}")
             
-            # Get final stats
-            file_size = 0
-            if file_path and file_path.exists():
-                file_size = file_path.stat().st_size
-            
-            duration = datetime.now() - start_time
-            
-            # Store final recording info before removing from active
-            recording_info['end_time'] = datetime.now()
-            recording_info['duration'] = duration
-            recording_info['file_size'] = file_size
-            recording_info['frames_written'] = frames_written
-            recording_info['completed'] = frames_written > 10 and file_size > 1000
-            
-            # Store completed recording info for callback
-            completed_info = recording_info.copy()
-            
-            # Remove from active recordings
-            if camera_id in self.active_recordings:
-                self.active_recordings.pop(camera_id)
-            
-            # Store in completed recordings (for monitoring task)
-            if not hasattr(self, 'completed_recordings'):
-                self.completed_recordings = []
-            self.completed_recordings.append(completed_info)
-            
-            # Keep only last 10 completed recordings
-            if len(self.completed_recordings) > 10:
-                self.completed_recordings = self.completed_recordings[-10:]
-            
-            logger.info(
-                f"Recording {recording_id} finished: "
-                f"{frames_written} frames, {file_size} bytes, {duration.total_seconds():.1f}s"
-            )
+            self._finish_recording(camera_id, recording_info, frames_written)
+    
+    def _finish_recording(self, camera_id: str, recording_info: Dict[str, Any], frames_written: int):
+        """Record final stats and hand the recording over to the completion monitor"""
+        start_time = recording_info['start_time']
+        file_path = recording_info['file_path']
+        recording_id = recording_info['recording_id']
+        
+        # Get final stats
+        file_size = 0
+        uploader = recording_info.get('live_upload')
+        if uploader is not None:
+            file_size = sum(path.stat().st_size for path in uploader.segments if path.exists())
+        elif file_path and file_path.exists():
+            file_size = file_path.stat().st_size
+        
+        duration = datetime.now() - start_time
+        
+        # Store final recording info before removing from active
+        recording_info['end_time'] = datetime.now()
+        recording_info['duration'] = duration
+        recording_info['file_size'] = file_size
+        recording_info['frames_written'] = frames_written
+        recording_info['completed'] = frames_written > 10 and file_size > 1000
+        
+        # Store completed recording info for callback
+        completed_info = recording_info.copy()
+        
+        # Remove from active recordings
+        if camera_id in self.active_recordings:
+            self.active_recordings.pop(camera_id)
+        
+        # Store in completed recordings (for monitoring task)
+        if not hasattr(self, 'completed_recordings'):
+            self.completed_recordings = []
+        self.completed_recordings.append(completed_info)
+        
+        # Keep only last 10 completed recordings
+        if len(self.completed_recordings) > 10:
+            self.completed_recordings = self.completed_recordings[-10:]
+        
+        logger.info(
+            f"Recording {recording_id} finished: "
+            f"{frames_written} frames, {file_size} bytes, {duration.total_seconds():.1f}s"
+        )
     
     def stop_recording(self, camera_id: str) -> Optional[Dict[str, Any]]:
         """Stop recording and return recording info"""
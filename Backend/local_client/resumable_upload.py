@@ -0,0 +1,158 @@
+"""
+Resumable GCS uploads for the local client
+Large recordings are sent through a resumable upload session in fixed-size
+chunks; the session URL is saved to disk so an upload interrupted by a network
+error or a client restart continues from the last acknowledged byte, and all
+uploads share one bandwidth throttle so they don't starve RTSP ingest
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+GCS_CHUNK_ALIGNMENT = 256 * 1024         # GCS resumable chunks must be multiples of 256 KiB
+GCS_SESSION_LIFETIME = 6 * 24 * 3600     # Sessions expire after a week; stop trusting them a day early
+
+
+class BandwidthThrottle:
+    """Caps the combined upload rate of all threads sharing this instance"""
+
+    def __init__(self, bytes_per_second: int = 0):
+        self.bytes_per_second = bytes_per_second
+        self._next_free = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int):
+        """Block until nbytes may be sent without exceeding the rate"""
+        if not self.bytes_per_second or nbytes <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bytes_per_second
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class UploadStateStore:
+    """Small JSON files recording in-progress uploads, one per destination object"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def load(self, key: str):
+        try:
+            return json.loads(self._path(key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, key: str, state: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(dict(state, key=key, saved_at=time.time())))
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_age_seconds: float):
+        """Remove state for uploads that were abandoned long ago"""
+        if not self.directory.is_dir():
+            return
+        cutoff = time.time() - max_age_seconds
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+def gcs_resumable_upload(blob, file_path: Path, state_store: UploadStateStore, throttle: BandwidthThrottle,
+                         content_type: str = None, chunk_size: int = 8 * 1024 * 1024, timeout: int = 300):
+    """
+    Upload a file through a GCS resumable session, resuming a saved session if possible
+
+    Raises:
+        Exception: If a chunk fails; calling again with the same file resumes the upload
+    """
+    import requests
+
+    stat = Path(file_path).stat()
+    file_size = stat.st_size
+    chunk_size = max(chunk_size // GCS_CHUNK_ALIGNMENT, 1) * GCS_CHUNK_ALIGNMENT
+    state_key = f"gcs:{blob.bucket.name}:{blob.name}"
+
+    state_store.prune(GCS_SESSION_LIFETIME)
+    state = state_store.load(state_key)
+    offset = None
+
+    if state and state.get('file_size') == file_size and state.get('file_mtime') == int(stat.st_mtime) \
+            and time.time() - state.get('created_at', 0) < GCS_SESSION_LIFETIME:
+        offset = _committed_offset(requests, state['session_url'], file_size, timeout)
+        if offset is not None:
+            logger.info(f"Resuming upload of {blob.name} at {offset}/{file_size} bytes")
+
+    if offset is None:
+        session_url = blob.create_resumable_upload_session(content_type=content_type, size=file_size, timeout=timeout)
+        state = {'session_url': session_url, 'file_size': file_size,
+                 'file_mtime': int(stat.st_mtime), 'created_at': time.time()}
+        state_store.save(state_key, state)
+        offset = 0
+
+    with open(file_path, 'rb') as source:
+        while offset < file_size:
+            source.seek(offset)
+            data = source.read(chunk_size)
+            end = offset + len(data) - 1
+            throttle.consume(len(data))
+
+            response = requests.put(state['session_url'], data=data, timeout=timeout,
+                                    headers={'Content-Range': f"bytes {offset}-{end}/{file_size}"})
+            if response.status_code in (200, 201):
+                offset = file_size
+            elif response.status_code == 308:
+                offset = _range_end(response)
+            else:
+                raise Exception(f"GCS chunk upload failed: HTTP {response.status_code} {response.text[:200]}")
+
+    state_store.delete(state_key)
+
+
+def _range_end(response) -> int:
+    """Bytes GCS has persisted, from the Range header of a 308 response"""
+    persisted = response.headers.get('Range')
+    if not persisted:
+        return 0
+    return int(persisted.rsplit('-', 1)[-1]) + 1
+
+
+def _committed_offset(requests, session_url: str, file_size: int, timeout: int):
+    """Ask a session how much it has stored; None if the session is gone"""
+    try:
+        response = requests.put(session_url, data=b'', timeout=timeout,
+                                headers={'Content-Range': f"bytes */{file_size}"})
+    except Exception as e:
+        logger.warning(f"Cannot query upload session: {str(e)}")
+        return None
+
+    if response.status_code in (200, 201):
+        return file_size
+    if response.status_code == 308:
+        return _range_end(response)
+    return None
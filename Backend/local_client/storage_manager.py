@@ -2,6 +2,7 @@
 GCP Storage manager for uploading recordings
 """
 import os
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional, Tuple
@@ -17,8 +18,10 @@ except ImportError:
 
 try:
     from .config import config
+    from .resumable_upload import BandwidthThrottle, UploadStateStore, gcs_resumable_upload
 except ImportError:
     from config import config
+    from resumable_upload import BandwidthThrottle, UploadStateStore, gcs_resumable_upload
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,8 @@ class StorageManager:
         self._client: Optional[storage.Client] = None
         self._bucket: Optional[storage.Bucket] = None
         self.bucket_connected = False
+        self.upload_state = UploadStateStore(config.UPLOAD_STATE_DIR)
+        self.throttle = BandwidthThrottle(config.UPLOAD_BANDWIDTH_LIMIT_KBPS * 1024)
         
         if GCP_AVAILABLE and self.bucket_name and self.credentials_path:
             self._initialize_client()
@@ -96,22 +101,17 @@ class StorageManager:
             return None, False  # Indicates not uploaded, but file is safely stored locally
         
         try:
-            # Generate GCP path: recordings/{camera_id}/{YYYYMMDD}/recording_{timestamp}.avi
-            date_str = datetime.now().strftime('%Y%m%d')
             filename = local_path.name
-            gcp_path = f"recordings/{camera_id}/{date_str}/{filename}"
+            gcp_path = self.build_path(camera_id, filename)
             
             logger.info(f"Uploading {local_path} to gs://{self.bucket_name}/{gcp_path}")
             
             # Upload file
             blob = self._bucket.blob(gcp_path)
-            blob.content_type = 'video/mp4' if filename.endswith('.mp4') else 'video/x-msvideo'
+            blob.content_type = self._content_type(filename)
             
-            # Upload with timeout
-            file_size = local_path.stat().st_size
-            timeout = max(300, min(900, file_size // (1024 * 1024) * 30))  # 30s per MB, min 5min, max 15min
-            
-            blob.upload_from_filename(str(local_path), timeout=timeout)
+            # Upload off the event loop; large files go through a resumable session
+            await asyncio.get_running_loop().run_in_executor(None, self._upload_blob, blob, local_path)
             
             # Verify upload
             if blob.exists():
@@ -135,6 +135,68 @@ class StorageManager:
             logger.error(f"Failed to upload recording to GCP: {str(e)}")
             return None, False
     
+    def build_path(self, camera_id: str, filename: str) -> str:
+        """GCP path for a recording: recordings/{camera_id}/{YYYYMMDD}/{filename}"""
+        date_str = datetime.now().strftime('%Y%m%d')
+        return f"recordings/{camera_id}/{date_str}/{filename}"
+    
+    @staticmethod
+    def _content_type(filename: str) -> str:
+        if filename.endswith('.mp4'):
+            return 'video/mp4'
+        if filename.endswith('.ts'):
+            return 'video/mp2t'
+        return 'video/x-msvideo'
+    
+    def append_segment(self, gcp_path: str, segment_path: Path, committed_size: int) -> int:
+        """
+        Append a finished recording segment to an object in the bucket (blocking)
+        
+        The first segment becomes the object; later ones are uploaded next to it
+        and composed onto its end server-side, so the object always holds
+        everything recorded so far
+        
+        Returns:
+            New size of the object in bytes
+        """
+        segment_size = segment_path.stat().st_size
+        blob = self._bucket.blob(gcp_path)
+        blob.content_type = self._content_type(gcp_path)
+        
+        if committed_size == 0:
+            self._upload_blob(blob, segment_path)
+            return segment_size
+        
+        # A retry after a compose whose response got lost must not append the segment twice
+        blob.reload()
+        if blob.size >= committed_size + segment_size:
+            return blob.size
+        
+        part = self._bucket.blob(f"{gcp_path}.part")
+        part.content_type = blob.content_type
+        self._upload_blob(part, segment_path)
+        blob.compose([blob, part])
+        
+        try:
+            part.delete()
+        except Exception as e:
+            logger.warning(f"Failed to delete segment part {part.name}: {str(e)}")
+        
+        return committed_size + segment_size
+    
+    def _upload_blob(self, blob, local_path: Path):
+        """Upload a file to a blob (blocking)"""
+        file_size = local_path.stat().st_size
+        chunk_size = config.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024
+        
+        if file_size > chunk_size:
+            # Each chunk request gets the timeout, not the whole file
+            gcs_resumable_upload(blob, local_path, self.upload_state, self.throttle,
+                                 content_type=blob.content_type, chunk_size=chunk_size)
+        else:
+            self.throttle.consume(file_size)
+            blob.upload_from_filename(str(local_path), timeout=300)
+    
     async def move_to_pending(self, local_path: Path):
         """Move file to pending uploads directory for retry"""
         try:
@@ -0,0 +1,78 @@
+"""
+Tests for the live segment upload of the local client
+Run from the Backend directory: python -m unittest local_client.test_live_upload
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from local_client.live_upload import LiveUploader
+from local_client.remux import read_completed_segments
+
+
+class FakeStorage:
+    """Records appended segments; fails the first ``failures`` calls"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.appended = []
+
+    def append_segment(self, gcp_path, segment_path, committed_size):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("bucket unavailable")
+        self.appended.append((segment_path.name, committed_size))
+        return committed_size + 100
+
+
+class LiveUploaderTest(unittest.TestCase):
+    def test_segments_are_appended_in_order_after_retries(self):
+        storage = FakeStorage(failures=2)
+        uploader = LiveUploader(storage, 'recordings/cam/rec.ts', retry_delay=0.01)
+
+        for name in ('seg_000.ts', 'seg_001.ts', 'seg_002.ts'):
+            uploader.add_segment(Path(name))
+
+        self.assertEqual(uploader.finish(timeout=5), ('recordings/cam/rec.ts', True))
+        self.assertEqual(storage.appended, [('seg_000.ts', 0), ('seg_001.ts', 100), ('seg_002.ts', 200)])
+        self.assertEqual(uploader.stats()['bytes_uploaded'], 300)
+
+    def test_unfinished_upload_falls_back_to_whole_file(self):
+        uploader = LiveUploader(FakeStorage(failures=1000), 'recordings/cam/rec.ts', retry_delay=0.01)
+        uploader.add_segment(Path('seg_000.ts'))
+
+        self.assertEqual(uploader.finish(timeout=0.1), (None, False))
+        self.assertEqual(uploader.stats()['last_error'], "bucket unavailable")
+
+    def test_recording_without_segments_is_not_live_uploaded(self):
+        uploader = LiveUploader(FakeStorage(), 'recordings/cam/rec.ts')
+
+        self.assertEqual(uploader.finish(timeout=5), (None, False))
+
+
+class ReadCompletedSegmentsTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_only_new_complete_lines_are_returned(self):
+        with open(self.path, 'w') as list_file:
+            list_file.write('seg_000.ts,0.000000,300.000000\n'
+                            '"seg_001.ts",300.000000,600.000000\n'
+                            'seg_002.ts,600.0')
+
+        self.assertEqual(read_completed_segments(self.path), [
+            ('seg_000.ts', 0.0, 300.0),
+            ('seg_001.ts', 300.0, 600.0),
+        ])
+        self.assertEqual(read_completed_segments(self.path, already_seen=1), [('seg_001.ts', 300.0, 600.0)])
+
+    def test_missing_list_means_no_segments_yet(self):
+        self.assertEqual(read_completed_segments(self.path + '.missing'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
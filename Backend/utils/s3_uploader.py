@@ -285,13 +285,14 @@ class S3Uploader:
             logger.error(f"Error during batch delete: {str(e)}")
             return success_count, len(s3_keys) - success_count
     
-    def list_files(self, prefix: str = '', max_keys: int = 1000) -> List[Dict]:
+    def list_files(self, prefix: str = '', max_keys: int = 1000, raise_errors: bool = False) -> List[Dict]:
         """
         List files in bucket with given prefix
         
         Args:
             prefix: S3 key prefix to filter results
             max_keys: Maximum number of keys to return
+            raise_errors: Raise listing errors instead of returning an empty list
             
         Returns:
             List of dictionaries containing file information
@@ -327,11 +328,13 @@ class S3Uploader:
                 
                 continuation_token = response.get('NextContinuationToken')
             
-            logger.info(f"Listed {len(files)} files with prefix '{prefix}'")
+            logger.debug(f"Listed {len(files)} files with prefix '{prefix}'")
             return files
             
         except Exception as e:
             logger.error(f"Error listing files in S3: {str(e)}")
+            if raise_errors:
+                raise
             return []
     
     def file_exists(self, s3_key: str) -> bool:
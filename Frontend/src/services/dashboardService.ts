@@ -106,15 +106,15 @@ export class DashboardService {
   }
 
   /**
-   * Get storage usage data for the last 30 days
-   * @returns Promise with storage usage data
+   * Get the size of retained recordings by start date for the last 30 days
+   * @returns Promise with retained storage data
    */
-  static async getStorageUsage() {
+  static async getRetainedStorage() {
     try {
       const analytics = await this.getAnalytics();
-      return analytics.storage_usage_30_days;
+      return analytics.retained_storage_by_start_date;
     } catch (error) {
-      console.error('Error fetching storage usage:', error);
+      console.error('Error fetching retained storage:', error);
       throw error;
     }
   }
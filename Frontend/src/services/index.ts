@@ -96,7 +96,7 @@ const cctvService = {
   getRecordingActivity: dashboardService.getRecordingActivity.bind(dashboardService),
   getHourlyActivity: dashboardService.getHourlyActivity.bind(dashboardService),
   getScheduleTypeDistribution: dashboardService.getScheduleTypeDistribution.bind(dashboardService),
-  getStorageUsage: dashboardService.getStorageUsage.bind(dashboardService),
+  getRetainedStorage: dashboardService.getRetainedStorage.bind(dashboardService),
   refreshDashboard: dashboardService.refreshDashboard.bind(dashboardService),
 };
 
@@ -428,9 +428,11 @@ export interface ScheduleTypeDistribution {
   count: number;
 }
 
-export interface StorageUsage {
+/** Size of the recordings that still exist, by the day they started (not a disk usage history) */
+export interface RetainedStorage {
   date: string;
-  storage_gb: number;
+  recorded_gb: number;
+  cumulative_gb: number;
 }
 
 export interface SystemMetrics {
@@ -448,7 +450,7 @@ export interface DashboardAnalytics {
   recording_activity_7_days: RecordingActivity[];
   hourly_activity_today: HourlyActivity[];
   schedule_type_distribution: ScheduleTypeDistribution[];
-  storage_usage_30_days: StorageUsage[];
+  retained_storage_by_start_date: RetainedStorage[];
   system_metrics: SystemMetrics;
 }
 